@@ -0,0 +1,500 @@
+"""
+End-to-end scheduler and worker load test on throwaway MongoDB and Redis.
+
+Seeds N schedules from seed.generate_tasks() (a production-like mix of
+cron expressions and priorities) through TaskManager.create_schedules, then
+for --duration seconds runs the API's background loops (scheduler,
+partition leases, schedule listener, reschedule and retry loops) next to
+--workers dispatch consumers. Each consumer runs what it claims through the
+worker's own prepare_run and handle_process_result, with a --run-ms sleep
+in place of the operator process. Reported:
+  * seeding: schedules created per second;
+  * scheduler tick time: due-task lookup plus dispatch_tasks (p50/p99/max);
+  * dispatch lag: run start (RUNNING written) minus next_run, for the first
+    attempt of every firing (p50/p99/max);
+  * throughput: runs finished per second;
+  * memory: peak RSS of this process, and of mongod / redis-server when the
+    harness started them.
+
+By default the harness starts its own mongod and redis-server (from PATH,
+or the MONGOD / REDIS_SERVER environment variables) on free ports, with
+their data in a temporary directory that is removed afterwards, so it
+neither needs docker-compose nor touches the servers the tests use. With
+--mongo-uri / --redis-url it uses running servers instead: it works in the
+tasks_db_bench database and FLUSHES the Redis database of the URL.
+In-process stand-ins (mongomock, fakeredis) are deliberately not offered:
+mongomock scans every document per query and does not accept the
+UpdateOne requests of current pymongo in bulk_write, so its timings would
+not describe the real code.
+
+Every-minute schedules fire on each minute boundary, so a run should span a
+few of them. The scheduler settings come from backend/config.json unless
+overridden on the command line; the production max_parallelism of 10 caps
+dispatch far below what the workers can run, so pass --max-parallelism to
+measure the workers rather than the cap.
+
+How to run:
+    python backend/benchmarks/bench_e2e.py
+    python backend/benchmarks/bench_e2e.py --schedules 1000000 --duration 300 --workers 16 --max-parallelism 5000
+    python backend/benchmarks/bench_e2e.py --mongo-uri mongodb://localhost:27017 --redis-url redis://localhost:6340/15
+    python backend/benchmarks/bench_e2e.py --baseline backend/benchmarks/results/e2e-1700000000.json
+
+Results are written to backend/benchmarks/results/ as JSON; --baseline
+prints the headline numbers next to those of an earlier result.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+import random
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+import redis
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient
+from redis.asyncio import Redis
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+WORKER_DIR = os.path.join(BACKEND_DIR, "..", "worker")
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(1, WORKER_DIR)
+from indexes import ensure_indexes
+from manager import TaskManager
+from schedule_heap import NextRunHeap
+from seed import generate_tasks
+
+import tasks
+from dispatcher import DispatchConsumer
+from run_lock import RunLock
+from state_writer import StateWriter
+
+# --- CONFIGURATION ---
+DB_NAME = "tasks_db_bench"
+DEFAULT_SCHEDULES = 10_000
+DEFAULT_DURATION = 150
+SEED_BATCH = 10_000
+SERVER_START_TIMEOUT = 30
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+# ---------------------
+
+# (section, metric) pairs printed against --baseline.
+HEADLINE = [
+    ("seed", "schedules_per_second"),
+    ("tick_ms", "p50"),
+    ("tick_ms", "p99"),
+    ("dispatch_lag_ms", "p50"),
+    ("dispatch_lag_ms", "p99"),
+    ("throughput", "runs_per_second"),
+    ("memory", "peak_rss_mb"),
+]
+
+
+def say(*args):
+    """Progress output; the scheduler and worker logs are muted unless --verbose."""
+    print(*args, file=sys.__stdout__, flush=True)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return None
+    index = max(0, min(len(values) - 1, int(round(pct / 100 * len(values))) - 1))
+    return values[index]
+
+
+def summarize(values) -> dict:
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "p50": round(percentile(values, 50), 3) if values else None,
+        "p99": round(percentile(values, 99), 3) if values else None,
+        "max": round(values[-1], 3) if values else None,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def rss_mb(pid: int) -> float:
+    """Resident memory of a process from /proc (Linux), or None."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+class LocalServers:
+    """mongod and redis-server on free ports, with their data in a temporary directory."""
+
+    def __init__(self):
+        self.data_dir = None
+        self.mongod = None
+        self.redis_server = None
+        self.mongo_uri = None
+        self.redis_url = None
+
+    def start(self):
+        mongod = shutil.which(os.environ.get("MONGOD", "mongod"))
+        redis_server = shutil.which(os.environ.get("REDIS_SERVER", "redis-server"))
+        if not mongod or not redis_server:
+            missing = [name for name, path in (("mongod", mongod), ("redis-server", redis_server)) if not path]
+            raise SystemExit(f"❌ {' and '.join(missing)} not found on PATH. Install them, set "
+                             f"MONGOD / REDIS_SERVER, or pass --mongo-uri and --redis-url.")
+
+        self.data_dir = tempfile.mkdtemp(prefix="bench_e2e_")
+        os.makedirs(os.path.join(self.data_dir, "mongo"))
+        mongo_port, redis_port = free_port(), free_port()
+        self.mongod = subprocess.Popen(
+            [mongod, "--dbpath", os.path.join(self.data_dir, "mongo"), "--port", str(mongo_port),
+             "--bind_ip", "127.0.0.1", "--logpath", os.path.join(self.data_dir, "mongod.log")],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        self.redis_server = subprocess.Popen(
+            [redis_server, "--port", str(redis_port), "--bind", "127.0.0.1", "--save", "",
+             "--appendonly", "no", "--dir", self.data_dir],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        self.mongo_uri = f"mongodb://127.0.0.1:{mongo_port}"
+        self.redis_url = f"redis://127.0.0.1:{redis_port}/0"
+
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        while True:
+            probe = MongoClient(self.mongo_uri, serverSelectionTimeoutMS=500)
+            try:
+                probe.admin.command("ping")
+                redis.Redis.from_url(self.redis_url).ping()
+                return
+            except Exception:
+                if time.monotonic() > deadline:
+                    self.stop()
+                    raise SystemExit(f"❌ Local servers did not start within {SERVER_START_TIMEOUT}s")
+                time.sleep(0.2)
+            finally:
+                probe.close()
+
+    def memory(self) -> dict:
+        return {"mongod_rss_mb": rss_mb(self.mongod.pid),
+                "redis_rss_mb": rss_mb(self.redis_server.pid)}
+
+    def stop(self):
+        for process in (self.mongod, self.redis_server):
+            if process is not None and process.poll() is None:
+                process.terminate()
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+        if self.data_dir:
+            shutil.rmtree(self.data_dir, ignore_errors=True)
+
+
+def bind_worker(db, client):
+    """Point the worker module at the benchmark servers.
+
+    tasks.py connects to the docker-compose ports at import; its functions
+    look these globals up on every call, so rebinding them is enough.
+    """
+    tasks.db = db
+    tasks.redis_list_client = client
+    tasks.state_writer = StateWriter(db, write_behind=tasks.state_writer.write_behind,
+                                     flush_ms=tasks.state_writer.flush_interval * 1000)
+    tasks.run_lock = RunLock(client, ttl_seconds=tasks.run_lock.ttl_ms / 1000)
+    # Bind the Celery tasks (mark_task_state is one) before the consumer
+    # threads call them directly, as a worker does on startup.
+    tasks.app.finalize(auto=True)
+
+
+class TickTimer:
+    """Times scheduler ticks: the due-task lookup plus dispatch_tasks.
+
+    Wraps the manager's methods in place, so whichever scheduler loop runs
+    is measured without changing it.
+    """
+
+    def __init__(self, manager):
+        self.ticks = []
+        self._started = None
+        for name in ("date_time_criteria", "fetch_queue_fields"):
+            setattr(manager, name, self._lookup(getattr(manager, name)))
+        manager.dispatch_tasks = self._dispatch(manager.dispatch_tasks)
+
+    def _lookup(self, method):
+        async def timed(*args, **kwargs):
+            self._started = time.perf_counter()
+            return await method(*args, **kwargs)
+        return timed
+
+    def _dispatch(self, method):
+        async def timed(tasks_ready):
+            try:
+                return await method(tasks_ready)
+            finally:
+                if self._started is not None:
+                    self.ticks.append((time.perf_counter() - self._started, len(tasks_ready)))
+                    self._started = None
+        return timed
+
+
+class WorkerStats:
+    """Counters and dispatch lags shared by the consumer threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.lags_ms = []
+        self.finished = 0
+        self.failed = 0
+        self.dropped = 0
+        self.errors = 0
+
+
+def run_claimed(task_name: str, stats: WorkerStats, rng: random.Random, run_ms: float, failure_rate: float):
+    """What execute_operator_task does with a claimed task, minus the operator process."""
+    try:
+        task_doc, config, token = tasks.prepare_run(task_name, payload=getattr(task_name, "payload", None))
+    except tasks.LockBusy:
+        task_doc = config = None
+    if not config:
+        with stats.lock:
+            stats.dropped += 1
+        return
+
+    start_time = datetime.now(timezone.utc)
+    attempt_num = tasks.attempt_number(task_doc)
+    try:
+        time.sleep(run_ms / 1000)
+        exit_code = 1 if rng.random() < failure_rate else 0
+        result = tasks.handle_process_result(
+            task_name, exit_code, threading.Event(), threading.Event(), "", "", start_time,
+            attempt_num, max_retries=task_doc.get("max_retries", 3), fence=token,
+            retry_backoff=task_doc.get("retry_backoff"), priority=task_doc.get("priority", 3),
+        )
+    finally:
+        tasks.state_writer.call_after_writes(lambda: tasks.run_lock.release(task_name, token))
+
+    next_run = task_doc.get("next_run")
+    with stats.lock:
+        stats.finished += 1
+        stats.failed += result != "success"
+        if attempt_num == 1 and next_run is not None:
+            next_run = next_run.replace(tzinfo=timezone.utc) if next_run.tzinfo is None else next_run
+            stats.lags_ms.append((start_time - next_run).total_seconds() * 1000)
+
+
+def consume(index: int, client, stop: threading.Event, stats: WorkerStats, args):
+    """One dispatch consumer running its claims inline until stopped."""
+    consumer = DispatchConsumer(client, consumer_id=f"bench_e2e_{index}")
+    rng = random.Random(args.seed * 1000 + index)
+    consumer.heartbeat()
+    while not stop.is_set():
+        item = consumer.claim(0.5)
+        if item is None:
+            consumer.heartbeat()
+            continue
+        try:
+            run_claimed(item, stats, rng, args.run_ms, args.failure_rate)
+        except Exception as e:
+            print(f"[Bench] Run of '{item}' failed: {e}")
+            with stats.lock:
+                stats.errors += 1
+        finally:
+            consumer.ack(item)
+
+
+def make_manager(db, redis_client, args) -> TaskManager:
+    """TaskManager with backend/config.json, plus the command line overrides."""
+    manager = TaskManager(db, redis_client)
+    if args.scheduler_mode:
+        manager.scheduler_mode = args.scheduler_mode
+        manager.schedule_heap = NextRunHeap() if args.scheduler_mode == "heap" else None
+    if args.poll_interval:
+        manager.poll_interval_seconds = args.poll_interval
+    if args.max_parallelism:
+        manager.max_parallelism = args.max_parallelism
+    return manager
+
+
+async def seed(manager, args) -> dict:
+    """Create the schedules in SEED_BATCH batches, as POST /bulk/tasks would."""
+    created, seconds = 0, 0.0
+    generated = generate_tasks(args.schedules, seed=args.seed)
+    while True:
+        batch = list(itertools.islice(generated, SEED_BATCH))
+        if not batch:
+            break
+        started = time.perf_counter()
+        result = await manager.create_schedules(batch)
+        seconds += time.perf_counter() - started
+        created += result["created"]
+        if result["errors"]:
+            raise RuntimeError(f"Seeding rejected schedules: {result['errors'][:3]}")
+        say(f"   {created:,}/{args.schedules:,} schedules created")
+    return {"created": created, "seconds": round(seconds, 3),
+            "schedules_per_second": round(created / seconds, 1) if seconds else None}
+
+
+async def run_benchmark(args, mongo_uri: str, redis_url: str) -> dict:
+    mongo_client = AsyncIOMotorClient(mongo_uri)
+    db = mongo_client[DB_NAME]
+    redis_client = Redis.from_url(redis_url, decode_responses=True)
+    worker_mongo = MongoClient(mongo_uri)
+    worker_redis = redis.Redis.from_url(redis_url)
+
+    await mongo_client.drop_database(DB_NAME)
+    await redis_client.flushdb()
+    bind_worker(worker_mongo[DB_NAME], worker_redis)
+    tasks.publish_operator_registry()
+
+    manager = make_manager(db, redis_client, args)
+    await ensure_indexes(db, attempt_retention_days=manager.attempt_retention_days,
+                         log_collection_mb=manager.log_collection_mb)
+    timer = TickTimer(manager)
+    report = {"scheduler_mode": manager.scheduler_mode,
+              "max_parallelism": manager.max_parallelism,
+              "poll_interval_seconds": manager.poll_interval_seconds}
+
+    say(f"🌱 Seeding {args.schedules:,} schedules...")
+    report["seed"] = await seed(manager, args)
+    rss_after_seed = rss_mb(os.getpid())
+
+    say(f"⏱️  Running {args.duration}s with {args.workers} workers ({manager.scheduler_mode} scheduler)...")
+    stats = WorkerStats()
+    stop = threading.Event()
+    consumers = [threading.Thread(target=consume, args=(i, worker_redis, stop, stats, args), daemon=True)
+                 for i in range(args.workers)]
+    loops = [asyncio.create_task(coro) for coro in (
+        manager.run_scheduler_loop(),
+        manager.run_partition_loop(),
+        manager.run_schedule_listener(),
+        manager.run_reschedule_loop(),
+        manager.run_retry_loop(),
+    )]
+    for thread in consumers:
+        thread.start()
+    started = time.perf_counter()
+    await asyncio.sleep(args.duration)
+
+    stop.set()
+    for thread in consumers:
+        await asyncio.to_thread(thread.join)
+    elapsed = time.perf_counter() - started
+    for loop_task in loops:
+        loop_task.cancel()
+    await asyncio.gather(*loops, return_exceptions=True)
+    tasks.state_writer.flush()
+
+    tick_seconds = [seconds * 1000 for seconds, _ in timer.ticks]
+    report["tick_ms"] = {**summarize(tick_seconds),
+                         "max_due": max((due for _, due in timer.ticks), default=0)}
+    report["dispatch_lag_ms"] = summarize(stats.lags_ms)
+    report["throughput"] = {
+        "runs_finished": stats.finished,
+        "runs_failed": stats.failed,
+        "runs_dropped": stats.dropped,
+        "errors": stats.errors,
+        "runs_per_second": round(stats.finished / elapsed, 1),
+        "left_in_dispatch_queue": await redis_client.zcard("dispatch_queue"),
+    }
+    report["memory"] = {
+        "rss_after_seed_mb": rss_after_seed,
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "heap_entries": len(manager.schedule_heap) if manager.schedule_heap is not None else None,
+    }
+
+    await manager.partitions.leave()
+    await mongo_client.drop_database(DB_NAME)
+    await redis_client.flushdb()
+    await redis_client.aclose()
+    mongo_client.close()
+    worker_mongo.close()
+    return report
+
+
+def compare(report: dict, baseline_path: str):
+    """Print the headline numbers of this run next to an earlier result."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    say(f"📊 Compared with {baseline_path}:")
+    for section, metric in HEADLINE:
+        old = (baseline.get(section) or {}).get(metric)
+        new = (report.get(section) or {}).get(metric)
+        change = f" ({(new - old) / old:+.1%})" if old and new is not None else ""
+        say(f"   {section}.{metric}: {old} -> {new}{change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--schedules", type=int, default=DEFAULT_SCHEDULES)
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="seconds to run after seeding")
+    parser.add_argument("--workers", type=int, default=4, help="dispatch consumer threads")
+    parser.add_argument("--run-ms", type=float, default=10, help="simulated operator run time")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of runs that exit non-zero")
+    parser.add_argument("--scheduler-mode", choices=["poll", "heap"], help="overrides config.json")
+    parser.add_argument("--poll-interval", type=float, help="overrides config.json")
+    parser.add_argument("--max-parallelism", type=int, help="overrides config.json")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated schedules")
+    parser.add_argument("--mongo-uri", help="use this MongoDB instead of starting one")
+    parser.add_argument("--redis-url", help="use this Redis database (flushed!) instead of starting one")
+    parser.add_argument("--baseline", help="earlier result JSON to compare with")
+    parser.add_argument("--verbose", action="store_true", help="show the scheduler and worker logs")
+    args = parser.parse_args()
+    if bool(args.mongo_uri) != bool(args.redis_url):
+        parser.error("--mongo-uri and --redis-url go together")
+    baseline = os.path.abspath(args.baseline) if args.baseline else None
+
+    # Operator paths resolve against the worker directory, as for a real worker
+    os.chdir(WORKER_DIR)
+    servers = None
+    if not args.mongo_uri:
+        servers = LocalServers()
+        servers.start()
+    mongo_uri = args.mongo_uri or servers.mongo_uri
+    redis_url = args.redis_url or servers.redis_url
+
+    report = {"created_at": datetime.now(timezone.utc).isoformat(),
+              **{k: v for k, v in vars(args).items() if k not in ("mongo_uri", "redis_url", "baseline", "verbose")},
+              "servers": "local" if servers else "external"}
+    try:
+        with open(os.devnull, "w") as devnull, \
+                contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+            report.update(asyncio.run(run_benchmark(args, mongo_uri, redis_url)))
+            if servers:
+                report["memory"].update(servers.memory())
+    finally:
+        if servers:
+            servers.stop()
+
+    say(f"   seeding {report['seed']['schedules_per_second']} schedules/s, "
+        f"tick p99 {report['tick_ms']['p99']}ms, dispatch lag p50 {report['dispatch_lag_ms']['p50']}ms "
+        f"p99 {report['dispatch_lag_ms']['p99']}ms, {report['throughput']['runs_per_second']} runs/s, "
+        f"peak RSS {report['memory']['peak_rss_mb']}MB")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = os.path.join(RESULTS_DIR, f"e2e-{int(time.time())}.json")
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2)
+    say(f"📝 Results written to {out_path}")
+    if baseline:
+        compare(report, baseline)
+
+
+if __name__ == "__main__":
+    main()
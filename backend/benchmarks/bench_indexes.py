@@ -0,0 +1,181 @@
+"""
+Query-plan and latency benchmark for the scheduler's hot MongoDB queries.
+
+Seeds a scratch database with N schedules (and N/10 queue rows), builds the
+managed index set from indexes.py, then records the winning plan and latency
+of every query the scheduler and worker issue per tick. The filters and
+projections are the ones manager.py runs, for a replica holding
+OWNED_PARTITIONS of SCHEDULER_PARTITIONS (the slot filter of partitions.py).
+
+How to run (MongoDB from docker-compose must be up):
+    python backend/benchmarks/bench_indexes.py              # 10k, 100k, 1M
+    python backend/benchmarks/bench_indexes.py 10000 50000  # custom sizes
+
+Results are written to backend/benchmarks/results/ as JSON. The script exits
+with status 1 if any query falls back to a collection scan.
+"""
+
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from indexes import INDEXES
+from manager import (
+    DISPATCH_FIELDS, HEAP_FIELDS, QUEUE_FIELDS, due_filter, heap_filter, named_due_filter, pending_queue_filter,
+)
+from partitions import slot_filter, slot_of
+
+# --- CONFIGURATION ---
+MONGO_URI = "mongodb://localhost:27017"
+DB_NAME = "tasks_db_bench"
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+INSERT_BATCH = 10_000
+REPETITIONS = 50
+# One replica of four: every fourth partition, so the slot filter is an $or of ranges.
+SCHEDULER_PARTITIONS = 16
+OWNED_PARTITIONS = range(0, SCHEDULER_PARTITIONS, 4)
+MAX_PARALLELISM = 10
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+# ---------------------
+
+STATES = ["PENDING"] * 7 + ["PAUSED", "COMPLETED", "RUNNING"]
+CRONS = ["*/1 * * * *", "*/5 * * * *", "0 * * * *", "0 2 * * *", "30 9 * * 1-5"]
+
+
+def make_schedule(i: int, now: datetime) -> dict:
+    """Build one realistic schedule document."""
+    start = now - timedelta(days=random.randint(0, 30))
+    return {
+        "task_name": f"bench_task_{i}",
+        "slot": slot_of(f"bench_task_{i}"),
+        "cron": random.choice(CRONS),
+        "priority": random.randint(1, 3),
+        "state": random.choice(STATES),
+        "start_date": start,
+        "end_date": start + timedelta(days=random.randint(1, 365)),
+        "next_run": now + timedelta(seconds=random.randint(-3600, 86400)),
+        "max_retries": 3,
+        "num_of_retries": 0,
+        "timeout_seconds": 600,
+        "task_config": {"operator_path": "operators/example_operator.py"},
+    }
+
+
+def seed(db, size: int, now: datetime):
+    """Recreate both collections with `size` schedules and size/10 queue rows."""
+    db.schedules.drop()
+    db.queue_table.drop()
+    for collection_name, models in INDEXES.items():
+        db[collection_name].create_indexes(models)
+
+    for offset in range(0, size, INSERT_BATCH):
+        batch = [make_schedule(i, now) for i in range(offset, min(offset + INSERT_BATCH, size))]
+        db.schedules.insert_many(batch, ordered=False)
+        queue_rows = [{k: d[k] for k in (*QUEUE_FIELDS, "state", "num_of_retries") if k in d}
+                      for d in batch[::10]]
+        db.queue_table.insert_many(queue_rows, ordered=False)
+
+
+def plan_stages(plan: dict) -> list:
+    """Flatten the stage names of a winning plan tree."""
+    stages = [plan.get("stage")]
+    if "inputStage" in plan:
+        stages += plan_stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        stages += plan_stages(child)
+    return [s for s in stages if s]
+
+
+def measure(make_cursor) -> dict:
+    """Explain one query and time REPETITIONS executions of it."""
+    explain = make_cursor().explain()
+    winning = explain["queryPlanner"]["winningPlan"]
+    # Newer servers wrap the plan for the slot-based engine.
+    winning = winning.get("queryPlan", winning)
+    stats = explain.get("executionStats", {})
+
+    latencies = []
+    for _ in range(REPETITIONS):
+        started = time.perf_counter()
+        list(make_cursor())
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+
+    return {
+        "stages": plan_stages(winning),
+        "docs_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "returned": stats.get("nReturned"),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1], 3),
+    }
+
+
+def run_size(db, size: int) -> dict:
+    """Seed one size and measure every hot query against it."""
+    now = datetime.now(timezone.utc)
+    print(f"🌱 Seeding {size:,} schedules...")
+    seed(db, size, now)
+
+    slots = slot_filter(OWNED_PARTITIONS, SCHEDULER_PARTITIONS)
+    sample_name = f"bench_task_{random.randrange(size)}"
+    due_names = [f"bench_task_{random.randrange(size)}" for _ in range(MAX_PARALLELISM)]
+
+    queries = {
+        "date_time_criteria": lambda: db.schedules.find(due_filter(now, slots), QUEUE_FIELDS),
+        "load_schedule_heap": lambda: db.schedules.find(heap_filter(now, slots), HEAP_FIELDS),
+        "fetch_queue_fields": lambda: db.schedules.find(named_due_filter(due_names), QUEUE_FIELDS),
+        "schedule_by_task_name": lambda: db.schedules.find({"task_name": sample_name}).limit(1),
+        "queue_by_task_name": lambda: db.queue_table.find({"task_name": sample_name}).limit(1),
+        "queue_top_priority": lambda: db.queue_table.find(
+            pending_queue_filter(now, slots), DISPATCH_FIELDS
+        ).sort("priority", 1).limit(MAX_PARALLELISM),
+    }
+
+    results = {}
+    for name, make_cursor in queries.items():
+        results[name] = measure(make_cursor)
+        r = results[name]
+        print(f"   {name:<24} {'/'.join(r['stages']):<32} "
+              f"examined={r['docs_examined']} p50={r['p50_ms']}ms p99={r['p99_ms']}ms")
+    return results
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    client = MongoClient(MONGO_URI)
+    db = client[DB_NAME]
+
+    report = {"created_at": datetime.now(timezone.utc).isoformat(), "sizes": {}}
+    collection_scans = []
+    try:
+        for size in sizes:
+            report["sizes"][str(size)] = run_size(db, size)
+            for name, result in report["sizes"][str(size)].items():
+                if "COLLSCAN" in result["stages"]:
+                    collection_scans.append(f"{name} @ {size:,}")
+    finally:
+        client.drop_database(DB_NAME)
+        client.close()
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = os.path.join(RESULTS_DIR, f"indexes-{int(time.time())}.json")
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"📝 Results written to {out_path}")
+
+    if collection_scans:
+        print(f"❌ Collection scan detected: {', '.join(collection_scans)}")
+        sys.exit(1)
+    print("✅ Every query is index-backed.")
+
+
+if __name__ == "__main__":
+    main()
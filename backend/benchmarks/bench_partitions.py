@@ -0,0 +1,145 @@
+"""
+Scheduler work split across replicas with partition leases.
+
+Seeds a scratch database with N due schedules, then for 1, 2, 4 and 8
+replicas (TaskManager instances with their own member ids, sharing MongoDB and
+Redis) lets the partition leases settle and runs two scheduler ticks on every
+replica concurrently. Reported per replica count:
+  * documents each replica read and how long the slowest tick took;
+  * tasks queued for dispatch, and how many of them were duplicates. The
+    queue is emptied between the ticks as if workers had claimed everything
+    before any run started, so the second tick must queue nothing.
+
+How to run (MongoDB and Redis from docker-compose must be up; uses Redis db 15):
+    python backend/benchmarks/bench_partitions.py
+    python backend/benchmarks/bench_partitions.py 50000
+
+Results are written to backend/benchmarks/results/ as JSON.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from redis.asyncio import Redis
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from indexes import INDEXES
+from manager import DISPATCH_QUEUE, DISPATCH_READY, TaskManager
+from partitions import MEMBERS_KEY, assign_partitions, slot_of
+
+# --- CONFIGURATION ---
+MONGO_URI = "mongodb://localhost:27017"
+DB_NAME = "tasks_db_bench"
+REDIS_DB = 15
+DEFAULT_SIZE = 20_000
+REPLICA_COUNTS = [1, 2, 4, 8]
+INSERT_BATCH = 10_000
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+# ---------------------
+
+
+async def seed(db, size: int):
+    """Insert `size` PENDING schedules that are all due now."""
+    await db.schedules.drop()
+    await db.queue_table.drop()
+    for name, indexes in INDEXES.items():
+        if name in ("schedules", "queue_table"):
+            await db[name].create_indexes(indexes)
+    now = datetime.now(timezone.utc)
+    for start in range(0, size, INSERT_BATCH):
+        await db.schedules.insert_many([
+            {
+                "task_name": f"bench_task_{i}",
+                "slot": slot_of(f"bench_task_{i}"),
+                "priority": i % 3 + 1,
+                "state": "PENDING",
+                "start_date": now - timedelta(days=1),
+                "end_date": now + timedelta(days=1),
+                "next_run": now - timedelta(seconds=1),
+                "task_config": {"operator_path": "operators/example_operator.py"},
+            }
+            for i in range(start, min(start + INSERT_BATCH, size))
+        ])
+
+
+async def settle(managers, rounds: int = 10):
+    """Refresh every replica's leases until each holds exactly its assigned share."""
+    partitions = managers[0].partitions.partitions
+    assignment = assign_partitions([m.partitions.member_id for m in managers], partitions)
+    for _ in range(rounds):
+        for manager in managers:
+            await manager.partitions.refresh()
+        if all(manager.partitions.owned == assignment[manager.partitions.member_id]
+               for manager in managers):
+            return
+    raise RuntimeError("partition leases did not settle")
+
+
+async def tick(manager):
+    """One poll-mode scheduler tick; returns (documents read, seconds)."""
+    started = time.perf_counter()
+    tasks_ready = await manager.date_time_criteria()
+    await manager.dispatch_tasks(tasks_ready)
+    return len(tasks_ready), time.perf_counter() - started
+
+
+async def run_replicas(db, redis_client, size: int, replicas: int) -> dict:
+    await seed(db, size)
+    await redis_client.flushdb()
+    managers = [TaskManager(db, redis_client) for _ in range(replicas)]
+    for manager in managers:
+        manager.max_parallelism = size
+    await settle(managers)
+
+    first = await asyncio.gather(*(tick(m) for m in managers))
+    # Workers claimed everything, but no run has started (tasks still PENDING)
+    await redis_client.delete(DISPATCH_QUEUE)
+    second = await asyncio.gather(*(tick(m) for m in managers))
+    pushed = await redis_client.llen(DISPATCH_READY)
+
+    for manager in managers:
+        await manager.partitions.leave()
+    return {
+        "documents_per_replica": [docs for docs, _ in first],
+        "slowest_tick_seconds": round(max(seconds for _, seconds in first), 3),
+        "pushed": pushed,
+        "duplicates": pushed - size,
+        "second_tick_seconds": round(max(seconds for _, seconds in second), 3),
+    }
+
+
+async def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE
+    mongo_client = AsyncIOMotorClient(MONGO_URI)
+    db = mongo_client[DB_NAME]
+    redis_client = Redis(host="localhost", port=6340, db=REDIS_DB, decode_responses=True)
+
+    report = {"created_at": datetime.now(timezone.utc).isoformat(), "size": size, "replicas": {}}
+    try:
+        for replicas in REPLICA_COUNTS:
+            print(f"⏱️  {replicas} replica(s), {size:,} due schedules...")
+            result = await run_replicas(db, redis_client, size, replicas)
+            report["replicas"][str(replicas)] = result
+            print(f"   slowest tick {result['slowest_tick_seconds']}s, "
+                  f"{max(result['documents_per_replica']):,} docs/replica, "
+                  f"{result['duplicates']} duplicate dispatches")
+    finally:
+        await mongo_client.drop_database(DB_NAME)
+        await redis_client.delete(DISPATCH_QUEUE, DISPATCH_READY, MEMBERS_KEY)
+        await redis_client.aclose()
+        mongo_client.close()
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = os.path.join(RESULTS_DIR, f"partitions-{int(time.time())}.json")
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"📝 Results written to {out_path}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
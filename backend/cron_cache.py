@@ -0,0 +1,265 @@
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from croniter import croniter
+
+
+_EPOCH_WEEKDAY = 4            # 1970-01-01 was a Thursday; cron counts Sunday as 0
+_INITIAL_HORIZON_DAYS = 8
+_MAX_HORIZON_DAYS = 366 * 28  # a full leap-year/weekday cycle
+_US_PER_MINUTE = 60_000_000
+
+
+def to_datetime64(values: Iterable[datetime]) -> np.ndarray:
+    """Convert datetimes to a naive-UTC datetime64[us] array (naive input is UTC)."""
+    seconds = np.fromiter(
+        (v.timestamp() if v.tzinfo is not None else v.replace(tzinfo=timezone.utc).timestamp()
+         for v in values),
+        dtype=np.float64,
+    )
+    return np.round(seconds * 1e6).astype(np.int64).astype("datetime64[us]")
+
+
+def from_datetime64(values: np.ndarray) -> List[datetime]:
+    """Convert a datetime64 array back to aware UTC datetimes.
+
+    Batched fire times repeat heavily, so only distinct values are converted.
+    """
+    unique, inverse = np.unique(values.astype("datetime64[us]"), return_inverse=True)
+    converted = [v.replace(tzinfo=timezone.utc) for v in unique.tolist()]
+    return [converted[i] for i in inverse.reshape(-1).tolist()]
+
+
+class CompiledCron:
+    """A cron expression parsed once and reused for every schedule sharing it.
+
+    Standard five-field expressions are expanded into their allowed minutes,
+    hours, days, months and weekdays, and fire times are computed with NumPy:
+    matching days are found on a day grid and combined with the sorted
+    time-of-day offsets, so the next K fires of any number of start times is a
+    couple of searchsorted calls. Expressions NumPy cannot express (seconds
+    field, L, #) fall back to a single cached croniter instance.
+    """
+
+    def __init__(self, expr: str):
+        """Parse and expand an expression.
+
+        Args:
+            expr: Cron expression.
+
+        Raises:
+            ValueError: If the expression is invalid.
+        """
+        self.expr = expr
+        expanded, nth_weekday = croniter.expand(expr)
+        self.vectorized = (
+            len(expanded) == 5
+            and not nth_weekday
+            and all(v == "*" or isinstance(v, int) for field in expanded for v in field)
+        )
+        self._iterator = croniter(expr, datetime(1970, 1, 1, tzinfo=timezone.utc))
+        self._lock = threading.Lock()
+        if not self.vectorized:
+            return
+
+        minutes, hours, doms, months, dows = (
+            None if field == ["*"] else np.array(sorted(field), dtype=np.int64)
+            for field in expanded
+        )
+        minutes = np.arange(60) if minutes is None else minutes
+        hours = np.arange(24) if hours is None else hours
+        self._day_offsets_us = np.sort(
+            (hours[:, None] * 60 + minutes[None, :]).ravel()
+        ).astype(np.int64) * _US_PER_MINUTE
+        self._doms = doms
+        self._months = months
+        self._dows = dows
+
+    def _matching_days(self, first_day: np.datetime64, last_day: np.datetime64) -> np.ndarray:
+        """Return every day in [first_day, last_day] on which the expression fires."""
+        days = np.arange(first_day, last_day + np.timedelta64(1, "D"), dtype="datetime64[D]")
+        month_starts = days.astype("datetime64[M]")
+        ok = np.ones(len(days), dtype=bool)
+        if self._months is not None:
+            ok &= np.isin(month_starts.astype(np.int64) % 12 + 1, self._months)
+
+        dom_ok = None
+        dow_ok = None
+        if self._doms is not None:
+            dom_ok = np.isin((days - month_starts.astype("datetime64[D]")).astype(np.int64) + 1, self._doms)
+        if self._dows is not None:
+            dow_ok = np.isin((days.astype(np.int64) + _EPOCH_WEEKDAY) % 7, self._dows)
+
+        # Like cron, a restricted day-of-month and day-of-week are OR-ed together.
+        if dom_ok is not None and dow_ok is not None:
+            ok &= dom_ok | dow_ok
+        elif dom_ok is not None:
+            ok &= dom_ok
+        elif dow_ok is not None:
+            ok &= dow_ok
+        return days[ok]
+
+    def next_array(self, afters: np.ndarray, k: int = 1) -> np.ndarray:
+        """Next k fire times strictly after each start time.
+
+        Args:
+            afters: datetime64 array of start times (naive UTC).
+            k: How many fire times to return per start time.
+
+        Returns:
+            datetime64[us] array of shape (len(afters), k).
+        """
+        afters = afters.astype("datetime64[us]")
+        if len(afters) == 0:
+            return np.empty((0, k), dtype="datetime64[us]")
+        if not self.vectorized:
+            return self._next_array_croniter(afters, k)
+
+        after_days = afters.astype("datetime64[D]")
+        time_of_day = (afters - after_days.astype("datetime64[us]")).astype(np.int64)
+        per_day = len(self._day_offsets_us)
+
+        first_day, last_day = after_days.min(), after_days.max()
+        horizon = _INITIAL_HORIZON_DAYS
+        while True:
+            days = self._matching_days(first_day, last_day + np.timedelta64(horizon, "D"))
+            if len(days) == 0:
+                if horizon >= _MAX_HORIZON_DAYS:
+                    return self._next_array_croniter(afters, k)
+                horizon *= 4
+                continue
+            day_index = np.searchsorted(days, after_days, side="left")
+            same_day = (day_index < len(days)) & (days[np.minimum(day_index, len(days) - 1)] == after_days)
+            slot = np.where(same_day, np.searchsorted(self._day_offsets_us, time_of_day, side="right"), 0)
+            base = day_index * per_day + slot
+            if len(days) * per_day >= base.max() + k:
+                break
+            if horizon >= _MAX_HORIZON_DAYS:
+                return self._next_array_croniter(afters, k)
+            horizon *= 4
+
+        fire_index = base[:, None] + np.arange(k)[None, :]
+        fire_days = days[fire_index // per_day].astype("datetime64[us]")
+        return fire_days + self._day_offsets_us[fire_index % per_day].astype("timedelta64[us]")
+
+    def prev_array(self, befores: np.ndarray, k: int = 1) -> np.ndarray:
+        """Most recent k fire times strictly before each time, oldest first.
+
+        Args:
+            befores: datetime64 array of reference times (naive UTC).
+            k: How many fire times to return per reference time.
+
+        Returns:
+            datetime64[us] array of shape (len(befores), k).
+        """
+        befores = befores.astype("datetime64[us]")
+        if len(befores) == 0:
+            return np.empty((0, k), dtype="datetime64[us]")
+        if not self.vectorized:
+            return self._prev_array_croniter(befores, k)
+
+        before_days = befores.astype("datetime64[D]")
+        time_of_day = (befores - before_days.astype("datetime64[us]")).astype(np.int64)
+        per_day = len(self._day_offsets_us)
+
+        first_day, last_day = before_days.min(), before_days.max()
+        horizon = _INITIAL_HORIZON_DAYS
+        while True:
+            days = self._matching_days(first_day - np.timedelta64(horizon, "D"), last_day)
+            if len(days) == 0:
+                if horizon >= _MAX_HORIZON_DAYS:
+                    return self._prev_array_croniter(befores, k)
+                horizon *= 4
+                continue
+            day_index = np.searchsorted(days, before_days, side="left")
+            same_day = (day_index < len(days)) & (days[np.minimum(day_index, len(days) - 1)] == before_days)
+            slot = np.where(same_day, np.searchsorted(self._day_offsets_us, time_of_day, side="left"), 0)
+            earlier = day_index * per_day + slot
+            if earlier.min() >= k:
+                break
+            if horizon >= _MAX_HORIZON_DAYS:
+                return self._prev_array_croniter(befores, k)
+            horizon *= 4
+
+        fire_index = earlier[:, None] - k + np.arange(k)[None, :]
+        fire_days = days[fire_index // per_day].astype("datetime64[us]")
+        return fire_days + self._day_offsets_us[fire_index % per_day].astype("timedelta64[us]")
+
+    def _prev_array_croniter(self, befores: np.ndarray, k: int) -> np.ndarray:
+        """Fallback: walk the cached croniter backwards once per distinct time."""
+        unique, inverse = np.unique(befores, return_inverse=True)
+        rows = []
+        with self._lock:
+            for start in from_datetime64(unique):
+                self._iterator.set_current(start, force=True)
+                rows.append([self._iterator.get_prev(datetime) for _ in range(k)][::-1])
+        table = to_datetime64(v for row in rows for v in row).reshape(len(unique), k)
+        return table[inverse.reshape(-1)]
+
+    def _next_array_croniter(self, afters: np.ndarray, k: int) -> np.ndarray:
+        """Fallback: walk the cached croniter once per distinct start time."""
+        unique, inverse = np.unique(afters, return_inverse=True)
+        rows = []
+        with self._lock:
+            for start in from_datetime64(unique):
+                self._iterator.set_current(start, force=True)
+                rows.append([self._iterator.get_next(datetime) for _ in range(k)])
+        table = to_datetime64(v for row in rows for v in row).reshape(len(unique), k)
+        return table[inverse.reshape(-1)]
+
+    def next_fire(self, after: datetime) -> datetime:
+        """Return the first fire time strictly after `after`."""
+        return from_datetime64(self.next_array(to_datetime64([after]), 1)[0])[0]
+
+
+@lru_cache(maxsize=4096)
+def compile_cron(expr: str) -> CompiledCron:
+    """Return the shared CompiledCron for an expression (LRU cached).
+
+    Raises:
+        ValueError: If the expression is invalid.
+    """
+    return CompiledCron(expr)
+
+
+@lru_cache(maxsize=4096)
+def is_valid_cron(expr: str) -> bool:
+    """Cached croniter.is_valid()."""
+    return croniter.is_valid(expr)
+
+
+def next_fire(expr: str, after: datetime) -> datetime:
+    """Return the first fire time of expr strictly after `after` (aware UTC)."""
+    return compile_cron(expr).next_fire(after)
+
+
+def next_fire_times(items: Sequence[Tuple[str, datetime]], k: int = 1) -> List[List[datetime]]:
+    """Compute the next k fire times for many schedules at once.
+
+    Items are grouped by cron expression so every distinct expression is
+    parsed once and evaluated in a single vectorized call, however many
+    schedules share it.
+
+    Args:
+        items: (cron expression, start time) pairs.
+        k: Number of fire times to return per item.
+
+    Returns:
+        One list of k aware-UTC datetimes per item, in input order.
+    """
+    groups = defaultdict(list)
+    for position, (expr, after) in enumerate(items):
+        groups[expr].append(position)
+
+    results: List[Optional[List[datetime]]] = [None] * len(items)
+    for expr, positions in groups.items():
+        afters = to_datetime64(items[p][1] for p in positions)
+        fires = compile_cron(expr).next_array(afters, k)
+        flat = from_datetime64(fires.ravel())
+        for row, position in enumerate(positions):
+            results[position] = flat[row * k:(row + 1) * k]
+    return results
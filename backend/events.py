@@ -0,0 +1,120 @@
+import asyncio
+import json
+from datetime import datetime
+
+
+# Redis pub/sub channel every task state change is published on, by the API
+# (TaskManager) and by the Celery worker alike.
+TASK_EVENTS_CHANNEL = "task_events"
+
+
+def _json_default(value):
+    """Serialize datetimes (and ObjectIds) inside task events."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_task_event(task_name: str, **fields) -> str:
+    """Build the JSON payload of a task delta.
+
+    Args:
+        task_name: Task the delta applies to.
+        **fields: Changed TaskSummary fields (e.g. state, next_run).
+
+    Returns:
+        JSON string {"type": "update", "task_name": ..., "fields": {...}}.
+    """
+    return json.dumps({"type": "update", "task_name": task_name, "fields": fields},
+                      default=_json_default)
+
+
+def encode_delete_event(task_name: str) -> str:
+    """Build the JSON payload announcing that a task was deleted."""
+    return json.dumps({"type": "delete", "task_name": task_name})
+
+
+async def publish_task_events(redis_client, payloads):
+    """Publish encoded task events in a single round trip.
+
+    Publishing is best effort: a Redis hiccup must not fail the write that
+    produced the event, so errors are logged and dashboards resync on reconnect.
+
+    Args:
+        redis_client: Async Redis client.
+        payloads: Iterable of strings from encode_task_event/encode_delete_event.
+    """
+    payloads = list(payloads)
+    if not payloads:
+        return
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for payload in payloads:
+            pipe.publish(TASK_EVENTS_CHANNEL, payload)
+        await pipe.execute()
+    except Exception as e:
+        print(f"[Events]: Could not publish {len(payloads)} task event(s): {e}")
+
+
+class TaskEventBroadcaster:
+    """Fans the task_events channel out to every connected dashboard.
+
+    The API process holds a single Redis subscription no matter how many
+    clients are streaming; each client gets its own bounded asyncio.Queue.
+    A client that falls too far behind has its backlog replaced by a single
+    "resync" event, telling it to take a fresh snapshot instead of blocking
+    the broadcaster or growing memory without bound.
+    """
+
+    def __init__(self, redis_client, max_pending: int = 1000):
+        """Initialize the broadcaster.
+
+        Args:
+            redis_client: Async Redis client used for the subscription.
+            max_pending: Events buffered per client before it is told to resync.
+        """
+        self.redis = redis_client
+        self.max_pending = max_pending
+        self._subscribers = set()
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a client and return the queue its events arrive on."""
+        queue = asyncio.Queue(maxsize=self.max_pending)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """Stop delivering events to a client's queue."""
+        self._subscribers.discard(queue)
+
+    def broadcast(self, payload: str):
+        """Deliver one encoded event to every subscribed client."""
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(json.dumps({"type": "resync"}))
+
+    async def run(self):
+        """Relay the Redis channel to subscribers until cancelled.
+
+        A dropped subscription is re-established after a short pause; clients
+        are asked to resync since events may have been missed meanwhile.
+        """
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(TASK_EVENTS_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.broadcast(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[Events]: Subscription lost, reconnecting: {e}")
+                self.broadcast(json.dumps({"type": "resync"}))
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
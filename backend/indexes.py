@@ -0,0 +1,164 @@
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import CollectionInvalid, OperationFailure
+
+
+# Every index the scheduler relies on, per collection. Kept as plain data so
+# the async API startup and the synchronous benchmarks build the same set.
+INDEXES = {
+    "schedules": [
+        # date_time_criteria(): equality on state first, then the range fields.
+        IndexModel(
+            [("state", ASCENDING), ("next_run", ASCENDING),
+             ("start_date", ASCENDING), ("end_date", ASCENDING)],
+            name="due_tasks"
+        ),
+        IndexModel([("task_name", ASCENDING)], name="task_name_unique", unique=True),
+        # get_all_schedules(): filtered pages walk _id newest-first.
+        IndexModel([("state", ASCENDING), ("_id", DESCENDING)], name="state_page"),
+        IndexModel([("priority", ASCENDING), ("_id", DESCENDING)], name="priority_page"),
+    ],
+    "queue_table": [
+        IndexModel([("task_name", ASCENDING)], name="queue_task_name_unique", unique=True),
+        IndexModel([("state", ASCENDING), ("priority", ASCENDING)], name="queue_priority"),
+    ],
+    "task_attempts": [
+        # get_task_history(): one task's attempts, newest first.
+        IndexModel([("task_name", ASCENDING), ("started_at", DESCENDING)], name="attempts_by_task"),
+    ],
+    "task_logs": [
+        # iter_task_logs(): one run's chunks in order.
+        IndexModel([("run_id", ASCENDING), ("seq", ASCENDING)], name="logs_by_run"),
+        # resolve_log_run(): a task's latest run.
+        IndexModel([("task_name", ASCENDING), ("created_at", DESCENDING)], name="logs_by_task"),
+    ],
+}
+
+ATTEMPTS_COLLECTION = "task_attempts"
+LOGS_COLLECTION = "task_logs"
+
+# Indexes that earlier versions created and that a managed index replaces.
+LEGACY_INDEXES = {
+    "queue_table": ["queue_task_name"],
+}
+
+
+async def dedupe_queue_table(db):
+    """Delete duplicate queue_table rows, keeping the newest row per task_name.
+
+    Older versions of fun_queue_manager inserted a fresh row every tick; those
+    duplicates would otherwise block the unique task_name index.
+
+    Args:
+        db: Motor async MongoDB database instance.
+    """
+    pipeline = [
+        {"$sort": {"_id": -1}},
+        {"$group": {"_id": "$task_name", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ]
+    stale_ids = []
+    async for group in db.queue_table.aggregate(pipeline, allowDiskUse=True):
+        stale_ids.extend(group["ids"][1:])
+    if stale_ids:
+        result = await db.queue_table.delete_many({"_id": {"$in": stale_ids}})
+        print(f"[Indexes]: Removed {result.deleted_count} duplicate queue_table rows")
+
+
+async def ensure_attempts_collection(db, retention_days: int):
+    """Create the task_attempts time-series collection and apply its retention.
+
+    Attempts are bucketed by task_name (metaField) on started_at (timeField)
+    and expire retention_days after they started. On servers without
+    time-series support a regular collection with a TTL index is used
+    instead. An existing collection only has its retention updated.
+
+    Args:
+        db: Motor async MongoDB database instance.
+        retention_days: Days to keep attempts for.
+    """
+    expire_after = int(retention_days * 86400)
+    try:
+        await db.create_collection(
+            ATTEMPTS_COLLECTION,
+            timeseries={"timeField": "started_at", "metaField": "task_name", "granularity": "seconds"},
+            expireAfterSeconds=expire_after,
+        )
+        print(f"[Indexes]: Created time-series collection {ATTEMPTS_COLLECTION}")
+        return
+    except CollectionInvalid:
+        pass  # already exists, fall through to update retention
+    except OperationFailure as e:
+        print(f"[Indexes]: Time-series collections unavailable, using a TTL index: {e}")
+
+    options = await db[ATTEMPTS_COLLECTION].options()
+    try:
+        if "timeseries" in options:
+            await db.command("collMod", ATTEMPTS_COLLECTION, expireAfterSeconds=expire_after)
+            return
+        existing = await db[ATTEMPTS_COLLECTION].index_information()
+        if "attempts_ttl" in existing:
+            await db.command("collMod", ATTEMPTS_COLLECTION,
+                             index={"name": "attempts_ttl", "expireAfterSeconds": expire_after})
+        else:
+            await db[ATTEMPTS_COLLECTION].create_index(
+                [("started_at", ASCENDING)], name="attempts_ttl", expireAfterSeconds=expire_after
+            )
+    except OperationFailure as e:
+        print(f"[Indexes]: Could not apply retention to {ATTEMPTS_COLLECTION}: {e}")
+
+
+async def ensure_logs_collection(db, size_mb: int):
+    """Create the capped task_logs collection that holds operator output chunks.
+
+    Being capped, it keeps the most recent size_mb of logs and overwrites
+    the oldest chunks first. An existing collection is left as is (resizing
+    or converting a collection rewrites it); a non-capped one is reported.
+
+    Args:
+        db: Motor async MongoDB database instance.
+        size_mb: Maximum size of the collection in megabytes.
+    """
+    try:
+        await db.create_collection(LOGS_COLLECTION, capped=True, size=int(size_mb * 1024 * 1024))
+        print(f"[Indexes]: Created capped collection {LOGS_COLLECTION} ({size_mb} MB)")
+    except CollectionInvalid:
+        options = await db[LOGS_COLLECTION].options()
+        if not options.get("capped"):
+            print(f"[Indexes]: {LOGS_COLLECTION} exists but is not capped; logs are not bounded")
+
+
+async def ensure_indexes(db, attempt_retention_days: int = 30, log_collection_mb: int = 1024):
+    """Create the managed index set on startup.
+
+    create_indexes is a no-op for indexes that already exist, so this is safe
+    to run on every boot. Legacy indexes are dropped, and queue_table is
+    de-duplicated once before its unique task_name index is first built, and
+    the task_attempts and task_logs collections are created before their
+    indexes. A failure on one collection is logged rather than stopping the
+    API.
+
+    Args:
+        db: Motor async MongoDB database instance.
+        attempt_retention_days: Retention of the task_attempts collection.
+        log_collection_mb: Size of the capped task_logs collection.
+    """
+    await ensure_attempts_collection(db, attempt_retention_days)
+    await ensure_logs_collection(db, log_collection_mb)
+
+    queue_indexes = await db.queue_table.index_information()
+    if "queue_task_name_unique" not in queue_indexes:
+        await dedupe_queue_table(db)
+
+    for collection_name, names in LEGACY_INDEXES.items():
+        existing = await db[collection_name].index_information()
+        for name in names:
+            if name in existing:
+                await db[collection_name].drop_index(name)
+                print(f"[Indexes]: Dropped legacy index {collection_name}.{name}")
+
+    for collection_name, models in INDEXES.items():
+        try:
+            created = await db[collection_name].create_indexes(models)
+            print(f"[Indexes]: {collection_name} -> {', '.join(created)}")
+        except OperationFailure as e:
+            print(f"[Indexes]: Could not build indexes on {collection_name}: {e}")
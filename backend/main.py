@@ -1,41 +1,71 @@
 import asyncio
-from fastapi import FastAPI, HTTPException
+from fastapi import Body, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorClient
 from redis.asyncio import Redis
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
+from datetime import datetime
+from typing import Any, List, Optional
 from manager import TaskManager
-from models import TaskInput, TaskInDB
+from indexes import ensure_indexes
+from partitions import backfill_slots
+from events import TaskEventBroadcaster
+from metrics import MongoLatencyListener, instrument_async_redis, render_metrics
+from models import TaskInput, TaskFilter, TaskState, TaskSummary, TaskDetail, ExecutionAttempt
 
 db = None
 redis_client = None
 task_manager = None
+broadcaster = None
+
+# Seconds between SSE keep-alive comments on an idle event stream.
+EVENT_KEEPALIVE_SECONDS = 15
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application startup and shutdown lifecycle.
 
-    Connects to MongoDB and Redis on startup, initializes the TaskManager,
-    and starts the background scheduler loop. Closes all connections on shutdown.
+    Connects to MongoDB and Redis on startup, ensures the managed indexes exist,
+    initializes the TaskManager, and starts the background scheduler,
+    partition lease and reschedule loops plus the task event broadcaster.
+    Every replica runs them; each only schedules the partitions it holds.
+    On shutdown the partition leases are handed back and all connections
+    are closed.
     """
-    global db, redis_client, task_manager
+    global db, redis_client, task_manager, broadcaster
     print("Connecting to databases...")
 
-    mongo_client = AsyncIOMotorClient("mongodb://localhost:27017")
+    mongo_client = AsyncIOMotorClient("mongodb://localhost:27017",
+                                      event_listeners=[MongoLatencyListener()])
     db = mongo_client.tasks_db
 
-    redis_client = Redis(host="localhost", port=6340, db=0, decode_responses=True)
+    redis_client = instrument_async_redis(Redis(host="localhost", port=6340, db=0, decode_responses=True))
     print("Connections successful.")
 
     task_manager = TaskManager(db, redis_client)
+    await ensure_indexes(db, attempt_retention_days=task_manager.attempt_retention_days,
+                         log_collection_mb=task_manager.log_collection_mb)
+    await backfill_slots(db)
 
     print("Starting background loops...")
     asyncio.create_task(task_manager.run_scheduler_loop())
+    asyncio.create_task(task_manager.run_partition_loop())
+    asyncio.create_task(task_manager.run_schedule_listener())
+    asyncio.create_task(task_manager.run_reschedule_loop())
+    asyncio.create_task(task_manager.run_retry_loop())
+
+    broadcaster = TaskEventBroadcaster(redis_client)
+    broadcaster_task = asyncio.create_task(broadcaster.run())
     yield
 
     print("Closing connections...")
+    broadcaster_task.cancel()
+    try:
+        await task_manager.partitions.leave()
+    except Exception as e:
+        print(f"Could not release scheduler partitions: {e}")
     mongo_client.close()
     await redis_client.close()
     print("Shutdown complete.")
@@ -48,12 +78,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Run-Id"],
 )
 
 
 @app.post("/tasks/{task_name}/cancel")
 async def cancel_task(task_name: str):
-    """Cancel a running task by setting a Redis flag for the worker watchdog.
+    """Cancel a running task.
+
+    The task name is published on the task_cancel channel so the worker's
+    supervisor terminates the run immediately; the cancel:{task_name} flag is
+    also set so a run that has not started yet (or a supervisor that missed
+    the message) still picks it up.
 
     Args:
         task_name: Name of the task to cancel.
@@ -61,7 +97,10 @@ async def cancel_task(task_name: str):
     Returns:
         Confirmation message.
     """
-    await redis_client.set(f"cancel:{task_name}", "1")
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.set(f"cancel:{task_name}", "1")
+    pipe.publish("task_cancel", task_name)
+    await pipe.execute()
     return {"message": f"cancelled {task_name}"}
 
 
@@ -78,14 +117,81 @@ async def create_task(task: TaskInput):
     return await task_manager.create_schedule(task)
 
 
-@app.get("/tasks", response_model=List[TaskInDB])
-async def get_all_tasks():
-    """Retrieve all task schedules from the database.
+# Largest number of tasks accepted by one POST /bulk/tasks request.
+BULK_CREATE_LIMIT = 10000
+
+
+@app.post("/bulk/tasks")
+async def create_tasks_bulk(tasks: List[Any] = Body(...)):
+    """Create many scheduled tasks in one request.
+
+    Every item is validated like a POST /tasks body. Invalid items are
+    reported individually and the valid ones are still created.
+
+    Args:
+        tasks: List of task inputs.
 
     Returns:
-        List of all task documents.
+        {"created": <count>, "errors": [{"index", "task_name", "detail"}, ...]}.
     """
-    return await task_manager.get_all_schedules()
+    if len(tasks) > BULK_CREATE_LIMIT:
+        raise HTTPException(status_code=400,
+                            detail=f"At most {BULK_CREATE_LIMIT} tasks can be created per request")
+    return await task_manager.create_schedules(tasks)
+
+
+@app.post("/bulk/tasks/pause")
+async def pause_tasks_bulk(task_filter: TaskFilter):
+    """Pause every schedule matching the filter."""
+    return await task_manager.pause_tasks(task_filter)
+
+
+@app.post("/bulk/tasks/resume")
+async def resume_tasks_bulk(task_filter: TaskFilter):
+    """Resume every paused schedule matching the filter."""
+    return await task_manager.resume_tasks(task_filter)
+
+
+@app.post("/bulk/tasks/run")
+async def run_tasks_bulk(task_filter: TaskFilter):
+    """Trigger ad-hoc execution of every schedule matching the filter."""
+    return await task_manager.run_tasks_adhoc(task_filter)
+
+
+@app.post("/bulk/tasks/delete")
+async def delete_tasks_bulk(task_filter: TaskFilter):
+    """Delete every schedule matching the filter."""
+    return await task_manager.delete_schedules(task_filter)
+
+
+@app.get("/tasks", response_model=List[TaskSummary])
+async def get_all_tasks(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    state: Optional[TaskState] = None,
+    priority: Optional[int] = Query(None, ge=1, le=3),
+):
+    """Retrieve one page of task summaries, newest first.
+
+    The cursor for the next page is returned in the X-Next-Cursor header;
+    the header is absent on the last page.
+
+    Args:
+        limit: Page size.
+        cursor: X-Next-Cursor value from the previous page.
+        state: Optional state filter.
+        priority: Optional priority filter.
+
+    Returns:
+        List of task summaries.
+    """
+    tasks, next_cursor = await task_manager.get_all_schedules(
+        limit=limit, cursor=cursor, state=state.value if state else None, priority=priority
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return tasks
 
 
 @app.get("/tasks/queue")
@@ -98,6 +204,133 @@ async def get_tasks_in_queue():
     return await task_manager.get_queued_tasks()
 
 
+@app.get("/operators")
+async def get_operators():
+    """List the operator scripts the workers have validated.
+
+    Returns:
+        Dict of operator path -> validation result, as published by the workers.
+    """
+    return await task_manager.get_operators()
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Expose scheduler, queue and MongoDB/Redis latency metrics for Prometheus.
+
+    The queue depth gauges are read from Redis on each scrape; if that
+    fails the rest of the metrics are still served.
+
+    Returns:
+        Metrics in the Prometheus text exposition format.
+    """
+    try:
+        await task_manager.refresh_queue_depths()
+    except Exception as e:
+        print(f"[Metrics] Could not read queue depths: {e}")
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/events/tasks")
+async def stream_task_events(request: Request):
+    """Stream task changes to a dashboard as server-sent events.
+
+    Each event is a JSON delta: {"type": "update", "task_name", "fields"}
+    with only the changed TaskSummary fields, {"type": "delete", "task_name"},
+    or {"type": "resync"} when the client must take a fresh GET /tasks
+    snapshot. Clients take one snapshot after connecting and apply deltas
+    from then on.
+
+    Returns:
+        A text/event-stream response that stays open until the client leaves.
+    """
+    queue = broadcaster.subscribe()
+
+    async def event_stream():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    payload = await asyncio.wait_for(queue.get(), EVENT_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"data: {payload}\n\n"
+        finally:
+            broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/tasks/{task_name}", response_model=TaskDetail)
+async def get_task(task_name: str):
+    """Retrieve the full document of one task, including execution history.
+
+    Args:
+        task_name: Name of the task.
+
+    Returns:
+        Task detail document.
+    """
+    return await task_manager.get_schedule(task_name)
+
+
+@app.get("/tasks/{task_name}/history", response_model=List[ExecutionAttempt])
+async def get_task_history(
+    task_name: str,
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    before: Optional[datetime] = None,
+):
+    """Page through a task's execution attempts, newest first.
+
+    The cursor for the next page is returned in the X-Next-Cursor header
+    and is passed back as `before`.
+
+    Args:
+        task_name: Name of the task.
+        limit: Page size.
+        before: X-Next-Cursor value from the previous page.
+
+    Returns:
+        List of execution attempts.
+    """
+    attempts, next_cursor = await task_manager.get_task_history(task_name, limit=limit, before=before)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return attempts
+
+
+@app.get("/tasks/{task_name}/logs")
+async def get_task_logs(
+    task_name: str,
+    run_id: Optional[str] = None,
+    stream: Optional[str] = Query(None, pattern="^(stdout|stderr)$"),
+    follow: bool = False,
+):
+    """Stream a run's captured output as plain text.
+
+    Args:
+        task_name: Name of the task.
+        run_id: Run to read (see execution history); defaults to the latest run.
+        stream: Only return "stdout" or "stderr".
+        follow: Keep the response open and stream new output until the run ends.
+
+    Returns:
+        A text/plain streaming response; the run is named in the X-Run-Id header.
+    """
+    run_id = await task_manager.resolve_log_run(task_name, run_id)
+    return StreamingResponse(
+        task_manager.iter_task_logs(task_name, run_id, stream=stream, follow=follow),
+        media_type="text/plain",
+        headers={"X-Run-Id": run_id, "Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.post("/tasks/{task_name}/pause")
 async def pause_task(task_name: str):
     """Pause a schedule."""
@@ -1,19 +1,390 @@
 import asyncio
-from datetime import datetime, timezone
-from croniter import croniter
+from datetime import datetime, timezone, timedelta
 from bson import ObjectId
 from fastapi import HTTPException
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from pydantic import ValidationError
 import json
 import os
+import posixpath
+import time
+import zlib
 
-from models import TaskInput, TaskInDB
+from prometheus_client import Counter, Gauge, Histogram
+
+from models import TaskInput, TaskFilter, TaskSummary, TaskDetail, TaskInRedis, ExecutionAttempt, MisfirePolicy
+from cron_cache import next_fire, next_fire_times
+from events import TASK_EVENTS_CHANNEL, encode_task_event, encode_delete_event, publish_task_events
+from misfire import plan_next_runs
+from schedule_heap import NextRunHeap, as_utc
+from partitions import PartitionLeases, slot_of
+from metrics import LAG_BUCKETS
+from tracing import DISPATCH_TRACES, record_span, setup_tracing, to_ns, traceparent_of, tracer, tracing_enabled
+
+
+# Schedule fields copied onto a queue_table row when a task becomes due. The
+# row is what the worker runs from: sent along as a TaskInRedis payload, or
+# looked up by the worker when a task was queued without one.
+QUEUE_FIELDS = {
+    "task_name": 1,
+    "priority": 1,
+    "cron": 1,
+    "next_run": 1,
+    "task_config": 1,
+    "max_retries": 1,
+    "timeout_seconds": 1,
+    "misfire_policy": 1,
+    "overlap_policy": 1,
+    "retry_backoff": 1,
+    "slot": 1,
+}
+
+# Schedule fields the heap scheduler tracks a task by.
+HEAP_FIELDS = {"task_name": 1, "priority": 1, "next_run": 1, "start_date": 1, "end_date": 1}
+
+
+def due_filter(now: datetime, slots: dict = None) -> dict:
+    """Filter of the schedules due at now: PENDING, started, not ended and next_run passed.
+
+    Args:
+        now: Current UTC time.
+        slots: Slot filter of the owned partitions, or None for all of them.
+    """
+    return {
+        "start_date": {"$lte": now},
+        "end_date": {"$gte": now},
+        "next_run": {"$lte": now},
+        "state": "PENDING",
+        **(slots or {})
+    }
+
+
+def heap_filter(now: datetime, slots: dict = None) -> dict:
+    """Filter of the schedules the heap scheduler loads: PENDING and not ended."""
+    return {"state": "PENDING", "end_date": {"$gte": now}, **(slots or {})}
+
+
+def named_due_filter(task_names) -> dict:
+    """Filter of the heap-due schedules, by name, that are still PENDING."""
+    return {"task_name": {"$in": list(task_names)}, "state": "PENDING"}
+
+
+def unrescheduled_filter(now: datetime, cutoff: datetime, slots: dict = None) -> dict:
+    """Filter of the finished schedules whose next firing was never planned.
+
+    A schedule still in a RESCHEDULABLE_STATES state with next_run before
+    cutoff (and end_date not passed) missed its reschedule request.
+
+    Args:
+        now: Current UTC time.
+        cutoff: Only schedules whose next_run is older than this match.
+        slots: Slot filter of the owned partitions, or None for all of them.
+    """
+    return {
+        "state": {"$in": RESCHEDULABLE_STATES},
+        "next_run": {"$lte": cutoff},
+        "end_date": {"$gte": now},
+        **(slots or {})
+    }
+
+
+def pending_queue_filter(now: datetime, slots: dict = None) -> dict:
+    """Filter of the queue_table rows waiting for admission: PENDING and due by now.
+
+    Args:
+        now: Current UTC time.
+        slots: Slot filter of the owned partitions, or None for all of them.
+    """
+    return {"state": "PENDING", "next_run": {"$lte": now}, **(slots or {})}
+
+
+def queue_row(task: dict) -> dict:
+    """$set of the queue_table row of a task about to run, from its QUEUE_FIELDS.
+
+    A new firing or ad-hoc run starts PENDING and counts attempts from 1 again.
+    """
+    fields = {k: v for k, v in task.items() if k != "_id"}
+    fields.update(state="PENDING", num_of_retries=0, retry_after=None)
+    return fields
+
+
+# Redis hash the workers publish their operator registry to:
+# {"operators/<script>.py": '{"valid": ..., "reason": ..., ...}'}.
+OPERATOR_REGISTRY_KEY = "operator_registry"
+
+
+def operator_path_error(operator_path: str, registry: dict):
+    """Explain why an operator_path is rejected, or return None if it is fine.
+
+    Args:
+        operator_path: Path from the task's task_config.
+        registry: Decoded registry hash, key -> entry dict.
+
+    Returns:
+        Error message, or None if the path names a valid registered operator.
+    """
+    entry = match_operator_path(operator_path, registry)
+    if entry is None:
+        return f"Unknown operator_path '{operator_path}'. Known operators: {sorted(registry)}"
+    if not entry.get("valid"):
+        return f"Operator '{operator_path}' is invalid: {entry.get('reason')}"
+    return None
+
+
+def match_operator_path(operator_path: str, registry: dict):
+    """Find the registry entry an operator_path refers to.
+
+    Registry keys are relative to the worker directory
+    ('operators/example_operator.py'); operator_path may also be given
+    relative to the repository root ('worker/operators/...') or as an
+    absolute path ending in one of the keys.
+
+    Args:
+        operator_path: Path from the task's task_config.
+        registry: Decoded registry hash, key -> entry dict.
+
+    Returns:
+        The matching entry dict, or None if the path is unknown.
+    """
+    path = posixpath.normpath(operator_path.replace("\\", "/"))
+    for key, entry in registry.items():
+        if path == key or path.endswith("/" + key):
+            return entry
+    return None
+
+
+# Fields needed to plan a schedule's next_run and put it back on the heap.
+RESCHEDULE_FIELDS = {
+    "task_name": 1,
+    "cron": 1,
+    "priority": 1,
+    "next_run": 1,
+    "start_date": 1,
+    "end_date": 1,
+    "misfire_policy": 1,
+}
+
+# Run outcomes after which a recurring schedule moves on to its next firing.
+RESCHEDULABLE_STATES = ["COMPLETED", "CANCELLED", "TIMED_OUT", "EXHAUSTED", "LOCK_FAILED"]
+
+# Sorted set due tasks are queued on, ordered by priority then enqueue time
+# (score = priority * 1e13 + ms). Every queued task also pushes a token onto
+# the ready list, which idle dispatch consumers block on (worker/dispatcher.py).
+DISPATCH_QUEUE = "dispatch_queue"
+DISPATCH_READY = "dispatch_queue:ready"
+
+# Serialized TaskInRedis of each queued task: task name -> JSON. Claimed
+# together with the task, so workers run without reading queue_table.
+DISPATCH_PAYLOADS = "dispatch_queue:payload"
+
+# queue_table fields read back for the tasks about to be admitted: enough to
+# build their TaskInRedis payloads.
+DISPATCH_FIELDS = {
+    "task_name": 1,
+    "priority": 1,
+    "cron": 1,
+    "next_run": 1,
+    "state": 1,
+    "num_of_retries": 1,
+    "max_retries": 1,
+    "timeout_seconds": 1,
+    "task_config": 1,
+    "overlap_policy": 1,
+    "retry_backoff": 1,
+}
+
+# Atomically admit as many tasks as there is room for in the dispatch queue.
+# KEYS[1] = dispatch queue, KEYS[2] = ready list, KEYS[3] = trace context
+# hash, KEYS[4] = payload hash, ARGV[1] = max_parallelism, ARGV[2] = marker
+# TTL, ARGV[3..] = (task name, next_run, priority, traceparent, payload)
+# tuples in priority order. Each queued firing is recorded in
+# 'dispatched:<task>'; a firing already recorded there (queued by an earlier
+# tick or by the partition's previous owner), or a task still waiting in the
+# queue, is not queued again. Returns how many leading tuples were handled
+# (queued or skipped), followed by the 0-based positions of the tuples it
+# queued.
+ADMIT_SCRIPT = """
+local free = tonumber(ARGV[1]) - redis.call('ZCARD', KEYS[1])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local handled = 0
+local result = {0}
+for i = 3, #ARGV, 5 do
+    local marker = 'dispatched:' .. ARGV[i]
+    if (ARGV[i + 1] == '' or redis.call('GET', marker) ~= ARGV[i + 1])
+            and not redis.call('ZSCORE', KEYS[1], ARGV[i]) then
+        if free <= 0 then break end
+        local score = tonumber(ARGV[i + 2]) * 1e13 + now
+        redis.call('ZADD', KEYS[1], string.format('%d', score), ARGV[i])
+        redis.call('LPUSH', KEYS[2], '1')
+        redis.call('SET', marker, ARGV[i + 1], 'EX', ARGV[2])
+        for k = 3, 4 do
+            if ARGV[i + k] == '' then
+                redis.call('HDEL', KEYS[k], ARGV[i])
+            else
+                redis.call('HSET', KEYS[k], ARGV[i], ARGV[i + k])
+            end
+        end
+        free = free - 1
+        result[#result + 1] = (i - 3) / 5
+    end
+    handled = handled + 1
+end
+result[1] = handled
+return result
+"""
+
+# How long a dispatched firing is remembered by ADMIT_SCRIPT.
+DISPATCH_MARKER_TTL_SECONDS = 86400
+
+# Set the state of the payloads of tasks still waiting in the dispatch queue,
+# so the worker that claims one skips the run. KEYS[1] = payload hash,
+# ARGV[1] = state, ARGV[2..] = task names. Returns how many were queued.
+MARK_QUEUED_SCRIPT = """
+local marked = 0
+for i = 2, #ARGV do
+    local payload = redis.call('HGET', KEYS[1], ARGV[i])
+    if payload then
+        local task = cjson.decode(payload)
+        task['state'] = ARGV[1]
+        redis.call('HSET', KEYS[1], ARGV[i], cjson.encode(task))
+        marked = marked + 1
+    end
+end
+return marked
+"""
+
+# Forget the dispatch markers of firings a pause kept from running, so the
+# resumed schedule can queue them again. ARGV = (task name, next_run) pairs;
+# a marker is only deleted while it still holds that next_run, so a firing
+# that ran (and was rescheduled since) stays recorded.
+RELEASE_MARKERS_SCRIPT = """
+for i = 1, #ARGV, 2 do
+    local marker = 'dispatched:' .. ARGV[i]
+    if redis.call('GET', marker) == ARGV[i + 1] then
+        redis.call('DEL', marker)
+    end
+end
+return 0
+"""
+
+# Failed attempts waiting for their retry: task name -> due time in ms (Redis
+# clock), plus the priority each is dispatched with (worker/retry_queue.py).
+RETRY_QUEUE = "retry_queue"
+RETRY_PRIORITIES = "retry_queue:priority"
+
+# Move up to ARGV[1] due retries onto the dispatch queue at their priority.
+# KEYS = retry queue, priorities hash, dispatch queue, ready list.
+# Returns {retries moved, ms until the next one is due or -1 if none}.
+PROMOTE_RETRIES_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now, 'LIMIT', 0, tonumber(ARGV[1]))
+for _, task_name in ipairs(due) do
+    local priority = tonumber(redis.call('HGET', KEYS[2], task_name) or '3')
+    redis.call('ZREM', KEYS[1], task_name)
+    redis.call('HDEL', KEYS[2], task_name)
+    if redis.call('ZADD', KEYS[3], 'NX', string.format('%d', priority * 1e13 + now), task_name) == 1 then
+        redis.call('LPUSH', KEYS[4], '1')
+    end
+end
+local next_due = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+if #next_due == 0 then
+    return {#due, -1}
+end
+return {#due, math.max(0, tonumber(next_due[2]) - now)}
+"""
+
+# Scheduler metrics, served on GET /metrics with the call latencies of metrics.py.
+SCHEDULER_TICK_SECONDS = Histogram(
+    "scheduler_tick_seconds", "Duration of a scheduler tick: due-task lookup plus dispatch", ["mode"]
+)
+SCHEDULER_DUE_TASKS = Histogram(
+    "scheduler_due_tasks", "Tasks found due per scheduler tick", ["mode"],
+    buckets=(0, 1, 10, 100, 1000, 10000, 100000)
+)
+DISPATCHED = Counter("scheduler_dispatched_total", "Firings queued for dispatch, by priority", ["priority"])
+DEFERRED = Counter(
+    "scheduler_deferred_total",
+    "Due tasks held back because the dispatch queue was at max_parallelism, by priority", ["priority"]
+)
+DISPATCH_LAG_SECONDS = Histogram(
+    "scheduler_dispatch_lag_seconds", "Time from next_run until the firing was queued for dispatch",
+    buckets=LAG_BUCKETS
+)
+RETRIES_DISPATCHED = Counter(
+    "scheduler_retries_dispatched_total", "Failed attempts moved from the retry queue to the dispatch queue"
+)
+QUEUE_DEPTH = Gauge("scheduler_queue_depth", "Items waiting in a Redis queue", ["queue"],
+                    multiprocess_mode="max")
+
+
+def observe_tick(mode: str, started: float, due: int):
+    """Record one scheduler tick that began at perf_counter() `started`."""
+    SCHEDULER_TICK_SECONDS.labels(mode).observe(time.perf_counter() - started)
+    SCHEDULER_DUE_TASKS.labels(mode).observe(due)
+
+
+def dispatch_payload(row: dict) -> str:
+    """Serialized TaskInRedis of a queue_table row, for the dispatch payload hash.
+
+    Returns:
+        The JSON payload, or "" if the row lacks a required field (e.g. a
+        row queued before cron was copied onto queue_table); the worker
+        then reads the row itself.
+    """
+    try:
+        return TaskInRedis.from_queue_row(row).serialize_for_redis()
+    except (KeyError, ValidationError) as e:
+        print(f"[TaskManager]: No dispatch payload for '{row.get('task_name')}': {e}")
+        return ""
+
+
+def start_due_span(task: dict, started_ns: int):
+    """Open the root span of a firing's trace (see tracing.py).
+
+    It starts at next_run, or at `started_ns` for a task without one, and
+    is ended by finish_due_span once the firing is queued. Spans of firings
+    that are not queued are never ended, so they are not exported.
+    """
+    next_run = task.get("next_run")
+    start = min(to_ns(as_utc(next_run)), started_ns) if next_run is not None else started_ns
+    attributes = {"task.name": task["task_name"], "task.priority": task.get("priority", 3)}
+    if next_run is not None:
+        attributes["task.next_run"] = as_utc(next_run).isoformat()
+    return tracer.start_span("scheduler.due", attributes=attributes, start_time=start)
+
+
+def finish_due_span(span, stages, queued_ns: int):
+    """End a firing's root span at `queued_ns`, with a child span per stage.
+
+    Args:
+        span: Span from start_due_span.
+        stages: (name, start ns) pairs in order; each stage ends where the
+            next one starts, the last at queued_ns.
+        queued_ns: When the firing landed on the dispatch queue.
+    """
+    bounds = [start for _, start in stages[1:]] + [queued_ns]
+    for (name, start), end in zip(stages, bounds):
+        record_span(name, start, end, parent=span)
+    span.end(end_time=queued_ns)
 
 
 class TaskManager:
     """Core scheduler engine that manages task lifecycle.
 
     Handles task creation, scheduling, queue management, and database operations.
-    Reads configuration from config.json for parallelism settings.
+    Reads configuration from config.json for parallelism and scheduler settings.
+
+    Two scheduler modes are supported (``scheduler_mode`` in config.json):
+    "poll" queries MongoDB every ``poll_interval_seconds``; "heap" keeps an
+    in-memory heap of next_run deadlines, sleeps until the earliest one and only
+    reads MongoDB on startup and every ``reconcile_interval_seconds``.
+
+    Either way a replica only schedules the partitions of the task_name slot
+    space it holds a lease on (see partitions.py), so several API processes
+    split the scheduling work instead of repeating it.
     """
 
     def __init__(self, db, redis_client):
@@ -30,66 +401,572 @@ class TaskManager:
         with open(config_path, 'r') as f:
             config = json.load(f)
             self.max_parallelism = config.get("max_parallelism", 10)
+            self.scheduler_mode = config.get("scheduler_mode", "poll")
+            self.poll_interval_seconds = config.get("poll_interval_seconds", 60)
+            self.reconcile_interval_seconds = config.get("reconcile_interval_seconds", 300)
+            self.misfire_policy = MisfirePolicy(config.get("misfire_policy", "fire_once"))
+            self.max_catchup_runs = config.get("max_catchup_runs", 3)
+            self.misfire_grace_seconds = config.get("misfire_grace_seconds", 60)
+            self.reschedule_batch_size = config.get("reschedule_batch_size", 500)
+            self.reschedule_sweep_seconds = config.get("reschedule_sweep_seconds", 60)
+            self.attempt_retention_days = config.get("attempt_retention_days", 30)
+            self.log_collection_mb = config.get("log_collection_mb", 1024)
+            self.log_poll_seconds = config.get("log_poll_seconds", 0.5)
+            scheduler_partitions = config.get("scheduler_partitions", 16)
+            partition_lease_seconds = config.get("partition_lease_seconds", 15)
+            self.retry_poll_seconds = config.get("retry_poll_seconds", 1)
+            self.retry_batch_size = config.get("retry_batch_size", 500)
+            self.deferred_retry_seconds = config.get("deferred_retry_seconds", 1)
+            setup_tracing("scheduler", config.get("trace_exporter", "none"), config.get("trace_file"))
+
+        self._admit_script = redis_client.register_script(ADMIT_SCRIPT)
+        self._mark_queued_script = redis_client.register_script(MARK_QUEUED_SCRIPT)
+        self._promote_retries_script = redis_client.register_script(PROMOTE_RETRIES_SCRIPT)
+        self._release_markers_script = redis_client.register_script(RELEASE_MARKERS_SCRIPT)
+        self.partitions = PartitionLeases(redis_client, scheduler_partitions, partition_lease_seconds)
+        self._reload_heap = False
+        self.schedule_heap = NextRunHeap() if self.scheduler_mode == "heap" else None
+        self._heap_changed = asyncio.Event()
+        # task_name -> next_run already handed to Redis, so a reconciliation
+        # that races the worker's RUNNING update does not dispatch it twice.
+        self._dispatched = {}
 
     async def date_time_criteria(self):
         """Query MongoDB for tasks that are due to run right now.
 
         Finds tasks where the current UTC time falls within [start_date, end_date]
-        and next_run is at or before the current time.
+        and next_run is at or before the current time, in the partitions this
+        replica holds.
 
         Returns:
-            List of dicts with task_name and priority for each due task.
+            List of dicts with the QUEUE_FIELDS of each due task.
         """
+        if not self.partitions.owned:
+            return []
         current_time = datetime.now(timezone.utc)
 
-        date_and_time_criteria = {
-            "start_date": {"$lte": current_time},
-            "end_date": {"$gte": current_time},
-            "next_run": {"$lte": current_time},
-            "state": "PENDING"
-        }
-
-        attributes_to_include_in_list = {
-            "task_name": 1,
-            "priority": 1
-        }
-
         tasks_ready = await self.db.schedules.find(
-            date_and_time_criteria, attributes_to_include_in_list
+            due_filter(current_time, self.partitions.slot_filter()), QUEUE_FIELDS
         ).to_list(length=None)
         return tasks_ready
 
     async def run_scheduler_loop(self):
-        """Background loop that polls for due tasks every 60 seconds.
+        """Run the background scheduler in the configured mode.
+
+        Dispatches to the heap-driven loop when ``scheduler_mode`` is "heap",
+        otherwise falls back to polling MongoDB on a fixed interval. The
+        partition leases are taken first; run_partition_loop keeps them.
+        """
+        await self.refresh_partitions()
+        if self.schedule_heap is not None:
+            await self.run_heap_scheduler_loop()
+        else:
+            await self.run_poll_scheduler_loop()
+
+    async def refresh_partitions(self):
+        """Renew this replica's partition leases and follow ownership changes."""
+        try:
+            changed = await self.partitions.refresh()
+        except Exception as e:
+            print(f"[TaskManager]: Partition lease refresh failed: {e}")
+            return
+        if changed:
+            owned = sorted(self.partitions.owned)
+            print(f"[TaskManager]: Scheduling {len(owned)}/{self.partitions.partitions} partitions: {owned}")
+            if self.schedule_heap is not None:
+                self._reload_heap = True
+                self._heap_changed.set()
+
+    async def run_partition_loop(self):
+        """Background loop renewing the partition leases every renew interval."""
+        while True:
+            await asyncio.sleep(self.partitions.renew_interval)
+            await self.refresh_partitions()
+
+    async def run_schedule_listener(self):
+        """Track schedules of owned partitions that another replica changed (heap mode).
+
+        create/resume/reschedule may run on any replica, which only updates
+        its own heap. Their task events are followed here: a PENDING task of
+        an owned partition that is not in the heap is loaded into it; paused
+        and deleted tasks are dropped.
+        """
+        if self.schedule_heap is None:
+            return
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(TASK_EVENTS_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    await self._follow_task_event(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[TaskManager]: Schedule listener lost, reconnecting: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    async def _follow_task_event(self, event: dict):
+        task_name = event.get("task_name")
+        if not task_name or not self.partitions.owns(task_name):
+            return
+        state = event.get("fields", {}).get("state")
+        if event.get("type") == "delete" or state == "PAUSED":
+            if task_name in self.schedule_heap:
+                self._untrack(task_name)
+        elif state == "PENDING" and task_name not in self.schedule_heap:
+            doc = await self.db.schedules.find_one(
+                {"task_name": task_name, "state": "PENDING"},
+                HEAP_FIELDS
+            )
+            if doc is not None:
+                self._track(doc)
+
+    async def run_poll_scheduler_loop(self):
+        """Background loop that polls for due tasks every poll_interval_seconds.
 
         Queries for tasks matching date/time criteria, passes them through the
         queue manager for priority sorting, and pushes eligible task names into
-        the Redis 'batch_run' list (respecting max_parallelism).
+        the Redis dispatch queue (respecting max_parallelism).
         """
         while True:
             print("starting the loop...")
-            tasks_ready = await self.date_time_criteria()
-            prioritized_tasks = await self.fun_queue_manager(tasks_ready)
+            started = time.perf_counter()
+            tick_started = time.time_ns()
+            try:
+                tasks_ready = await self.date_time_criteria()
+                await self.dispatch_tasks(tasks_ready, tick_started)
+                observe_tick("poll", started, len(tasks_ready))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[TaskManager]: Scheduler pass failed: {e}")
+            await asyncio.sleep(self.poll_interval_seconds)
+
+    async def run_heap_scheduler_loop(self):
+        """Background loop that sleeps exactly until the earliest next_run.
+
+        Loads the heap from MongoDB once, then pops due entries as their
+        deadlines pass. create/pause/resume/delete update the heap and wake the
+        loop, so a new earlier deadline is honoured immediately. The only
+        per-tick MongoDB read is a task_name lookup of the tasks that just
+        became due; the full schedule set is re-read every
+        reconcile_interval_seconds to pick up outside changes.
 
-            task_names = [t["task_name"] for t in prioritized_tasks]
+        Tasks held back by max_parallelism have already left the heap. While
+        the last pass filled max_parallelism, the loop also wakes every
+        deferred_retry_seconds to admit the PENDING queue_table rows again.
+        A pass that fails on a MongoDB or Redis error is logged, and the heap
+        is reloaded deferred_retry_seconds later.
+        """
+        loop = asyncio.get_running_loop()
+        self._reload_heap = True
+        next_reconcile = loop.time() + self.reconcile_interval_seconds
+        retry_deferred_at = None
+
+        while True:
+            now = datetime.now(timezone.utc)
+            started = time.perf_counter()
+            tick_started = time.time_ns()
+            due_tasks = self.schedule_heap.pop_due(now)
+            try:
+                if due_tasks or (retry_deferred_at is not None and loop.time() >= retry_deferred_at):
+                    for task in due_tasks:
+                        self._dispatched[task["task_name"]] = task["next_run"]
+                    tasks_ready = await self.fetch_queue_fields(
+                        [t["task_name"] for t in due_tasks]
+                    ) if due_tasks else []
+                    admitted, deferred = await self.dispatch_tasks(tasks_ready, tick_started)
+                    # The top-N read stops at max_parallelism, so a full pass may
+                    # have left PENDING rows behind that it never saw.
+                    backlog = len(admitted) + len(deferred) >= self.max_parallelism
+                    retry_deferred_at = loop.time() + self.deferred_retry_seconds if backlog else None
+                    observe_tick("heap", started, len(due_tasks))
+
+                if loop.time() >= next_reconcile or self._reload_heap:
+                    self._reload_heap = False
+                    await self.load_schedule_heap()
+                    next_reconcile = loop.time() + self.reconcile_interval_seconds
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # The due tasks already left the heap; reload it so they are
+                # tried again. A firing that did reach Redis keeps its
+                # dispatch marker, so it is not queued twice.
+                print(f"[TaskManager]: Scheduler pass failed, reloading the heap: {e}")
+                for task in due_tasks:
+                    self._dispatched.pop(task["task_name"], None)
+                self._reload_heap = True
+                await asyncio.sleep(self.deferred_retry_seconds)
+                continue
+
+            timeout = next_reconcile - loop.time()
+            until_due = self.schedule_heap.seconds_until_next(datetime.now(timezone.utc))
+            if until_due is not None:
+                timeout = min(timeout, until_due)
+            if retry_deferred_at is not None:
+                timeout = min(timeout, retry_deferred_at - loop.time())
+
+            self._heap_changed.clear()
+            try:
+                await asyncio.wait_for(self._heap_changed.wait(), timeout=max(timeout, 0))
+            except asyncio.TimeoutError:
+                pass
+
+    async def fetch_queue_fields(self, task_names):
+        """Load the QUEUE_FIELDS of heap-due tasks that are still PENDING.
+
+        A point lookup on the unique task_name index, restricted to the tasks
+        that just became due; anything paused or deleted behind the heap's back
+        is dropped here.
+
+        Args:
+            task_names: Names popped from the heap.
 
-            if task_names:
-                for t in task_names:
-                    current_redis_length = await self.redis.llen("batch_run")
-                    if current_redis_length < self.max_parallelism:
-                        await self.redis.lpush("batch_run", t)
+        Returns:
+            List of dicts with the QUEUE_FIELDS of each task.
+        """
+        return await self.db.schedules.find(named_due_filter(task_names), QUEUE_FIELDS).to_list(length=None)
+
+    async def load_schedule_heap(self):
+        """Rebuild the in-memory heap from the PENDING schedules of the owned partitions."""
+        now = datetime.now(timezone.utc)
+        self.schedule_heap.clear()
+        if not self.partitions.owned:
+            print("[TaskManager]: No partitions held, scheduler heap is empty")
+            return
+        cursor = self.db.schedules.find(heap_filter(now, self.partitions.slot_filter()), HEAP_FIELDS)
+        async for doc in cursor:
+            if doc.get("next_run") is None:
+                continue
+            if self._dispatched.get(doc["task_name"]) == as_utc(doc["next_run"]):
+                continue
+            self._track(doc)
+        print(f"[TaskManager]: Scheduler heap loaded with {len(self.schedule_heap)} tasks")
 
+    def _track(self, doc: dict):
+        """Push a schedule document's next deadline onto the heap.
+
+        The deadline is next_run, pushed forward to start_date if the schedule
+        has not started yet. Schedules whose deadline falls after end_date, or
+        that belong to a partition another replica holds, are not tracked.
+
+        Args:
+            doc: Schedule fields: task_name, priority, next_run, start_date, end_date.
+        """
+        if self.schedule_heap is None or doc.get("next_run") is None:
+            return
+        if not self.partitions.owns(doc["task_name"]):
+            self._untrack(doc["task_name"])
+            return
+        due_at = as_utc(doc["next_run"])
+        if doc.get("start_date") is not None:
+            due_at = max(due_at, as_utc(doc["start_date"]))
+        if doc.get("end_date") is not None and due_at > as_utc(doc["end_date"]):
+            self._untrack(doc["task_name"])
+            return
+        self._dispatched.pop(doc["task_name"], None)
+        self.schedule_heap.push(doc["task_name"], due_at, doc.get("priority", 3))
+        self._heap_changed.set()
+
+    def _untrack(self, task_name: str):
+        """Remove a task from the heap, if the heap scheduler is active."""
+        if self.schedule_heap is None:
+            return
+        self.schedule_heap.remove(task_name)
+        self._dispatched.pop(task_name, None)
+        self._heap_changed.set()
+
+    async def dispatch_tasks(self, tasks_ready, tick_started: int = None):
+        """Queue due tasks and admit the highest-priority ones into Redis.
+
+        Tasks with the skip misfire policy whose next_run is older than
+        misfire_grace_seconds (e.g. after scheduler downtime) are moved to
+        their next future firing instead of being run late.
+
+        Args:
+            tasks_ready: List of dicts with at least task_name and priority.
+            tick_started: When the tick's due-task lookup began (time_ns()),
+                traced as the lookup stage of each firing.
+
+        Returns:
+            Tuple of (admitted, deferred) task name lists.
+        """
+        tasks_ready, misfired = self.split_misfires(tasks_ready)
+        if misfired:
+            print(f"[TaskManager]: Skipping {len(misfired)} misfired tasks")
+            await self.reschedule_tasks(misfired, from_states=["PENDING"])
+
+        stages = [("scheduler.lookup", tick_started)] if tick_started else []
+        stages.append(("scheduler.queue_manager", time.time_ns()))
+        prioritized_tasks = await self.fun_queue_manager(tasks_ready)
+
+        if not prioritized_tasks:
+            print("no task to put in redis")
+            return [], []
+
+        admitted, deferred = await self.admit_tasks(prioritized_tasks, stages)
+        if deferred:
+            print(f"[TaskManager]: dispatch queue full, deferred {len(deferred)} tasks")
+        return admitted, deferred
+
+    async def admit_tasks(self, tasks, stages=()):
+        """Queue a prioritized batch for dispatch without exceeding max_parallelism.
+
+        The length check and the pushes run inside one Lua script, so the
+        whole batch costs a single round trip and concurrent backends cannot
+        both see free capacity and overfill the queue. Each task keeps its
+        priority in the queue, so workers claim it ahead of lower-priority
+        tasks queued earlier. A firing (task_name, next_run) that was already
+        queued is not queued again. Each queued task's TaskInRedis payload,
+        and with tracing on its trace context, are stored in the same
+        script, so no worker can claim the task before they are there.
+
+        Args:
+            tasks: queue_table rows (DISPATCH_FIELDS and _id), in priority
+                order (highest first). Rows without the payload fields are
+                queued without a payload.
+            stages: (span name, start ns) pairs of the scheduling stages
+                this pass went through, traced under each queued firing.
+
+        Returns:
+            Tuple of (admitted, deferred) task name lists. Admitted includes
+            firings that had already been pushed. Deferred tasks stay PENDING
+            in queue_table and are admitted again by the next poll tick, or
+            by the heap loop's deferred_retry_seconds wakeup.
+        """
+        if not tasks:
+            return [], []
+        task_names = [t["task_name"] for t in tasks]
+        stages = [*stages, ("scheduler.admit", time.time_ns())]
+        spans = [start_due_span(task, stages[0][1]) if tracing_enabled() else None for task in tasks]
+        args = [self.max_parallelism, DISPATCH_MARKER_TTL_SECONDS]
+        for task, span in zip(tasks, spans):
+            next_run = task.get("next_run")
+            args += [task["task_name"], as_utc(next_run).isoformat() if next_run else "",
+                     task.get("priority", 3), traceparent_of(span) if span else "", dispatch_payload(task)]
+        admitted_count, *queued = await self._admit_script(
+            keys=[DISPATCH_QUEUE, DISPATCH_READY, DISPATCH_TRACES, DISPATCH_PAYLOADS], args=args
+        )
+
+        now = datetime.now(timezone.utc)
+        queued_ns = to_ns(now)
+        for position in queued:
+            task = tasks[position]
+            DISPATCHED.labels(str(task.get("priority", 3))).inc()
+            if task.get("next_run") is not None:
+                DISPATCH_LAG_SECONDS.observe((now - as_utc(task["next_run"])).total_seconds())
+            if spans[position] is not None:
+                finish_due_span(spans[position], stages, queued_ns)
+        for task in tasks[admitted_count:]:
+            DEFERRED.labels(str(task.get("priority", 3))).inc()
+        return task_names[:admitted_count], task_names[admitted_count:]
+
+    def split_misfires(self, tasks_ready):
+        """Separate due tasks whose skip policy says the late firing must be dropped.
+
+        Args:
+            tasks_ready: List of due task dicts (QUEUE_FIELDS).
+
+        Returns:
+            Tuple of (tasks to dispatch, names of misfired tasks to reschedule).
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.misfire_grace_seconds)
+        to_dispatch, misfired = [], []
+        for task in tasks_ready:
+            policy = MisfirePolicy(task.get("misfire_policy") or self.misfire_policy)
+            next_run = task.get("next_run")
+            if policy == MisfirePolicy.SKIP and next_run is not None and as_utc(next_run) < cutoff:
+                misfired.append(task["task_name"])
             else:
-                print("no task to put in redis")
+                to_dispatch.append(task)
+        return to_dispatch, misfired
 
-            await asyncio.sleep(60)
+    async def run_reschedule_loop(self):
+        """Background loop that advances next_run for schedules whose run finished.
+
+        Workers LPUSH the task name onto the Redis 'reschedule' list when a run
+        reaches a final state. This loop blocks on that list and drains up to
+        reschedule_batch_size names at a time, so a burst of completions is
+        rescheduled with one query and one bulk write. A batch that fails is
+        pushed back onto the list, and every reschedule_sweep_seconds the
+        schedules whose request never arrived are rescheduled as well (see
+        sweep_unrescheduled).
+        """
+        next_sweep = time.monotonic() + self.reschedule_sweep_seconds
+        while True:
+            task_names = []
+            try:
+                if time.monotonic() >= next_sweep:
+                    next_sweep = time.monotonic() + self.reschedule_sweep_seconds
+                    await self.sweep_unrescheduled()
+                first = await self.redis.blpop(["reschedule"], timeout=5)
+                if first is None:
+                    continue
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    pipe.lrange("reschedule", 0, self.reschedule_batch_size - 2)
+                    pipe.ltrim("reschedule", self.reschedule_batch_size - 1, -1)
+                    rest, _ = await pipe.execute()
+                task_names = list(dict.fromkeys([first[1], *rest]))
+                await self.reschedule_tasks(task_names)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[TaskManager]: Rescheduling {len(task_names)} tasks failed: {e}")
+                await self._requeue_reschedules(task_names)
+                await asyncio.sleep(1)
+
+    async def _requeue_reschedules(self, task_names):
+        """Push the names of a failed reschedule batch back onto the 'reschedule' list.
+
+        If Redis is down too, the names are dropped here and left to
+        sweep_unrescheduled.
+
+        Args:
+            task_names: Names drained from the list.
+        """
+        if not task_names:
+            return
+        try:
+            await self.redis.rpush("reschedule", *task_names)
+        except Exception as e:
+            print(f"[TaskManager]: Requeueing {len(task_names)} reschedules failed: {e}")
+
+    async def sweep_unrescheduled(self):
+        """Reschedule finished schedules whose reschedule request was lost.
+
+        Covers a worker whose LPUSH onto 'reschedule' failed and a batch that
+        could not be pushed back. Only schedules of the owned partitions whose
+        next_run is more than reschedule_sweep_seconds old are picked up, so
+        requests still on their way through the list are left to the loop.
+
+        Returns:
+            Number of schedules updated.
+        """
+        if not self.partitions.owned:
+            return 0
+        now = datetime.now(timezone.utc)
+        cutoff = now - timedelta(seconds=self.reschedule_sweep_seconds)
+        docs = await self.db.schedules.find(
+            unrescheduled_filter(now, cutoff, self.partitions.slot_filter()), {"task_name": 1}
+        ).limit(self.reschedule_batch_size).to_list(length=None)
+        if not docs:
+            return 0
+        updated = await self.reschedule_tasks([doc["task_name"] for doc in docs])
+        print(f"[TaskManager]: Rescheduled {updated} tasks whose reschedule request was lost")
+        return updated
+
+    async def run_retry_loop(self):
+        """Background loop that dispatches failed attempts once their retry_after is due.
+
+        Workers add a failed task to the Redis 'retry_queue' sorted set,
+        scored by when its backoff ends. This loop moves due members onto the
+        dispatch queue at their priority and sleeps until the next one is
+        due, at most retry_poll_seconds so new retries are noticed. The move
+        is one Lua call, so every replica can run this loop.
+        """
+        while True:
+            try:
+                moved, wait_ms = await self._promote_retries_script(
+                    keys=[RETRY_QUEUE, RETRY_PRIORITIES, DISPATCH_QUEUE, DISPATCH_READY],
+                    args=[self.retry_batch_size]
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[TaskManager]: Dispatching due retries failed: {e}")
+                moved, wait_ms = 0, -1
+            if moved:
+                RETRIES_DISPATCHED.inc(moved)
+                print(f"[TaskManager]: Dispatched {moved} due retries")
+            if moved >= self.retry_batch_size:
+                continue
+            wait = self.retry_poll_seconds if wait_ms < 0 else min(self.retry_poll_seconds, wait_ms / 1000)
+            await asyncio.sleep(wait)
+
+    async def _cancel_retries(self, task_names):
+        """Drop pending retries of the tasks and their trace context, e.g. when they are paused or deleted."""
+        if not task_names:
+            return
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(RETRY_QUEUE, *task_names)
+            pipe.hdel(RETRY_PRIORITIES, *task_names)
+            pipe.hdel(DISPATCH_TRACES, *task_names)
+            await pipe.execute()
+
+    async def _mark_queued(self, task_names, state: str):
+        """Mark the dispatch payloads of queued tasks, so workers skip their runs.
+
+        A task already handed to a worker is not affected.
+        """
+        if task_names:
+            await self._mark_queued_script(keys=[DISPATCH_PAYLOADS], args=[state, *task_names])
+
+    async def reschedule_tasks(self, task_names, from_states=None):
+        """Compute and bulk-write the next firing of each schedule.
+
+        next_run is planned with the schedule's misfire policy (see
+        misfire.plan_next_runs). Schedules whose next firing falls after
+        end_date become COMPLETED; the rest go back to PENDING with their
+        retry counter reset. Each update is guarded on the state it was read
+        in, so a task paused in the meantime is left alone.
+
+        Args:
+            task_names: Names of the schedules to advance.
+            from_states: States a schedule must be in to be advanced
+                (defaults to RESCHEDULABLE_STATES).
+
+        Returns:
+            Number of schedules updated.
+        """
+        from_states = from_states or RESCHEDULABLE_STATES
+        docs = await self.db.schedules.find(
+            {"task_name": {"$in": list(task_names)}, "state": {"$in": from_states}},
+            {**RESCHEDULE_FIELDS, "state": 1}
+        ).to_list(length=None)
+        if not docs:
+            return 0
+
+        now = datetime.now(timezone.utc)
+        next_runs = plan_next_runs(docs, now, self.misfire_policy, self.max_catchup_runs)
+
+        updates = []
+        events = []
+        for doc, next_run in zip(docs, next_runs):
+            if next_run is None:
+                continue
+            finished = doc.get("end_date") is not None and next_run > as_utc(doc["end_date"])
+            doc["next_run"] = next_run
+            doc["state"] = "COMPLETED" if finished else "PENDING"
+            updates.append(UpdateOne(
+                {"_id": doc["_id"], "state": {"$in": from_states}},
+                {"$set": {"next_run": next_run, "state": doc["state"],
+                          "num_of_retries": 0, "retry_after": None, "updated_at": now}}
+            ))
+            events.append(encode_task_event(doc["task_name"], state=doc["state"],
+                                            next_run=next_run, num_of_retries=0))
+        if not updates:
+            return 0
+
+        result = await self.db.schedules.bulk_write(updates, ordered=False)
+        for doc in docs:
+            if doc["state"] == "PENDING":
+                self._track(doc)
+        await publish_task_events(self.redis, events)
+        return result.modified_count
 
     async def fun_queue_manager(self, tasks_ready):
-        """Insert new tasks into queue_table and return top priority tasks.
+        """Upsert due tasks into queue_table and return top priority tasks.
 
-        Compares incoming ready tasks against what's already in the queue_table,
-        inserts only new ones, then returns the top N tasks sorted by priority
-        (where N = max_parallelism).
+        Every due task is written with a single unordered bulk_write of
+        upserts keyed on task_name (backed by the unique task_name index), so
+        re-queuing a task refreshes its row instead of adding a duplicate. The
+        top N due PENDING rows (N = max_parallelism) of the owned partitions are
+        then read back through the state+priority index, projected to the
+        DISPATCH_FIELDS their dispatch payloads are built from.
 
         Args:
             tasks_ready: List of task dicts from date_time_criteria().
@@ -97,18 +974,55 @@ class TaskManager:
         Returns:
             List of task dicts sorted by priority, limited to max_parallelism.
         """
-        all_queued = await self.db.queue_table.find().to_list(length=None)
-        new_tasks = [item for item in tasks_ready if item not in all_queued]
-
-        if new_tasks:
-            await self.db.queue_table.insert_many(new_tasks)
+        if tasks_ready:
+            upserts = []
+            for task in tasks_ready:
+                upserts.append(UpdateOne(
+                    {"task_name": task["task_name"]}, {"$set": queue_row(task)}, upsert=True
+                ))
+            await self.db.queue_table.bulk_write(upserts, ordered=False)
 
-        prioritized = await self.db.queue_table.find().sort(
-            "priority", 1
-        ).limit(self.max_parallelism).to_list(length=None)
+        prioritized = await self.db.queue_table.find(
+            pending_queue_filter(datetime.now(timezone.utc), self.partitions.slot_filter()), DISPATCH_FIELDS
+        ).sort("priority", 1).limit(self.max_parallelism).to_list(length=None)
 
         return prioritized
 
+    async def get_operators(self) -> dict:
+        """Return the operator registry published by the workers.
+
+        Returns:
+            Dict of operator path -> {valid, reason, class_name, sha256};
+            empty if no worker has published one yet.
+        """
+        raw = await self.redis.hgetall(OPERATOR_REGISTRY_KEY)
+        return {
+            (key.decode() if isinstance(key, bytes) else key): json.loads(value)
+            for key, value in raw.items()
+        }
+
+    async def check_operator_path(self, operator_path):
+        """Reject operator paths the workers' operator registry does not know.
+
+        The check is skipped while no worker has published a registry yet, so
+        tasks can still be created before the first worker starts.
+
+        Args:
+            operator_path: operator_path from the task_config, if any.
+
+        Raises:
+            HTTPException: 400 if the path is unknown or its script is invalid.
+        """
+        if not operator_path:
+            return
+        registry = await self.get_operators()
+        if not registry:
+            print("[TaskManager]: Operator registry not published yet, skipping operator_path check")
+            return
+        error = operator_path_error(operator_path, registry)
+        if error:
+            raise HTTPException(status_code=400, detail=error)
+
     async def create_schedule(self, task: TaskInput):
         print(f"[TaskManager]: Creating new schedule: {task.task_name}")
         
@@ -124,14 +1038,18 @@ class TaskManager:
             Dict with success message and computed first_run datetime.
 
         Raises:
-            HTTPException: If the cron string is invalid or first run is after end_date.
+            HTTPException: If the cron string is invalid, first run is after end_date,
+                the operator_path is not a valid registered operator,
+                or a task with the same name already exists.
         """
+        await self.check_operator_path(task.task_config.get("operator_path"))
+
         now = datetime.now(timezone.utc)
         start_date_utc = task.start_date.astimezone(timezone.utc)
         iterator_start_time = max(now, start_date_utc)
 
         try:
-            first_run = croniter(task.cron, iterator_start_time).get_next(datetime)
+            first_run = next_fire(task.cron, iterator_start_time)
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Invalid cron string: {e}")
 
@@ -143,21 +1061,249 @@ class TaskManager:
 
         task_doc = task.model_dump()
         task_doc["next_run"] = first_run
+        task_doc["state"] = "PENDING"
+        task_doc["slot"] = slot_of(task.task_name)
+        task_doc["created_at"] = task_doc["updated_at"] = datetime.now(timezone.utc)
 
-        await self.db.schedules.insert_one(task_doc)
+        try:
+            await self.db.schedules.insert_one(task_doc)
+        except DuplicateKeyError:
+            raise HTTPException(status_code=409, detail=f"Task '{task.task_name}' already exists")
+        self._track(task_doc)
+        await publish_task_events(self.redis, [encode_task_event(
+            task.task_name, **TaskSummary.from_mongo(task_doc).model_dump(mode="json", exclude={"task_name"})
+        )])
         return {"message": "Task schedule created", "first_run": first_run}
 
-    async def get_all_schedules(self):
-        """Fetch all task schedules from the MongoDB schedules collection.
+    async def create_schedules(self, raw_tasks):
+        """Validate and create many schedules with a single insert_many.
+
+        Each item is validated as a TaskInput on its own, so one bad item
+        does not reject the batch. The operator registry is read once, the
+        first runs are computed with one vectorized call per distinct cron
+        expression, and the valid documents are inserted unordered, so
+        duplicate names only fail their own item.
+
+        Args:
+            raw_tasks: List of task dicts in the POST /tasks body format.
 
         Returns:
-            List of TaskInDB instances for every document in the collection.
+            Dict with the number of schedules created and a list of errors,
+            each {"index", "task_name", "detail"} referring to the input list.
         """
-        tasks_list = []
-        due_tasks_cursor = self.db.schedules.find({})
-        async for task in due_tasks_cursor:
-            tasks_list.append(TaskInDB.from_mongo(task))
-        return tasks_list
+        errors = []
+
+        def reject(index, item, detail):
+            task_name = item.get("task_name") if isinstance(item, dict) else None
+            errors.append({"index": index, "task_name": task_name, "detail": detail})
+
+        tasks = []
+        for index, item in enumerate(raw_tasks):
+            try:
+                tasks.append((index, TaskInput.model_validate(item)))
+            except ValidationError as e:
+                reject(index, item, "; ".join(
+                    f"{'.'.join(str(part) for part in err['loc']) or 'body'}: {err['msg']}"
+                    for err in e.errors()
+                ))
+
+        registry = await self.get_operators()
+        if registry:
+            checked = []
+            for index, task in tasks:
+                operator_path = task.task_config.get("operator_path")
+                error = operator_path_error(operator_path, registry) if operator_path else None
+                if error:
+                    reject(index, raw_tasks[index], error)
+                else:
+                    checked.append((index, task))
+            tasks = checked
+
+        now = datetime.now(timezone.utc)
+        first_runs = next_fire_times(
+            [(task.cron, max(now, task.start_date.astimezone(timezone.utc))) for _, task in tasks]
+        ) if tasks else []
+
+        docs, doc_indexes = [], []
+        for (index, task), (first_run,) in zip(tasks, first_runs):
+            if first_run > task.end_date.astimezone(timezone.utc):
+                reject(index, raw_tasks[index], "First run time is after the end date. Task will never run.")
+                continue
+            task_doc = task.model_dump()
+            task_doc["next_run"] = first_run
+            task_doc["state"] = "PENDING"
+            task_doc["slot"] = slot_of(task.task_name)
+            task_doc["created_at"] = task_doc["updated_at"] = now
+            docs.append(task_doc)
+            doc_indexes.append(index)
+
+        failed = set()
+        if docs:
+            try:
+                await self.db.schedules.insert_many(docs, ordered=False)
+            except BulkWriteError as e:
+                for write_error in e.details.get("writeErrors", []):
+                    position = write_error["index"]
+                    failed.add(position)
+                    detail = (f"Task '{docs[position]['task_name']}' already exists"
+                              if write_error.get("code") == 11000 else write_error.get("errmsg"))
+                    reject(doc_indexes[position], raw_tasks[doc_indexes[position]], detail)
+
+        created = [doc for position, doc in enumerate(docs) if position not in failed]
+        for doc in created:
+            self._track(doc)
+        await publish_task_events(self.redis, [
+            encode_task_event(doc["task_name"], **TaskSummary.from_mongo(doc).model_dump(
+                mode="json", exclude={"task_name"}))
+            for doc in created
+        ])
+        errors.sort(key=lambda error: error["index"])
+        print(f"[TaskManager]: Bulk created {len(created)} schedules, {len(errors)} rejected")
+        return {"created": len(created), "errors": errors}
+
+    async def get_all_schedules(self, limit: int = 100, cursor: str = None,
+                                state: str = None, priority: int = None):
+        """Fetch one page of task summaries, newest first.
+
+        Pages are keyset-paginated on _id: the cursor is the _id of the last
+        summary of the previous page, so every page is a bounded index range
+        scan no matter how deep the client pages. Only the TaskSummary fields
+        are projected; execution history and task_config stay in MongoDB.
+
+        Args:
+            limit: Maximum number of summaries to return.
+            cursor: Opaque cursor returned with the previous page, if any.
+            state: Only return tasks in this state.
+            priority: Only return tasks with this priority.
+
+        Returns:
+            Tuple of (list of TaskSummary, next cursor or None on the last page).
+
+        Raises:
+            HTTPException: 400 if the cursor is malformed.
+        """
+        query = {}
+        if cursor:
+            if not ObjectId.is_valid(cursor):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            query["_id"] = {"$lt": ObjectId(cursor)}
+        if state:
+            query["state"] = state
+        if priority is not None:
+            query["priority"] = priority
+
+        docs = await self.db.schedules.find(query, TaskSummary.PROJECTION) \
+            .sort("_id", -1).limit(limit + 1).to_list(length=limit + 1)
+        next_cursor = str(docs[limit - 1]["_id"]) if len(docs) > limit else None
+        return [TaskSummary.from_mongo(doc) for doc in docs[:limit]], next_cursor
+
+    async def get_schedule(self, task_name: str):
+        """Fetch the full document of a single task.
+
+        Args:
+            task_name: Name of the task.
+
+        Returns:
+            TaskDetail for the task.
+
+        Raises:
+            HTTPException: 404 if the task does not exist.
+        """
+        doc = await self.db.schedules.find_one({"task_name": task_name})
+        if not doc:
+            raise HTTPException(status_code=404, detail="Task not found")
+        return TaskDetail.from_mongo(doc)
+
+    async def get_task_history(self, task_name: str, limit: int = 50, before: datetime = None):
+        """Fetch one page of a task's execution attempts, newest first.
+
+        Attempts live in the task_attempts time-series collection (the
+        schedule document only keeps the last few); pages are keyset-paginated
+        on started_at through the attempts_by_task index.
+
+        Args:
+            task_name: Name of the task.
+            limit: Maximum number of attempts to return.
+            before: Only return attempts that started before this time
+                (the cursor returned with the previous page).
+
+        Returns:
+            Tuple of (list of ExecutionAttempt, next cursor or None on the last page).
+        """
+        query = {"task_name": task_name}
+        if before is not None:
+            query["started_at"] = {"$lt": as_utc(before)}
+
+        docs = await self.db.task_attempts.find(query, {"_id": 0, "task_name": 0}) \
+            .sort("started_at", -1).limit(limit + 1).to_list(length=limit + 1)
+        attempts = [ExecutionAttempt(**{
+            k: as_utc(v) if isinstance(v, datetime) else v for k, v in doc.items()
+        }) for doc in docs[:limit]]
+        next_cursor = None
+        if len(docs) > limit:
+            next_cursor = attempts[-1].started_at.isoformat().replace("+00:00", "Z")
+        return attempts, next_cursor
+
+    async def resolve_log_run(self, task_name: str, run_id: str = None):
+        """Find the run whose log should be served.
+
+        Args:
+            task_name: Name of the task.
+            run_id: A specific run, or None for the task's latest run.
+
+        Returns:
+            The run_id.
+
+        Raises:
+            HTTPException: 404 if there is no log for the task/run.
+        """
+        query = {"task_name": task_name}
+        if run_id:
+            query["run_id"] = run_id
+        chunk = await self.db.task_logs.find_one(query, {"run_id": 1}, sort=[("created_at", -1)])
+        if not chunk:
+            raise HTTPException(status_code=404, detail="No logs found")
+        return chunk["run_id"]
+
+    async def iter_task_logs(self, task_name: str, run_id: str, stream: str = None,
+                             follow: bool = False):
+        """Yield a run's output, decompressing chunks in write order.
+
+        With follow, keeps polling for new chunks every log_poll_seconds until
+        the run's final chunk arrives, or until the task is no longer RUNNING
+        and nothing new was written (the worker died without closing the log).
+
+        Args:
+            task_name: Name of the task.
+            run_id: Run to read (see resolve_log_run).
+            stream: "stdout" or "stderr" to read only one stream.
+            follow: Keep streaming while the run is still writing.
+
+        Yields:
+            Decoded output text, one chunk at a time.
+        """
+        streams = [stream, None] if stream else ["stdout", "stderr", None]
+        last_seq = 0
+        while True:
+            found = False
+            cursor = self.db.task_logs.find(
+                {"run_id": run_id, "seq": {"$gt": last_seq}, "stream": {"$in": streams}},
+                {"seq": 1, "data": 1, "final": 1}
+            ).sort("seq", 1)
+            async for chunk in cursor:
+                found = True
+                last_seq = chunk["seq"]
+                if chunk.get("final"):
+                    return
+                yield zlib.decompress(chunk["data"]).decode("utf-8", errors="replace")
+
+            if not follow:
+                return
+            if not found:
+                schedule = await self.db.schedules.find_one({"task_name": task_name}, {"state": 1})
+                if not schedule or schedule.get("state") != "RUNNING":
+                    return
+            await asyncio.sleep(self.log_poll_seconds)
 
     async def get_queued_tasks(self):
         """Fetch all tasks currently in the queue_table.
@@ -170,8 +1316,19 @@ class TaskManager:
             task["_id"] = str(task["_id"])
         return tasks
 
+    async def refresh_queue_depths(self):
+        """Set the scheduler_queue_depth gauges from Redis; called on each /metrics scrape."""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zcard(DISPATCH_QUEUE)
+            pipe.zcard(RETRY_QUEUE)
+            pipe.llen("reschedule")
+            dispatch, retry, reschedule = await pipe.execute()
+        QUEUE_DEPTH.labels("dispatch").set(dispatch)
+        QUEUE_DEPTH.labels("retry").set(retry)
+        QUEUE_DEPTH.labels("reschedule").set(reschedule)
+
     async def delete_schedule(self, task_id: str):
-        """Delete a task schedule by its MongoDB ObjectId.
+        """Delete a task schedule, and its queue_table row, by its MongoDB ObjectId.
 
         Args:
             task_id: String representation of the MongoDB ObjectId.
@@ -189,9 +1346,17 @@ class TaskManager:
         except Exception:
             raise HTTPException(status_code=400, detail="Invalid task ID format")
 
-        delete_result = await self.db.schedules.delete_one({"_id": object_id_to_delete})
+        deleted = await self.db.schedules.find_one_and_delete(
+            {"_id": object_id_to_delete}, projection={"task_name": 1}
+        )
 
-        if delete_result.deleted_count == 1:
+        if deleted is not None:
+            # Left PENDING, the row would keep being admitted for a task that is gone
+            await self.db.queue_table.delete_one({"task_name": deleted.get("task_name")})
+            self._untrack(deleted.get("task_name"))
+            await self._cancel_retries([deleted.get("task_name")])
+            await self._mark_queued([deleted.get("task_name")], "CANCELLED")
+            await publish_task_events(self.redis, [encode_delete_event(deleted.get("task_name"))])
             return {"message": "Task deleted successfully"}
         else:
             raise HTTPException(status_code=404, detail="Task not found")
@@ -203,36 +1368,191 @@ class TaskManager:
         await self.db.queue_table.update_one({"task_name": task_name}, {"$set": {"state": "PAUSED"}})
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Task not found.")
+        self._untrack(task_name)
+        await self._cancel_retries([task_name])
+        await self._mark_queued([task_name], "PAUSED")
+        await publish_task_events(self.redis, [encode_task_event(task_name, state="PAUSED")])
         return {"message": f"Task {task_name} paused successfully"}
 
+    async def _release_markers(self, schedules):
+        """Let resumed schedules queue again the firing a pause skipped.
+
+        A firing queued before the pause is skipped by the worker and leaves
+        next_run unchanged, so its dispatch marker still holds next_run and
+        would keep ADMIT_SCRIPT from queuing it again. Markers of firings that
+        ran, and were rescheduled since, are left alone. The queue_table rows
+        are not touched: they stay PAUSED until the next firing rewrites them.
+
+        Args:
+            schedules: Resumed schedule documents with task_name and next_run.
+        """
+        args = []
+        for doc in schedules:
+            if doc.get("next_run") is not None:
+                args += [doc["task_name"], as_utc(doc["next_run"]).isoformat()]
+        if args:
+            await self._release_markers_script(keys=[], args=args)
+
     async def resume_task(self, task_name: str):
         """Resume a paused task by updating state to PENDING."""
         from fastapi import HTTPException
-        result = await self.db.schedules.update_one({"task_name": task_name}, {"$set": {"state": "PENDING"}})
-        await self.db.queue_table.update_one({"task_name": task_name}, {"$set": {"state": "PENDING"}})
-        if result.matched_count == 0:
+        schedule = await self.db.schedules.find_one_and_update(
+            {"task_name": task_name},
+            {"$set": {"state": "PENDING"}},
+            projection=HEAP_FIELDS,
+            return_document=ReturnDocument.AFTER
+        )
+        if schedule is None:
             raise HTTPException(status_code=404, detail="Task not found.")
+        await self._release_markers([schedule])
+        self._track(schedule)
+        await publish_task_events(self.redis, [encode_task_event(task_name, state="PENDING")])
         return {"message": f"Task {task_name} resumed successfully"}
 
     async def run_task_adhoc(self, task_name: str):
         """Trigger a task immediately by pushing it to Redis directly."""
         from fastapi import HTTPException
-        task = await self.db.schedules.find_one({"task_name": task_name})
+        task = await self.db.schedules.find_one({"task_name": task_name}, QUEUE_FIELDS)
         if not task:
             raise HTTPException(status_code=404, detail="Task not found in schedules")
         
         # Upsert it into queue table so execution logic finds it there
-        task.pop('_id', None) # remove _id if exists
-        task['state'] = 'PENDING'
+        row = queue_row(task)
         await self.db.queue_table.update_one(
             {"task_name": task_name},
-            {"$set": task},
+            {"$set": row},
             upsert=True
         )
         
-        await self.redis.lpush("batch_run", task_name)
+        # Bypasses max_parallelism, but still queued behind higher priorities
+        score = task.get("priority", 3) * 10 ** 13 + int(datetime.now(timezone.utc).timestamp() * 1000)
+        payload = dispatch_payload({**row, "_id": task["_id"]})
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(DISPATCH_QUEUE, {task_name: score}, nx=True)
+            pipe.lpush(DISPATCH_READY, "1")
+            if payload:
+                pipe.hset(DISPATCH_PAYLOADS, task_name, payload)
+            await pipe.execute()
         return {"message": f"Task {task_name} queued for ad-hoc execution"}
 
+    async def _select_task_names(self, task_filter: TaskFilter, extra: dict = None, fields: dict = None):
+        """Find the schedules a bulk request applies to.
+
+        Args:
+            task_filter: Criteria from the request body.
+            extra: Further criteria, e.g. on the state the action applies to.
+            fields: Projection; defaults to task_name only.
+
+        Returns:
+            List of matching schedule documents.
+        """
+        query = task_filter.to_query()
+        if extra:
+            query = {"$and": [query, extra]}
+        return await self.db.schedules.find(query, fields or {"task_name": 1}).to_list(length=None)
+
+    async def pause_tasks(self, task_filter: TaskFilter):
+        """Pause every matching schedule that is not paused yet.
+
+        Both collections are updated with one update_many each, and pending
+        retries are dropped with one Redis pipeline.
+
+        Args:
+            task_filter: Which schedules to pause.
+
+        Returns:
+            Dict with a message and the number of tasks paused.
+        """
+        names = [doc["task_name"] for doc in
+                 await self._select_task_names(task_filter, {"state": {"$ne": "PAUSED"}})]
+        if names:
+            update = {"$set": {"state": "PAUSED"}}
+            await self.db.schedules.update_many({"task_name": {"$in": names}}, update)
+            await self.db.queue_table.update_many({"task_name": {"$in": names}}, update)
+            for task_name in names:
+                self._untrack(task_name)
+            await self._cancel_retries(names)
+            await self._mark_queued(names, "PAUSED")
+            await publish_task_events(self.redis, [encode_task_event(n, state="PAUSED") for n in names])
+        return {"message": f"Paused {len(names)} tasks", "count": len(names)}
+
+    async def resume_tasks(self, task_filter: TaskFilter):
+        """Resume every matching paused schedule.
+
+        Args:
+            task_filter: Which schedules to resume; only PAUSED ones are changed.
+
+        Returns:
+            Dict with a message and the number of tasks resumed.
+        """
+        schedules = await self._select_task_names(
+            task_filter, {"state": "PAUSED"},
+            HEAP_FIELDS
+        )
+        names = [doc["task_name"] for doc in schedules]
+        if names:
+            await self.db.schedules.update_many(
+                {"task_name": {"$in": names}, "state": "PAUSED"}, {"$set": {"state": "PENDING"}}
+            )
+            await self._release_markers(schedules)
+            for doc in schedules:
+                self._track(doc)
+            await publish_task_events(self.redis, [encode_task_event(n, state="PENDING") for n in names])
+        return {"message": f"Resumed {len(names)} tasks", "count": len(names)}
+
+    async def run_tasks_adhoc(self, task_filter: TaskFilter):
+        """Trigger every matching schedule now, like run_task_adhoc.
+
+        The queue rows are upserted with one bulk_write and the tasks are
+        queued with one Redis pipeline. Like single ad-hoc runs this
+        bypasses max_parallelism; each task keeps its priority.
+
+        Args:
+            task_filter: Which schedules to run; paused ones are skipped.
+
+        Returns:
+            Dict with a message and the number of tasks queued.
+        """
+        schedules = await self._select_task_names(task_filter, {"state": {"$ne": "PAUSED"}}, QUEUE_FIELDS)
+        if schedules:
+            rows = {doc["task_name"]: queue_row(doc) for doc in schedules}
+            await self.db.queue_table.bulk_write([
+                UpdateOne({"task_name": name}, {"$set": row}, upsert=True) for name, row in rows.items()
+            ], ordered=False)
+            payloads = {doc["task_name"]: dispatch_payload({**rows[doc["task_name"]], "_id": doc["_id"]})
+                        for doc in schedules}
+            payloads = {name: payload for name, payload in payloads.items() if payload}
+            now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.zadd(DISPATCH_QUEUE, {
+                    doc["task_name"]: doc.get("priority", 3) * 10 ** 13 + now_ms for doc in schedules
+                }, nx=True)
+                pipe.lpush(DISPATCH_READY, *["1"] * len(schedules))
+                if payloads:
+                    pipe.hset(DISPATCH_PAYLOADS, mapping=payloads)
+                await pipe.execute()
+        return {"message": f"Queued {len(schedules)} tasks for ad-hoc execution", "count": len(schedules)}
+
+    async def delete_schedules(self, task_filter: TaskFilter):
+        """Delete every matching schedule and its queue_table row, with one delete_many each.
+
+        Args:
+            task_filter: Which schedules to delete.
+
+        Returns:
+            Dict with a message and the number of tasks deleted.
+        """
+        names = [doc["task_name"] for doc in await self._select_task_names(task_filter)]
+        if names:
+            await self.db.schedules.delete_many({"task_name": {"$in": names}})
+            await self.db.queue_table.delete_many({"task_name": {"$in": names}})
+            for task_name in names:
+                self._untrack(task_name)
+            await self._cancel_retries(names)
+            await self._mark_queued(names, "CANCELLED")
+            await publish_task_events(self.redis, [encode_delete_event(n) for n in names])
+        return {"message": f"Deleted {len(names)} tasks", "count": len(names)}
+
     async def fun_done(self):
         """Background loop for cleanup if needed in future.
         Currently doing nothing to preserve completed tasks.
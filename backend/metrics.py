@@ -0,0 +1,153 @@
+"""
+Prometheus instrumentation shared by the API and the worker.
+
+Holds the MongoDB and Redis call latency histograms, which both processes
+fill through their clients, and the exposition of whatever metrics a
+process defines: the API serves them on GET /metrics, the worker on its own
+HTTP port (metrics_port in worker/config.json). The scheduler's metrics
+live in manager.py, the worker's in tasks.py.
+
+Every observation is a couple of perf_counter() calls and a lock-protected
+add, microseconds against the network round trip it measures, so the
+instrumentation stays on in production. Label values are kept to small
+fixed sets (command names, states, priorities).
+
+Processes that fork workers (the Celery prefork pool, several uvicorn
+workers) must start with PROMETHEUS_MULTIPROC_DIR pointing at an empty
+directory; every process then writes its samples there and the exporter
+adds them up.
+"""
+
+import os
+import threading
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Histogram, REGISTRY, generate_latest, start_http_server,
+)
+from prometheus_client import multiprocess
+from pymongo import monitoring
+
+# Round trips are sub-millisecond to seconds; the default buckets start at 5 ms.
+CALL_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Lateness of a run against its next_run: well under a second when healthy,
+# minutes behind a backlog.
+LAG_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+MONGO_COMMAND_SECONDS = Histogram(
+    "mongo_command_seconds", "MongoDB command latency, by command", ["command"], buckets=CALL_BUCKETS
+)
+REDIS_COMMAND_SECONDS = Histogram(
+    "redis_command_seconds",
+    "Redis command latency, by command (blocking pops include the time spent waiting)",
+    ["command"], buckets=CALL_BUCKETS
+)
+
+
+class MongoLatencyListener(monitoring.CommandListener):
+    """Times every command a pymongo / Motor client sends.
+
+    Pass an instance in the client's event_listeners.
+    """
+
+    def __init__(self):
+        self._started = {}
+
+    def started(self, event):
+        self._started[(event.connection_id, event.request_id)] = time.perf_counter()
+
+    def _finished(self, event):
+        started = self._started.pop((event.connection_id, event.request_id), None)
+        if started is not None:
+            MONGO_COMMAND_SECONDS.labels(event.command_name).observe(time.perf_counter() - started)
+
+    def succeeded(self, event):
+        self._finished(event)
+
+    def failed(self, event):
+        self._finished(event)
+
+
+def _command_name(args) -> str:
+    name = args[0] if args else "unknown"
+    return (name.decode() if isinstance(name, bytes) else str(name)).upper()
+
+
+def instrument_redis(client):
+    """Time every command of a synchronous redis.Redis client.
+
+    Commands sent in a pipeline are not timed individually.
+
+    Returns:
+        The client, for chaining.
+    """
+    execute_command = client.execute_command
+
+    def timed(*args, **options):
+        started = time.perf_counter()
+        try:
+            return execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_SECONDS.labels(_command_name(args)).observe(time.perf_counter() - started)
+
+    client.execute_command = timed
+    return client
+
+
+def instrument_async_redis(client):
+    """Time every command of a redis.asyncio.Redis client (see instrument_redis)."""
+    execute_command = client.execute_command
+
+    async def timed(*args, **options):
+        started = time.perf_counter()
+        try:
+            return await execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_SECONDS.labels(_command_name(args)).observe(time.perf_counter() - started)
+
+    client.execute_command = timed
+    return client
+
+
+def metrics_registry():
+    """Registry to expose: every process's samples in multiprocess mode, else this process's."""
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def render_metrics():
+    """Current metrics in the Prometheus text format.
+
+    Returns:
+        Tuple of (body bytes, content type).
+    """
+    return generate_latest(metrics_registry()), CONTENT_TYPE_LATEST
+
+
+_exporter_lock = threading.Lock()
+_exporter_port = None
+
+
+def start_exporter(port: int):
+    """Serve /metrics on a background HTTP server, once per process.
+
+    Args:
+        port: Port to listen on; 0 or None disables the exporter.
+    """
+    global _exporter_port
+    if not port:
+        return
+    with _exporter_lock:
+        if _exporter_port is not None:
+            return
+        try:
+            start_http_server(port, registry=metrics_registry())
+        except OSError as e:
+            print(f"[Metrics] Could not serve metrics on port {port}: {e}")
+            return
+        _exporter_port = port
+    print(f"[Metrics] Serving metrics on :{port}/metrics")
@@ -0,0 +1,62 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from cron_cache import compile_cron, to_datetime64, from_datetime64
+from models import MisfirePolicy
+
+
+def plan_next_runs(docs: Sequence[dict], now: datetime, default_policy: MisfirePolicy,
+                   max_catchup_runs: int) -> List[Optional[datetime]]:
+    """Compute each schedule's next_run after a run, applying its misfire policy.
+
+    For every distinct cron expression the last max_catchup_runs firings up to
+    `now` and the first firing after it are computed once (vectorized); each
+    schedule then only needs a searchsorted against its previous next_run:
+
+      skip      -> the first firing after now
+      fire_once -> the latest missed firing (runs once immediately), if any
+      fire_all  -> the earliest missed firing still within the last
+                   max_catchup_runs, so a long outage replays at most that many
+
+    Args:
+        docs: Schedule documents with cron, next_run and optionally misfire_policy.
+        now: Current UTC time.
+        default_policy: Policy for schedules that do not set one.
+        max_catchup_runs: Upper bound on replayed firings for fire_all.
+
+    Returns:
+        The new next_run for each doc, in input order (None if the doc has no cron).
+    """
+    groups = defaultdict(list)
+    for position, doc in enumerate(docs):
+        if doc.get("cron"):
+            groups[doc["cron"]].append(position)
+
+    now_array = to_datetime64([now])
+    results: List[Optional[datetime]] = [None] * len(docs)
+    window = max(1, max_catchup_runs)
+
+    for expr, positions in groups.items():
+        compiled = compile_cron(expr)
+        # Firings in (.., now], oldest first, and the first firing after now.
+        recent = compiled.prev_array(now_array + np.timedelta64(1, "us"), window)[0]
+        upcoming = compiled.next_array(now_array, 1)[0, 0]
+
+        previous = to_datetime64(docs[p].get("next_run") or now for p in positions)
+        first_missed = np.searchsorted(recent, previous, side="right")
+        has_missed = first_missed < len(recent)
+
+        policies = np.array([
+            MisfirePolicy(docs[p].get("misfire_policy") or default_policy).value for p in positions
+        ])
+        fire_all = recent[np.minimum(first_missed, len(recent) - 1)]
+        chosen = np.where(
+            has_missed & (policies == MisfirePolicy.FIRE_ALL.value), fire_all,
+            np.where(has_missed & (policies == MisfirePolicy.FIRE_ONCE.value), recent[-1], upcoming)
+        )
+        for position, next_run in zip(positions, from_datetime64(chosen)):
+            results[position] = next_run
+    return results
@@ -1,8 +1,8 @@
 from pydantic import BaseModel, Field, field_validator, model_validator, ConfigDict
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, ClassVar
 from enum import Enum
-from croniter import croniter
+import re
 
 
 class TaskState(str, Enum):
@@ -24,16 +24,57 @@ class TaskState(str, Enum):
     EXHAUSTED = "EXHAUSTED"
 
 
+class MisfirePolicy(str, Enum):
+    """What to do with cron firings that were missed while a run or the scheduler was busy/down."""
+    FIRE_ONCE = "fire_once"    # run once for everything missed, then continue on schedule
+    FIRE_ALL = "fire_all"      # run every missed firing (bounded by max_catchup_runs)
+    SKIP = "skip"              # drop missed firings, continue with the next future one
+
+
+class OverlapPolicy(str, Enum):
+    """What a worker does when a run starts while another run of the same task holds its lock."""
+    SKIP = "skip"        # drop the new run (recorded as a LOCK_FAILED attempt)
+    QUEUE = "queue"      # start the new run once the current one finishes
+    REPLACE = "replace"  # cancel the current run, then start the new one
+
+
+class RetryBackoff(BaseModel):
+    """Delay before a failed attempt is retried.
+
+    Attempt n waits min(max_seconds, base_seconds * factor ** (n - 1)), less a
+    random fraction of up to ``jitter`` of that delay, so tasks failing together
+    do not all retry at the same moment.
+    """
+    base_seconds: float = Field(default=30, ge=1, le=86400, description="Delay after the first failure")
+    factor: float = Field(default=2, ge=1, le=10, description="Multiplier applied per further failure")
+    max_seconds: float = Field(default=3600, ge=1, le=86400, description="Upper bound of the delay")
+    jitter: float = Field(
+        default=0.5,
+        ge=0,
+        le=1,
+        description="Largest fraction of the delay taken off at random (1 = full jitter)"
+    )
+
+    @model_validator(mode="after")
+    def cap_not_below_base(self) -> "RetryBackoff":
+        """Ensure max_seconds is at least base_seconds."""
+        if self.max_seconds < self.base_seconds:
+            raise ValueError("max_seconds must not be below base_seconds")
+        return self
+
+
 class ExecutionAttempt(BaseModel):
     """Represents a single execution attempt of a task.
 
-    Embedded inside TaskInDB.execution_history to track each run.
+    Stored per run in the task_attempts collection; the most recent few are
+    also embedded in TaskInDB.execution_history.
     """
     attempt_number: int = Field(..., ge=1)
     started_at: datetime
     ended_at: Optional[datetime] = Field(default=None)
-    state: TaskState = Field(..., description="COMPLETED / FAILED / TIMED_OUT")
+    state: TaskState = Field(..., description="COMPLETED / FAILED / TIMED_OUT / LOCK_FAILED")
     fail_reason: Optional[str] = Field(default=None)
+    run_id: Optional[str] = Field(default=None, description="Key of this attempt's output in task_logs")
 
     @model_validator(mode="after")
     def validate_attempt(self) -> "ExecutionAttempt":
@@ -102,11 +143,29 @@ class TaskInput(BaseModel):
         description="Max seconds a single attempt can run before TIMED_OUT"
     )
 
+    misfire_policy: Optional[MisfirePolicy] = Field(
+        default=None,
+        description="Catch-up behaviour for missed firings (defaults to misfire_policy in config.json)"
+    )
+
+    overlap_policy: Optional[OverlapPolicy] = Field(
+        default=None,
+        description="Behaviour when a run starts while the previous one is still running "
+                    "(defaults to overlap_policy in worker/config.json)"
+    )
+
+    retry_backoff: Optional[RetryBackoff] = Field(
+        default=None,
+        description="Delay between failed attempts (defaults to retry_backoff in worker/config.json)"
+    )
+
     @field_validator("cron")
     @classmethod
     def validate_cron(cls, v: str) -> str:
         """Validate that the cron expression is syntactically correct."""
-        if not croniter.is_valid(v):
+        # Imported here so the worker, which shares this module, does not need NumPy.
+        from cron_cache import is_valid_cron
+        if not is_valid_cron(v):
             raise ValueError(f"Invalid cron expression: '{v}'")
         return v
 
@@ -131,6 +190,48 @@ class TaskInput(BaseModel):
     )
 
 
+class TaskFilter(BaseModel):
+    """Selects the schedules a bulk lifecycle request (pause/resume/run/delete) applies to.
+
+    All given criteria must match; at least one is required, so an empty
+    body cannot act on every task by accident.
+    """
+    task_names: Optional[List[str]] = Field(
+        default=None,
+        max_length=10000,
+        description="Exact task names"
+    )
+    name_prefix: Optional[str] = Field(
+        default=None,
+        min_length=1,
+        max_length=200,
+        description="Tasks whose name starts with this prefix"
+    )
+    state: Optional[TaskState] = Field(default=None)
+    priority: Optional[int] = Field(default=None, ge=1, le=3)
+
+    @model_validator(mode="after")
+    def at_least_one_criterion(self) -> "TaskFilter":
+        """Reject filters that would match every task."""
+        if self.task_names is None and self.name_prefix is None \
+                and self.state is None and self.priority is None:
+            raise ValueError("At least one of task_names, name_prefix, state or priority is required")
+        return self
+
+    def to_query(self) -> Dict[str, Any]:
+        """MongoDB filter on the schedules collection."""
+        clauses = []
+        if self.task_names is not None:
+            clauses.append({"task_name": {"$in": self.task_names}})
+        if self.name_prefix is not None:
+            clauses.append({"task_name": {"$regex": f"^{re.escape(self.name_prefix)}"}})
+        if self.state is not None:
+            clauses.append({"state": self.state.value})
+        if self.priority is not None:
+            clauses.append({"priority": self.priority})
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
 class TaskInDB(TaskInput):
     """Full task document as stored in MongoDB.
 
@@ -205,7 +306,9 @@ class TaskInRedis(BaseModel):
     """Minimal task data pushed into Redis for the worker.
 
     Contains only the fields the Celery worker needs to execute the task
-    and report back results.
+    and report back results. The scheduler stores one per queued task in the
+    'dispatch_queue:payload' hash and the dispatcher hands it to the worker
+    with the task, so a run does not look its task up in MongoDB.
     """
     id: str = Field(
         ...,
@@ -234,6 +337,9 @@ class TaskInRedis(BaseModel):
 
     task_config: Dict[str, Any] = Field(default_factory=dict)
 
+    overlap_policy: Optional[OverlapPolicy] = Field(default=None)
+    retry_backoff: Optional[RetryBackoff] = Field(default=None)
+
     @classmethod
     def from_db(cls, task: TaskInDB) -> "TaskInRedis":
         """Create a TaskInRedis instance from a TaskInDB document.
@@ -256,6 +362,42 @@ class TaskInRedis(BaseModel):
             attempt_number=len(task.execution_history) + 1,
             state=task.state,
             task_config=task.task_config,
+            overlap_policy=task.overlap_policy,
+            retry_backoff=task.retry_backoff,
+        )
+
+    @classmethod
+    def from_queue_row(cls, row: dict) -> "TaskInRedis":
+        """Create a TaskInRedis instance from a raw queue_table document.
+
+        Args:
+            row: queue_table document with _id and the scheduling fields.
+
+        Returns:
+            TaskInRedis with naive datetimes taken as UTC.
+
+        Raises:
+            KeyError: If the row has no _id.
+            pydantic.ValidationError: If a required field is missing or invalid.
+        """
+        next_run = row.get("next_run")
+        if isinstance(next_run, datetime) and next_run.tzinfo is None:
+            next_run = next_run.replace(tzinfo=timezone.utc)
+        num_of_retries = row.get("num_of_retries") or 0
+        return cls(
+            id=str(row["_id"]),
+            task_name=row.get("task_name"),
+            priority=row.get("priority", 3),
+            cron=row.get("cron"),
+            next_run=next_run,
+            num_of_retries=num_of_retries,
+            max_retries=row.get("max_retries"),
+            timeout_seconds=row.get("timeout_seconds"),
+            attempt_number=num_of_retries + 1,
+            state=row.get("state", TaskState.PENDING),
+            task_config=row.get("task_config") or {},
+            overlap_policy=row.get("overlap_policy"),
+            retry_backoff=row.get("retry_backoff"),
         )
 
     def serialize_for_redis(self) -> str:
@@ -295,6 +437,45 @@ class TaskSummary(BaseModel):
     max_retries: int
     created_at: datetime
 
+    # MongoDB projection that fetches exactly the fields above.
+    PROJECTION: ClassVar[Dict[str, int]] = {
+        "task_name": 1,
+        "state": 1,
+        "priority": 1,
+        "next_run": 1,
+        "num_of_retries": 1,
+        "max_retries": 1,
+        "created_at": 1,
+    }
+
+    @classmethod
+    def from_mongo(cls, doc: dict) -> "TaskSummary":
+        """Build a summary from a document projected with PROJECTION.
+
+        Missing fields fall back to the TaskInDB defaults; created_at falls
+        back to the ObjectId's timestamp for documents inserted without one.
+
+        Args:
+            doc: Raw (projected) MongoDB document dict.
+
+        Returns:
+            TaskSummary instance, or None if doc is None.
+        """
+        if doc is None:
+            return None
+        next_run = doc.get("next_run")
+        created_at = doc.get("created_at") or doc["_id"].generation_time
+        return cls(
+            id=str(doc["_id"]),
+            task_name=doc["task_name"],
+            state=doc.get("state", TaskState.PENDING),
+            priority=doc.get("priority", 3),
+            next_run=next_run.replace(tzinfo=timezone.utc) if next_run and next_run.tzinfo is None else next_run,
+            num_of_retries=doc.get("num_of_retries", 0),
+            max_retries=doc.get("max_retries", 3),
+            created_at=created_at.replace(tzinfo=timezone.utc) if created_at.tzinfo is None else created_at,
+        )
+
 
 class TaskDetail(TaskSummary):
     """Full response model for single task detail view.
@@ -314,6 +495,42 @@ class TaskDetail(TaskSummary):
     paused_at: Optional[datetime]
     execution_history: List[ExecutionAttempt]
 
+    @classmethod
+    def from_mongo(cls, doc: dict) -> "TaskDetail":
+        """Build the detail view from a full MongoDB schedule document.
+
+        Like TaskSummary.from_mongo this reads the document as stored, without
+        the TaskInput/TaskInDB validators, so a schedule whose counters have
+        moved past what creation allows (e.g. an EXHAUSTED task with
+        max_retries=0 and num_of_retries=1) can still be viewed.
+
+        Args:
+            doc: Raw MongoDB document dict.
+
+        Returns:
+            TaskDetail instance, or None if doc is None.
+        """
+        if doc is None:
+            return None
+        summary = TaskSummary.from_mongo(doc)
+        doc = {k: v.replace(tzinfo=timezone.utc) if isinstance(v, datetime) and v.tzinfo is None else v
+               for k, v in doc.items()}
+        return cls(
+            **summary.model_dump(),
+            description=doc.get("description"),
+            cron=doc["cron"],
+            start_date=doc["start_date"],
+            end_date=doc["end_date"],
+            timeout_seconds=doc.get("timeout_seconds", 600),
+            last_run=doc.get("last_run"),
+            retry_after=doc.get("retry_after"),
+            started_at=doc.get("started_at"),
+            completed_at=doc.get("completed_at"),
+            cancelled_at=doc.get("cancelled_at"),
+            paused_at=doc.get("paused_at"),
+            execution_history=doc.get("execution_history", []),
+        )
+
 
 
 
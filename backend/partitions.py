@@ -0,0 +1,214 @@
+import hashlib
+import os
+import socket
+import time
+import uuid
+import zlib
+from typing import Dict, Iterable, Optional, Sequence, Set, Tuple
+
+from pymongo import UpdateOne
+
+
+# Every schedule is stored with slot = crc32(task_name) % SLOT_COUNT. The slot
+# space is fixed, so changing scheduler_partitions only changes which slot
+# ranges a partition covers, never the documents.
+SLOT_COUNT = 1024
+
+# Live scheduler replicas: sorted set of member id -> lease expiry (ms).
+MEMBERS_KEY = "scheduler:members"
+LEASE_KEY_PREFIX = "scheduler:partition:"
+
+# Refresh this member's heartbeat, drop expired members, return the live ones.
+# Uses the Redis clock, so replicas do not need synchronized clocks.
+# KEYS[1] = members zset, ARGV[1] = member id, ARGV[2] = ttl in ms.
+JOIN_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+redis.call('ZADD', KEYS[1], now + tonumber(ARGV[2]), ARGV[1])
+return redis.call('ZRANGE', KEYS[1], 0, -1)
+"""
+
+# Claim/renew or release every partition lease in one call.
+# KEYS = lease keys, ARGV[1] = member id, ARGV[2] = ttl in ms,
+# ARGV[2 + i] = '1' to hold KEYS[i], '0' to give it up.
+# Returns 1/0 per key: whether this member holds it now.
+CLAIM_SCRIPT = """
+local held = {}
+for i, key in ipairs(KEYS) do
+    local owner = redis.call('GET', key)
+    held[i] = 0
+    if ARGV[i + 2] == '1' then
+        if owner == ARGV[1] then
+            redis.call('PEXPIRE', key, ARGV[2])
+            held[i] = 1
+        elseif not owner then
+            redis.call('SET', key, ARGV[1], 'PX', ARGV[2])
+            held[i] = 1
+        end
+    elseif owner == ARGV[1] then
+        redis.call('DEL', key)
+    end
+end
+return held
+"""
+
+
+def slot_of(task_name: str) -> int:
+    """Return the slot a task is stored with (stable across processes)."""
+    return zlib.crc32(task_name.encode("utf-8")) % SLOT_COUNT
+
+
+def partition_range(partition: int, partitions: int) -> Tuple[int, int]:
+    """Return the [start, end) slot range covered by a partition."""
+    return partition * SLOT_COUNT // partitions, (partition + 1) * SLOT_COUNT // partitions
+
+
+def slot_filter(owned: Iterable[int], partitions: int) -> Optional[dict]:
+    """Build the MongoDB filter selecting documents in the owned partitions.
+
+    Adjacent partitions are merged into one slot range.
+
+    Args:
+        owned: Partition numbers held by this replica.
+        partitions: Total number of partitions.
+
+    Returns:
+        None if every partition is owned (no filter needed), otherwise a
+        filter on the slot field.
+    """
+    ranges = []
+    for partition in sorted(owned):
+        start, end = partition_range(partition, partitions)
+        if ranges and ranges[-1][1] == start:
+            ranges[-1][1] = end
+        else:
+            ranges.append([start, end])
+    if ranges == [[0, SLOT_COUNT]]:
+        return None
+    if not ranges:
+        return {"slot": {"$in": []}}
+    clauses = [{"slot": {"$gte": start, "$lt": end}} for start, end in ranges]
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+
+def assign_partitions(members: Sequence[str], partitions: int) -> Dict[str, Set[int]]:
+    """Spread partitions over members by rendezvous hashing.
+
+    Each partition goes to the member with the highest hash of
+    (member, partition). Every member computes the same assignment from the
+    same member list, and a member joining or leaving only moves the
+    partitions it gains or loses.
+
+    Returns:
+        Dict of member id -> set of partition numbers.
+    """
+    assignment = {member: set() for member in members}
+    if not members:
+        return assignment
+    for partition in range(partitions):
+        owner = max(members, key=lambda member: _weight(member, partition))
+        assignment[owner].add(partition)
+    return assignment
+
+
+def _weight(member: str, partition: int) -> int:
+    digest = hashlib.blake2b(f"{member}:{partition}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+async def backfill_slots(db):
+    """Store the slot of schedules and queue rows created before partitioning.
+
+    Args:
+        db: Motor async MongoDB database instance.
+    """
+    for name in ("schedules", "queue_table"):
+        updates = [
+            UpdateOne({"_id": doc["_id"]}, {"$set": {"slot": slot_of(doc["task_name"])}})
+            async for doc in db[name].find({"slot": {"$exists": False}}, {"task_name": 1})
+        ]
+        if updates:
+            await db[name].bulk_write(updates, ordered=False)
+            print(f"[Partitions]: Backfilled the slot of {len(updates)} {name} documents")
+
+
+class PartitionLeases:
+    """Holds this replica's share of the scheduler partitions through Redis leases.
+
+    Every replica heartbeats into a shared member set, computes the same
+    rendezvous assignment of partitions to live members, and leases the
+    partitions assigned to it. A partition is only claimed once its previous
+    owner has released it or its lease expired, so two replicas never
+    schedule the same partition at once. Partitions rebalance within one
+    renew interval when a replica joins or leaves cleanly, and within
+    lease_seconds when one dies.
+    """
+
+    def __init__(self, redis_client, partitions: int = 16, lease_seconds: float = 15,
+                 member_id: str = None):
+        """Initialize the leases; nothing is owned until the first refresh().
+
+        Args:
+            redis_client: Async Redis client.
+            partitions: Number of partitions the slot space is split into.
+            lease_seconds: Lease length; leases are renewed every third of it.
+            member_id: Identifier of this replica (defaults to host:pid:random).
+        """
+        self.redis = redis_client
+        self.partitions = partitions
+        self.lease_ms = int(lease_seconds * 1000)
+        self.renew_interval = lease_seconds / 3
+        self.member_id = member_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_keys = [f"{LEASE_KEY_PREFIX}{p}" for p in range(partitions)]
+        self._join = redis_client.register_script(JOIN_SCRIPT)
+        self._claim = redis_client.register_script(CLAIM_SCRIPT)
+        self._owned = frozenset()
+        self._valid_until = 0.0
+
+    @property
+    def owned(self) -> frozenset:
+        """Partitions held by this replica, empty once the leases may have expired."""
+        if time.monotonic() >= self._valid_until:
+            return frozenset()
+        return self._owned
+
+    def owns(self, task_name: str) -> bool:
+        """Whether the task's schedule belongs to a partition this replica holds."""
+        owned = self.owned
+        if len(owned) == self.partitions:
+            return True
+        slot = slot_of(task_name)
+        return any(start <= slot < end
+                   for start, end in (partition_range(p, self.partitions) for p in owned))
+
+    def slot_filter(self) -> Optional[dict]:
+        """MongoDB filter for the documents of the owned partitions (see slot_filter)."""
+        return slot_filter(self.owned, self.partitions)
+
+    async def refresh(self) -> bool:
+        """Heartbeat, then claim/renew the assigned partitions and release the rest.
+
+        Returns:
+            True if the set of owned partitions changed.
+        """
+        started = time.monotonic()
+        members = [m.decode() if isinstance(m, bytes) else m for m in
+                   await self._join(keys=[MEMBERS_KEY], args=[self.member_id, self.lease_ms])]
+        wanted = assign_partitions(members, self.partitions).get(self.member_id, set())
+        held = await self._claim(
+            keys=self.lease_keys,
+            args=[self.member_id, self.lease_ms,
+                  *("1" if p in wanted else "0" for p in range(self.partitions))]
+        )
+        previous = self.owned
+        self._owned = frozenset(p for p, ok in enumerate(held) if int(ok))
+        self._valid_until = started + self.lease_ms / 1000
+        return self._owned != previous
+
+    async def leave(self):
+        """Release every lease and leave the member set, e.g. on shutdown."""
+        await self.redis.zrem(MEMBERS_KEY, self.member_id)
+        await self._claim(keys=self.lease_keys,
+                          args=[self.member_id, self.lease_ms, *("0" * self.partitions)])
+        self._owned = frozenset()
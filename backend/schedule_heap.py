@@ -0,0 +1,97 @@
+import heapq
+import itertools
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+
+def as_utc(dt: datetime) -> datetime:
+    """Return dt as a timezone-aware UTC datetime.
+
+    MongoDB hands back naive datetimes (stored as UTC), while the API works
+    with aware ones, so everything is normalized before comparing.
+    """
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+class NextRunHeap:
+    """In-memory min-heap of upcoming task deadlines.
+
+    Each task has at most one live entry. Updating or removing a task does not
+    touch the heap itself; the old entry is simply left behind and skipped when
+    it reaches the top (lazy invalidation), so every operation is O(log n).
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[datetime, int, str]] = []
+        self._entries: Dict[str, Tuple[datetime, int, int]] = {}
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, task_name: str) -> bool:
+        return task_name in self._entries
+
+    def push(self, task_name: str, due_at: datetime, priority: int = 3):
+        """Add a task, or move it if it is already tracked.
+
+        Args:
+            task_name: Name of the task.
+            due_at: When the task should be dispatched.
+            priority: Task priority, handed back by pop_due().
+        """
+        due_at = as_utc(due_at)
+        seq = next(self._counter)
+        self._entries[task_name] = (due_at, seq, priority)
+        heapq.heappush(self._heap, (due_at, seq, task_name))
+
+    def remove(self, task_name: str):
+        """Stop tracking a task. Unknown names are ignored."""
+        self._entries.pop(task_name, None)
+
+    def clear(self):
+        """Drop every entry."""
+        self._heap.clear()
+        self._entries.clear()
+
+    def _discard_stale(self):
+        """Pop invalidated entries off the top of the heap."""
+        while self._heap:
+            due_at, seq, task_name = self._heap[0]
+            entry = self._entries.get(task_name)
+            if entry is not None and entry[1] == seq:
+                return
+            heapq.heappop(self._heap)
+
+    def peek(self) -> Optional[datetime]:
+        """Return the earliest deadline, or None if the heap is empty."""
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime) -> List[dict]:
+        """Remove and return every task whose deadline is at or before now.
+
+        Args:
+            now: Current UTC time.
+
+        Returns:
+            List of dicts with task_name, priority and next_run, earliest first.
+        """
+        now = as_utc(now)
+        due = []
+        while True:
+            self._discard_stale()
+            if not self._heap or self._heap[0][0] > now:
+                return due
+            due_at, _, task_name = heapq.heappop(self._heap)
+            _, _, priority = self._entries.pop(task_name)
+            due.append({"task_name": task_name, "priority": priority, "next_run": due_at})
+
+    def seconds_until_next(self, now: datetime) -> Optional[float]:
+        """Seconds from now until the earliest deadline (0 if already due)."""
+        earliest = self.peek()
+        if earliest is None:
+            return None
+        return max(0.0, (earliest - as_utc(now)).total_seconds())
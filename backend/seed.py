@@ -1,23 +1,81 @@
-from pymongo import MongoClient
+import random
+import sys
 from datetime import datetime, timedelta, timezone
-from croniter import croniter
+
+from pymongo import MongoClient
+
+from cron_cache import next_fire_times
+from models import TaskInput
+from partitions import slot_of
 
 # --- CONFIGURATION ---
 MONGO_URI = "mongodb://localhost:27017"
 DB_NAME = "tasks_db"
 COLLECTION_NAME = "schedules"
 NUM_TASKS_TO_CREATE = 100
+TASK_NAME_PREFIX = "Load Test Task "
+INSERT_BATCH = 10_000
 # ---------------------
 
-def seed_database():
+# (weight, cron factory) pairs. Most production schedules are hourly or
+# daily at an arbitrary minute; a minority run every few minutes, and those
+# are what every scheduler tick has to keep up with.
+CRON_MIX = [
+    (10, lambda rng: "* * * * *"),
+    (20, lambda rng: "*/5 * * * *"),
+    (15, lambda rng: "*/15 * * * *"),
+    (25, lambda rng: f"{rng.randrange(60)} * * * *"),
+    (20, lambda rng: f"{rng.randrange(60)} {rng.randrange(24)} * * *"),
+    (5, lambda rng: f"{rng.randrange(60)} 9-17 * * 1-5"),
+    (5, lambda rng: f"{rng.randrange(60)} {rng.randrange(24)} * * 0"),
+]
+
+# Share of schedules per priority (1 = highest).
+PRIORITY_MIX = {1: 10, 2: 30, 3: 60}
+
+
+def generate_tasks(count: int, seed: int = 0, now: datetime = None):
+    """Yield load-test task definitions in the POST /tasks body format.
+
+    Args:
+        count: Number of tasks.
+        seed: Seed of the random cron and priority draws, so runs with the
+            same seed schedule the same work.
+        now: Reference time of the start/end window (defaults to now).
+
+    Yields:
+        Task dicts named TASK_NAME_PREFIX + 1..count, active from a day ago
+        for 30 days. Generated lazily, so a million of them need not be held
+        in memory at once.
+    """
+    rng = random.Random(seed)
+    now = now or datetime.now(timezone.utc)
+    cron_weights = [weight for weight, _ in CRON_MIX]
+    priorities = list(PRIORITY_MIX)
+    priority_weights = list(PRIORITY_MIX.values())
+
+    for i in range(count):
+        make_cron = rng.choices(CRON_MIX, cron_weights)[0][1]
+        yield {
+            "task_name": f"{TASK_NAME_PREFIX}{i + 1}",
+            "cron": make_cron(rng),
+            "start_date": now - timedelta(days=1),
+            "end_date": now + timedelta(days=30),
+            "priority": rng.choices(priorities, priority_weights)[0],
+            "max_retries": 3,
+            "task_config": {"operator_path": "operators/example_operator.py"},
+        }
+
+
+def seed_database(count: int = NUM_TASKS_TO_CREATE):
     """Populate MongoDB with test tasks for load testing.
 
-    Creates NUM_TASKS_TO_CREATE tasks with cron schedule '*/1 * * * *',
-    rotating priorities, and a 1-day active window. Cleans up any previous
-    load test tasks before inserting.
+    Creates `count` tasks from generate_tasks() with their first run,
+    partition slot and PENDING state filled in, as the API would store them.
+    Cleans up any previous load test tasks before inserting.
     """
     print("🌱 Starting database seeding process...")
-    
+
     try:
         client = MongoClient(MONGO_URI)
         db = client[DB_NAME]
@@ -27,43 +85,24 @@ def seed_database():
         return
 
     now = datetime.now(timezone.utc)
-    start_date = now - timedelta(minutes=1) 
-    end_date = now + timedelta(days=1)
-    cron_string = "*/1 * * * *"
-    
-    tasks_to_insert = []
-    
-    for i in range(NUM_TASKS_TO_CREATE):
-        task_name = f"Load Test Task {i + 1}"
-
-        task_priority = (i % 5) + 1
-
-        
-        try:
-            first_run = croniter(cron_string, now).get_next(datetime)
-        except Exception as e:
-            print(f"Error calculating cron: {e}")
-            continue
-            
-        task_doc = {
-            "task_name": task_name,
-            "cron": cron_string,
-            "start_date": start_date,
-            "end_date": end_date,
-            "next_run": first_run,
-            "priority": task_priority
-            # --- THIS INCONSISTENT LINE IS NOW REMOVED ---
-            # "schedule_status": "active"
-        }
-        tasks_to_insert.append(task_doc)
+    tasks_to_insert = [TaskInput.model_validate(task).model_dump() for task in generate_tasks(count, now=now)]
+    first_runs = next_fire_times([(task["cron"], now) for task in tasks_to_insert])
+    for task_doc, (first_run,) in zip(tasks_to_insert, first_runs):
+        task_doc["next_run"] = first_run
+        task_doc["state"] = "PENDING"
+        task_doc["slot"] = slot_of(task_doc["task_name"])
+        task_doc["created_at"] = task_doc["updated_at"] = now
 
     print(f"📝 Created {len(tasks_to_insert)} task documents. Inserting into MongoDB...")
 
     try:
-        collection.delete_many({"name": {"$regex": "Load Test Task"}})
-        result = collection.insert_many(tasks_to_insert)
-        
-        print(f"✅ Success! Inserted {len(result.inserted_ids)} tasks.")
+        collection.delete_many({"task_name": {"$regex": f"^{TASK_NAME_PREFIX}"}})
+        inserted = 0
+        for start in range(0, len(tasks_to_insert), INSERT_BATCH):
+            result = collection.insert_many(tasks_to_insert[start:start + INSERT_BATCH])
+            inserted += len(result.inserted_ids)
+
+        print(f"✅ Success! Inserted {inserted} tasks.")
     except Exception as e:
         print(f"❌ ERROR: Could not insert tasks into MongoDB. \n{e}")
     finally:
@@ -71,4 +110,4 @@ def seed_database():
         print("🌱 Seeding complete. Connection closed.")
 
 if __name__ == "__main__":
-    seed_database()
\ No newline at end of file
+    seed_database(int(sys.argv[1]) if len(sys.argv) > 1 else NUM_TASKS_TO_CREATE)
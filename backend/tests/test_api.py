@@ -20,6 +20,7 @@ def mongo_db():
     # Cleanup: delete anything inserted by test cases starting with 'test_'
     db.schedules.delete_many({"task_name": {"$regex": "^test_"}})
     db.queue_table.delete_many({"task_name": {"$regex": "^test_"}})
+    db.task_attempts.delete_many({"task_name": {"$regex": "^test_"}})
     client.close()
 
 @pytest.fixture(scope="session")
@@ -101,6 +102,99 @@ class TestAPI:
         task_names = [t.get("task_name") for t in tasks]
         assert "test_api_fetch_1" in task_names
 
+    def test_get_tasks_paginated(self, test_client, mongo_db):
+        now = datetime.now(timezone.utc)
+        mongo_db.schedules.insert_many([{
+            "task_name": f"test_api_page_{i}",
+            "priority": 2,
+            "cron": "*/5 * * * *",
+            "start_date": now,
+            "end_date": now + timedelta(days=1),
+            "execution_history": []
+        } for i in range(5)])
+
+        # Walk the pages via the X-Next-Cursor header
+        seen = []
+        params = {"limit": 2, "priority": 2}
+        while True:
+            response = test_client.get("/tasks", params=params)
+            assert response.status_code == 200
+            page = response.json()
+            assert len(page) <= 2
+            seen.extend(t["task_name"] for t in page)
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+            params["cursor"] = cursor
+
+        page_names = [n for n in seen if n.startswith("test_api_page_")]
+        assert page_names == [f"test_api_page_{i}" for i in reversed(range(5))]
+
+        # Summaries do not carry the heavy fields
+        first = test_client.get("/tasks", params={"limit": 1}).json()[0]
+        assert "execution_history" not in first
+        assert "task_config" not in first
+
+    def test_get_tasks_invalid_cursor(self, test_client):
+        response = test_client.get("/tasks", params={"cursor": "not-an-object-id"})
+        assert response.status_code == 400
+
+    def test_get_task_detail(self, test_client, mongo_db):
+        now = datetime.now(timezone.utc)
+        mongo_db.schedules.insert_one({
+            "task_name": "test_api_detail_1",
+            "priority": 1,
+            "cron": "*/5 * * * *",
+            "start_date": now,
+            "end_date": now + timedelta(days=1),
+            "timeout_seconds": 60
+        })
+
+        response = test_client.get("/tasks/test_api_detail_1")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["cron"] == "*/5 * * * *"
+        assert data["execution_history"] == []
+
+        assert test_client.get("/tasks/test_api_missing").status_code == 404
+
+    def test_get_exhausted_task_detail(self, test_client, mongo_db):
+        now = datetime.now(timezone.utc)
+        mongo_db.schedules.insert_one({
+            "task_name": "test_api_detail_exhausted",
+            "priority": 1,
+            "cron": "*/5 * * * *",
+            "start_date": now,
+            "end_date": now + timedelta(days=1),
+            "state": "EXHAUSTED",
+            "max_retries": 0,
+            "num_of_retries": 1
+        })
+
+        response = test_client.get("/tasks/test_api_detail_exhausted")
+        assert response.status_code == 200
+        assert response.json()["num_of_retries"] == 1
+
+    def test_get_task_history_paginated(self, test_client, mongo_db):
+        base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        mongo_db.task_attempts.insert_many([{
+            "task_name": "test_api_history_1",
+            "attempt_number": i + 1,
+            "started_at": base + timedelta(minutes=i),
+            "ended_at": base + timedelta(minutes=i, seconds=5),
+            "state": "COMPLETED",
+            "fail_reason": None
+        } for i in range(3)])
+
+        response = test_client.get("/tasks/test_api_history_1/history", params={"limit": 2})
+        assert response.status_code == 200
+        assert [a["attempt_number"] for a in response.json()] == [3, 2]
+
+        cursor = response.headers["X-Next-Cursor"]
+        response = test_client.get("/tasks/test_api_history_1/history", params={"limit": 2, "before": cursor})
+        assert [a["attempt_number"] for a in response.json()] == [1]
+        assert "X-Next-Cursor" not in response.headers
+
     def test_cancel_task(self, test_client, redis_client):
         # Fire cancel endpoint
         response = test_client.post("/tasks/test_custom_cancel_command/cancel")
@@ -144,6 +238,186 @@ class TestAPI:
         assert response.status_code == 400
         assert "First run time is after the end date" in response.json()["detail"]
 
+    def test_create_checks_operator_registry(self, test_client, redis_client):
+        redis_client.hset("operator_registry", "operators/test_registered_operator.py",
+                          '{"valid": true, "reason": null, "class_name": "Op", "sha256": "x"}')
+        now = datetime.now(timezone.utc)
+
+        def create(task_name, operator_path):
+            return test_client.post("/tasks", json={
+                "task_name": task_name,
+                "cron": "*/5 * * * *",
+                "start_date": now.isoformat(),
+                "end_date": (now + timedelta(days=1)).isoformat(),
+                "task_config": {"operator_path": operator_path},
+            })
+
+        try:
+            unknown = create("test_api_unknown_operator", "operators/test_missing_operator.py")
+            known = create("test_api_known_operator", "worker/operators/test_registered_operator.py")
+        finally:
+            redis_client.hdel("operator_registry", "operators/test_registered_operator.py")
+
+        assert unknown.status_code == 400
+        assert "Unknown operator_path" in unknown.json()["detail"]
+        assert known.status_code == 200
+
+    def test_create_with_retry_backoff(self, test_client, mongo_db):
+        now = datetime.now(timezone.utc)
+
+        def create(task_name, retry_backoff):
+            return test_client.post("/tasks", json={
+                "task_name": task_name,
+                "cron": "*/5 * * * *",
+                "start_date": now.isoformat(),
+                "end_date": (now + timedelta(days=1)).isoformat(),
+                "retry_backoff": retry_backoff,
+            })
+
+        valid = create("test_api_backoff", {"base_seconds": 5, "factor": 3, "max_seconds": 600, "jitter": 1})
+        invalid = create("test_api_bad_backoff", {"base_seconds": 600, "max_seconds": 60})
+
+        assert valid.status_code == 200
+        doc = mongo_db.schedules.find_one({"task_name": "test_api_backoff"})
+        assert doc["retry_backoff"] == {"base_seconds": 5, "factor": 3, "max_seconds": 600, "jitter": 1}
+        assert invalid.status_code == 422
+
+    def test_pause_drops_pending_retry(self, test_client, redis_client):
+        now = datetime.now(timezone.utc)
+        test_client.post("/tasks", json={
+            "task_name": "test_api_paused_retry",
+            "cron": "*/5 * * * *",
+            "start_date": now.isoformat(),
+            "end_date": (now + timedelta(days=1)).isoformat(),
+        })
+        # Due in an hour, so the retry loop leaves it alone
+        redis_client.zadd("retry_queue", {"test_api_paused_retry": now.timestamp() * 1000 + 3_600_000})
+        redis_client.hset("retry_queue:priority", "test_api_paused_retry", 3)
+
+        response = test_client.post("/tasks/test_api_paused_retry/pause")
+
+        assert response.status_code == 200
+        assert redis_client.zscore("retry_queue", "test_api_paused_retry") is None
+        assert not redis_client.hexists("retry_queue:priority", "test_api_paused_retry")
+
+    # --- Tests for the bulk endpoints ---
+
+    def test_bulk_create_reports_errors_per_item(self, test_client, mongo_db):
+        now = datetime.now(timezone.utc)
+        window = {"start_date": now.isoformat(), "end_date": (now + timedelta(days=1)).isoformat()}
+        items = [
+            {"task_name": f"test_bulk_{i}", "cron": "*/5 * * * *", "priority": i % 3 + 1, **window}
+            for i in range(20)
+        ]
+        items += [
+            {"task_name": "test_bulk_3", "cron": "*/5 * * * *", **window},  # duplicate
+            {"task_name": "test_bulk_bad_cron", "cron": "not a cron", **window},
+            {"task_name": "test_bulk_never", "cron": "0 0 1 1 *", **window},
+        ]
+
+        response = test_client.post("/bulk/tasks", json=items)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 20
+        assert [error["index"] for error in data["errors"]] == [20, 21, 22]
+        assert "already exists" in data["errors"][0]["detail"]
+        assert mongo_db.schedules.count_documents({"task_name": {"$regex": "^test_bulk_"}}) == 20
+        doc = mongo_db.schedules.find_one({"task_name": "test_bulk_7"})
+        assert doc["state"] == "PENDING" and doc["next_run"] is not None
+
+    def test_bulk_lifecycle_by_filter(self, test_client, mongo_db, redis_client):
+        now = datetime.now(timezone.utc)
+        window = {"start_date": now.isoformat(), "end_date": (now + timedelta(days=1)).isoformat()}
+        test_client.post("/bulk/tasks", json=[
+            {"task_name": f"test_lifecycle_{i}", "cron": "*/5 * * * *", "priority": i % 3 + 1, **window}
+            for i in range(9)
+        ])
+        names = [f"test_lifecycle_{i}" for i in range(9)]
+
+        # An empty filter would act on every task
+        assert test_client.post("/bulk/tasks/pause", json={}).status_code == 422
+
+        paused = test_client.post("/bulk/tasks/pause", json={"name_prefix": "test_lifecycle_", "priority": 1})
+        assert paused.json()["count"] == 3
+        assert mongo_db.schedules.count_documents({"task_name": {"$in": names}, "state": "PAUSED"}) == 3
+
+        try:
+            run = test_client.post("/bulk/tasks/run", json={"name_prefix": "test_lifecycle_"})
+            assert run.json()["count"] == 6
+            assert all(redis_client.zscore("dispatch_queue", n) is not None
+                       for n in names if int(n.rsplit("_", 1)[1]) % 3)
+        finally:
+            redis_client.zrem("dispatch_queue", *names)
+
+        resumed = test_client.post("/bulk/tasks/resume", json={"task_names": names})
+        assert resumed.json()["count"] == 3
+        assert mongo_db.schedules.count_documents({"task_name": {"$in": names}, "state": "PAUSED"}) == 0
+
+        deleted = test_client.post("/bulk/tasks/delete", json={"name_prefix": "test_lifecycle_"})
+        assert deleted.json()["count"] == 9
+        assert mongo_db.schedules.count_documents({"task_name": {"$in": names}}) == 0
+
+    def test_task_named_bulk_keeps_its_own_routes(self, test_client, mongo_db):
+        mongo_db.schedules.insert_one({"task_name": "bulk", "state": "PENDING"})
+        try:
+            response = test_client.post("/tasks/bulk/pause")
+            assert response.status_code == 200
+            assert mongo_db.schedules.find_one({"task_name": "bulk"})["state"] == "PAUSED"
+        finally:
+            mongo_db.schedules.delete_one({"task_name": "bulk"})
+            mongo_db.queue_table.delete_one({"task_name": "bulk"})
+
+    def test_task_named_events_keeps_its_detail_route(self, test_client, mongo_db):
+        now = datetime.now(timezone.utc)
+        mongo_db.schedules.insert_one({
+            "task_name": "events", "priority": 1, "cron": "*/5 * * * *",
+            "start_date": now, "end_date": now + timedelta(days=1)
+        })
+        try:
+            response = test_client.get("/tasks/events")
+            assert response.status_code == 200
+            assert response.json()["task_name"] == "events"
+        finally:
+            mongo_db.schedules.delete_one({"task_name": "events"})
+
+    def test_adhoc_queue_rows_match_scheduled_rows(self, test_client, mongo_db, redis_client):
+        from manager import QUEUE_FIELDS
+        now = datetime.now(timezone.utc)
+        test_client.post("/bulk/tasks", json=[{
+            "task_name": "test_adhoc_row", "cron": "*/5 * * * *",
+            "start_date": now.isoformat(), "end_date": (now + timedelta(days=1)).isoformat(),
+        }])
+        mongo_db.schedules.update_one({"task_name": "test_adhoc_row"},
+                                      {"$set": {"execution_history": [{"state": "COMPLETED"}]}})
+        try:
+            assert test_client.post("/bulk/tasks/run", json={"task_names": ["test_adhoc_row"]}).json()["count"] == 1
+        finally:
+            redis_client.zrem("dispatch_queue", "test_adhoc_row")
+            redis_client.hdel("dispatch_queue:payload", "test_adhoc_row")
+
+        row = mongo_db.queue_table.find_one({"task_name": "test_adhoc_row"}, {"_id": 0})
+        assert set(row) <= {*QUEUE_FIELDS, "state", "num_of_retries", "retry_after"}
+        assert row["state"] == "PENDING" and row["num_of_retries"] == 0
+        mongo_db.schedules.delete_one({"task_name": "test_adhoc_row"})
+
+    # --- Tests for GET /metrics ---
+
+    def test_metrics_exposes_queue_depth_and_latencies(self, test_client, redis_client):
+        redis_client.zadd("dispatch_queue", {"test_metrics_queued": 3e13})
+        try:
+            response = test_client.get("/metrics")
+        finally:
+            redis_client.zrem("dispatch_queue", "test_metrics_queued")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        depth = [line for line in response.text.splitlines()
+                 if line.startswith('scheduler_queue_depth{queue="dispatch"}')]
+        assert depth and float(depth[0].split()[-1]) >= 1
+        assert "redis_command_seconds_count" in response.text
+        assert "mongo_command_seconds_count" in response.text
+
     # --- Tests for GET /tasks/queue ---
 
     def test_get_empty_queue(self, test_client, mongo_db):
@@ -185,6 +459,60 @@ class TestAPI:
         doc = mongo_db.schedules.find_one({"_id": result.inserted_id})
         assert doc is None
 
+    def test_deleted_task_is_never_admitted_again(self, test_client, mongo_db):
+        import main
+        names = ["test_orphan_single", "test_orphan_bulk"]
+        for name in names:
+            mongo_db.schedules.insert_one({"task_name": name, "priority": 1, "state": "PENDING"})
+            mongo_db.queue_table.insert_one({"task_name": name, "priority": 1, "state": "PENDING"})
+        single = mongo_db.schedules.find_one({"task_name": "test_orphan_single"})
+
+        assert test_client.delete(f"/tasks/{single['_id']}").status_code == 200
+        assert test_client.post("/bulk/tasks/delete", json={"task_names": ["test_orphan_bulk"]}).json()["count"] == 1
+
+        assert mongo_db.queue_table.count_documents({"task_name": {"$in": names}}) == 0
+        admitted = test_client.portal.call(main.task_manager.fun_queue_manager, [])
+        assert not {task["task_name"] for task in admitted} & set(names)
+
+    def test_resume_queues_only_the_firing_the_pause_skipped(self, test_client, mongo_db, redis_client):
+        import main
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        ran, skipped = now - timedelta(minutes=5), now + timedelta(hours=1)
+        # test_resume_ran: its last firing completed and was rescheduled to
+        # `skipped` before the pause. test_resume_skipped: its firing was still
+        # queued when paused, so the worker skipped it and next_run is unchanged.
+        for name, next_run, marker in [("test_resume_ran", skipped, ran), ("test_resume_skipped", skipped, skipped)]:
+            mongo_db.schedules.insert_one({"task_name": name, "priority": 1, "state": "PAUSED", "next_run": next_run})
+            mongo_db.queue_table.insert_one({"task_name": name, "priority": 1, "state": "PAUSED", "next_run": marker})
+            redis_client.set(f"dispatched:{name}", marker.isoformat())
+
+        assert test_client.post("/tasks/test_resume_ran/resume").status_code == 200
+        assert test_client.post("/bulk/tasks/resume", json={"task_names": ["test_resume_skipped"]}).json()["count"] == 1
+
+        assert redis_client.get("dispatched:test_resume_ran") == ran.isoformat().encode()
+        assert redis_client.get("dispatched:test_resume_skipped") is None
+        assert mongo_db.queue_table.count_documents({"task_name": {"$regex": "^test_resume_"}, "state": "PAUSED"}) == 2
+        admitted = test_client.portal.call(main.task_manager.fun_queue_manager, [])
+        assert not [task for task in admitted if task["task_name"].startswith("test_resume_")]
+        redis_client.delete("dispatched:test_resume_ran")
+
+    def test_sweep_reschedules_a_lost_reschedule_request(self, test_client, mongo_db):
+        import main
+        from partitions import slot_of
+        now = datetime.now(timezone.utc)
+        mongo_db.schedules.insert_one({
+            "task_name": "test_lost_reschedule", "slot": slot_of("test_lost_reschedule"),
+            "cron": "*/5 * * * *", "priority": 2, "state": "COMPLETED",
+            "start_date": now - timedelta(days=1), "end_date": now + timedelta(days=1),
+            "next_run": now - timedelta(hours=2), "num_of_retries": 0,
+        })
+
+        assert test_client.portal.call(main.task_manager.sweep_unrescheduled) >= 1
+
+        doc = mongo_db.schedules.find_one({"task_name": "test_lost_reschedule"})
+        assert doc["state"] == "PENDING"
+        assert doc["next_run"].replace(tzinfo=timezone.utc) > now - timedelta(minutes=5)
+
     def test_delete_non_existent_task(self, test_client):
         # Valid ObjectId format, but doesn't exist
         dummy_id = "507f1f77bcf86cd799439011"
@@ -0,0 +1,81 @@
+import sys
+import os
+import random
+import pytest
+from datetime import datetime, timezone, timedelta
+from croniter import croniter
+
+# Ensure we can import from backend root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import cron_cache
+
+
+EXPRESSIONS = [
+    "*/1 * * * *",
+    "*/5 * * * *",
+    "0 2 * * *",
+    "30 9 * * 1-5",
+    "0 0 1,15 * 5",        # day-of-month OR day-of-week
+    "15,45 */3 1-10 1,6,12 0,6",
+    "0 0 29 2 *",          # leap days only
+    "0 0 31 * *",
+    "0 0 L * *",           # croniter fallback
+    "0 0 * * 5#2",         # croniter fallback
+]
+
+
+class TestCronCache:
+
+    @pytest.mark.parametrize("expr", EXPRESSIONS)
+    def test_batched_results_match_croniter(self, expr):
+        random.seed(expr)
+        base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        items = [(expr, base + timedelta(seconds=random.randint(-10**8, 10**8))) for _ in range(200)]
+
+        results = cron_cache.next_fire_times(items, k=3)
+
+        for (_, after), fires in zip(items, results):
+            iterator = croniter(expr, after)
+            assert fires == [iterator.get_next(datetime) for _ in range(3)]
+
+    def test_results_keep_input_order_across_groups(self):
+        now = datetime(2026, 3, 22, 10, 7, 30, tzinfo=timezone.utc)
+        items = [("0 * * * *", now), ("*/5 * * * *", now), ("0 * * * *", now + timedelta(hours=1))]
+
+        results = cron_cache.next_fire_times(items)
+
+        assert results == [
+            [datetime(2026, 3, 22, 11, 0, tzinfo=timezone.utc)],
+            [datetime(2026, 3, 22, 10, 10, tzinfo=timezone.utc)],
+            [datetime(2026, 3, 22, 12, 0, tzinfo=timezone.utc)],
+        ]
+
+    def test_next_fire_is_strictly_after(self):
+        on_the_minute = datetime(2026, 3, 22, 10, 5, tzinfo=timezone.utc)
+        assert cron_cache.next_fire("*/5 * * * *", on_the_minute) == on_the_minute + timedelta(minutes=5)
+
+    def test_naive_datetimes_are_treated_as_utc(self):
+        naive = datetime(2026, 3, 22, 10, 7)
+        assert cron_cache.next_fire("*/5 * * * *", naive) == datetime(2026, 3, 22, 10, 10, tzinfo=timezone.utc)
+
+    def test_compiled_expressions_are_shared(self):
+        assert cron_cache.compile_cron("*/5 * * * *") is cron_cache.compile_cron("*/5 * * * *")
+
+    def test_invalid_expression(self):
+        assert not cron_cache.is_valid_cron("invalid_cron_string_here")
+        with pytest.raises(ValueError):
+            cron_cache.compile_cron("invalid_cron_string_here")
+
+    @pytest.mark.parametrize("expr", EXPRESSIONS)
+    def test_prev_array_matches_croniter(self, expr):
+        random.seed(expr)
+        base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        befores = [base + timedelta(seconds=random.randint(-10**8, 10**8)) for _ in range(200)]
+
+        table = cron_cache.compile_cron(expr).prev_array(cron_cache.to_datetime64(befores), 3)
+
+        for before, row in zip(befores, table):
+            iterator = croniter(expr, before)
+            expected = [iterator.get_prev(datetime) for _ in range(3)][::-1]
+            assert cron_cache.from_datetime64(row) == expected
@@ -0,0 +1,61 @@
+import sys
+import os
+from datetime import datetime, timezone
+
+from bson import ObjectId
+
+# Ensure we can import from backend root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models import OverlapPolicy, TaskInRedis, TaskState
+from manager import dispatch_payload
+
+
+def queue_row(**fields):
+    row = {
+        "_id": ObjectId(),
+        "task_name": "test_payload",
+        "priority": 1,
+        "cron": "*/5 * * * *",
+        "next_run": datetime(2026, 1, 1, 12, 0),
+        "state": "PENDING",
+        "num_of_retries": 0,
+        "max_retries": 3,
+        "timeout_seconds": 120,
+        "task_config": {"operator_path": "operators/example_operator.py", "payload": {"n": 1}},
+        "overlap_policy": "queue",
+        "retry_backoff": {"base_seconds": 10, "factor": 2, "max_seconds": 60, "jitter": 0},
+    }
+    row.update(fields)
+    return row
+
+
+class TestDispatchPayload:
+
+    def test_queue_row_round_trips_through_redis(self):
+        row = queue_row(num_of_retries=1)
+
+        task = TaskInRedis.deserialize_from_redis(dispatch_payload(row))
+
+        assert task.id == str(row["_id"])
+        assert task.next_run == datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+        assert task.state == TaskState.PENDING
+        assert task.attempt_number == 2
+        assert task.overlap_policy == OverlapPolicy.QUEUE
+        assert task.retry_backoff.base_seconds == 10
+        assert task.task_config == row["task_config"]
+
+    def test_optional_fields_may_be_missing(self):
+        row = queue_row()
+        del row["overlap_policy"], row["retry_backoff"], row["num_of_retries"]
+
+        task = TaskInRedis.deserialize_from_redis(dispatch_payload(row))
+
+        assert task.overlap_policy is None
+        assert task.attempt_number == 1
+
+    def test_row_without_cron_is_queued_without_payload(self):
+        row = queue_row()
+        del row["cron"]
+
+        assert dispatch_payload(row) == ""
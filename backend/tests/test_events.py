@@ -0,0 +1,49 @@
+import sys
+import os
+import json
+from datetime import datetime, timezone
+
+# Ensure we can import from backend root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from events import TaskEventBroadcaster, encode_task_event, encode_delete_event
+
+
+class TestEncoding:
+
+    def test_update_event_carries_only_changed_fields(self):
+        next_run = datetime(2026, 3, 22, 10, 8, tzinfo=timezone.utc)
+        event = json.loads(encode_task_event("t1", state="PENDING", next_run=next_run))
+        assert event == {
+            "type": "update",
+            "task_name": "t1",
+            "fields": {"state": "PENDING", "next_run": "2026-03-22T10:08:00+00:00"},
+        }
+
+    def test_delete_event(self):
+        assert json.loads(encode_delete_event("t1")) == {"type": "delete", "task_name": "t1"}
+
+
+class TestBroadcaster:
+
+    def test_fans_out_to_every_subscriber(self):
+        broadcaster = TaskEventBroadcaster(redis_client=None)
+        first, second = broadcaster.subscribe(), broadcaster.subscribe()
+        broadcaster.broadcast("payload")
+        assert first.get_nowait() == "payload"
+        assert second.get_nowait() == "payload"
+
+    def test_unsubscribed_queue_receives_nothing(self):
+        broadcaster = TaskEventBroadcaster(redis_client=None)
+        queue = broadcaster.subscribe()
+        broadcaster.unsubscribe(queue)
+        broadcaster.broadcast("payload")
+        assert queue.empty()
+
+    def test_slow_subscriber_is_told_to_resync(self):
+        broadcaster = TaskEventBroadcaster(redis_client=None, max_pending=2)
+        slow = broadcaster.subscribe()
+        for i in range(3):
+            broadcaster.broadcast(f"event-{i}")
+        assert json.loads(slow.get_nowait()) == {"type": "resync"}
+        assert slow.empty()
@@ -0,0 +1,74 @@
+import sys
+import os
+import asyncio
+from types import SimpleNamespace
+
+# Ensure we can import from backend root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from prometheus_client import REGISTRY
+from metrics import MongoLatencyListener, instrument_async_redis, instrument_redis
+
+
+def count(name, command):
+    return REGISTRY.get_sample_value(f"{name}_count", {"command": command}) or 0
+
+
+class StubRedis:
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    def execute_command(self, *args, **options):
+        if self.fail:
+            raise ConnectionError("down")
+        return args
+
+
+class StubAsyncRedis:
+    async def execute_command(self, *args, **options):
+        return args
+
+
+class TestMongoLatencyListener:
+
+    def test_started_and_finished_commands_are_paired(self):
+        listener = MongoLatencyListener()
+        before = count("mongo_command_seconds", "test_find")
+        first = SimpleNamespace(connection_id=("h", 1), request_id=1, command_name="test_find")
+        second = SimpleNamespace(connection_id=("h", 2), request_id=1, command_name="test_find")
+        listener.started(first)
+        listener.started(second)
+        listener.succeeded(second)
+        listener.failed(first)
+        assert count("mongo_command_seconds", "test_find") == before + 2
+        assert listener._started == {}
+
+    def test_unmatched_finish_is_ignored(self):
+        listener = MongoLatencyListener()
+        before = count("mongo_command_seconds", "test_orphan")
+        listener.succeeded(SimpleNamespace(connection_id=("h", 1), request_id=9, command_name="test_orphan"))
+        assert count("mongo_command_seconds", "test_orphan") == before
+
+
+class TestRedisInstrumentation:
+
+    def test_sync_commands_are_timed_by_name(self):
+        client = instrument_redis(StubRedis())
+        before = count("redis_command_seconds", "TEST_GET")
+        assert client.execute_command(b"test_get", "key") == (b"test_get", "key")
+        assert count("redis_command_seconds", "TEST_GET") == before + 1
+
+    def test_failed_commands_are_timed_too(self):
+        client = instrument_redis(StubRedis(fail=True))
+        before = count("redis_command_seconds", "TEST_SET")
+        try:
+            client.execute_command("test_set", "key", "value")
+        except ConnectionError:
+            pass
+        assert count("redis_command_seconds", "TEST_SET") == before + 1
+
+    def test_async_commands_are_timed(self):
+        client = instrument_async_redis(StubAsyncRedis())
+        before = count("redis_command_seconds", "TEST_ZCARD")
+        assert asyncio.run(client.execute_command("test_zcard", "q")) == ("test_zcard", "q")
+        assert count("redis_command_seconds", "TEST_ZCARD") == before + 1
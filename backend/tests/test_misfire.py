@@ -0,0 +1,60 @@
+import sys
+import os
+from datetime import datetime, timezone, timedelta
+
+# Ensure we can import from backend root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from misfire import plan_next_runs
+from models import MisfirePolicy
+
+
+NOW = datetime(2026, 3, 22, 10, 7, 30, tzinfo=timezone.utc)
+
+
+def schedule(next_run, policy=None, cron="*/1 * * * *"):
+    return {"cron": cron, "next_run": next_run, "misfire_policy": policy}
+
+
+class TestPlanNextRuns:
+
+    def test_on_time_run_moves_to_next_firing(self):
+        just_ran = datetime(2026, 3, 22, 10, 7, tzinfo=timezone.utc)
+        for policy in MisfirePolicy:
+            [next_run] = plan_next_runs([schedule(just_ran, policy)], NOW, MisfirePolicy.FIRE_ONCE, 3)
+            assert next_run == datetime(2026, 3, 22, 10, 8, tzinfo=timezone.utc)
+
+    def test_skip_drops_missed_firings(self):
+        ran_long_ago = NOW - timedelta(hours=2)
+        [next_run] = plan_next_runs([schedule(ran_long_ago, "skip")], NOW, MisfirePolicy.FIRE_ONCE, 3)
+        assert next_run == datetime(2026, 3, 22, 10, 8, tzinfo=timezone.utc)
+
+    def test_fire_once_replays_only_the_latest_missed_firing(self):
+        ran_long_ago = NOW - timedelta(hours=2)
+        [next_run] = plan_next_runs([schedule(ran_long_ago, "fire_once")], NOW, MisfirePolicy.SKIP, 3)
+        assert next_run == datetime(2026, 3, 22, 10, 7, tzinfo=timezone.utc)
+
+    def test_fire_all_is_bounded_by_max_catchup_runs(self):
+        ran_long_ago = NOW - timedelta(hours=2)
+        [next_run] = plan_next_runs([schedule(ran_long_ago, "fire_all")], NOW, MisfirePolicy.SKIP, 3)
+        # Only the last three missed firings (10:05, 10:06, 10:07) are replayed.
+        assert next_run == datetime(2026, 3, 22, 10, 5, tzinfo=timezone.utc)
+
+    def test_fire_all_replays_from_the_first_missed_firing(self):
+        ran = datetime(2026, 3, 22, 10, 5, tzinfo=timezone.utc)
+        [next_run] = plan_next_runs([schedule(ran, "fire_all")], NOW, MisfirePolicy.SKIP, 10)
+        assert next_run == datetime(2026, 3, 22, 10, 6, tzinfo=timezone.utc)
+
+    def test_default_policy_and_mixed_expressions(self):
+        ran_long_ago = NOW - timedelta(days=1)
+        docs = [
+            schedule(ran_long_ago),
+            schedule(ran_long_ago, cron="0 * * * *"),
+            {"cron": None, "next_run": ran_long_ago},
+        ]
+        results = plan_next_runs(docs, NOW, MisfirePolicy.SKIP, 3)
+        assert results == [
+            datetime(2026, 3, 22, 10, 8, tzinfo=timezone.utc),
+            datetime(2026, 3, 22, 11, 0, tzinfo=timezone.utc),
+            None,
+        ]
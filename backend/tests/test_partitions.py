@@ -0,0 +1,60 @@
+import sys
+import os
+
+# Ensure we can import from backend root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from partitions import SLOT_COUNT, assign_partitions, partition_range, slot_filter, slot_of
+
+
+class TestSlots:
+
+    def test_slot_is_stable_and_in_range(self):
+        assert slot_of("daily_sales_report") == slot_of("daily_sales_report")
+        assert all(0 <= slot_of(f"task_{i}") < SLOT_COUNT for i in range(1000))
+
+    def test_partitions_cover_every_slot_once(self):
+        for partitions in (1, 3, 16, 100):
+            covered = []
+            for p in range(partitions):
+                start, end = partition_range(p, partitions)
+                covered.extend(range(start, end))
+            assert covered == list(range(SLOT_COUNT))
+
+
+class TestSlotFilter:
+
+    def test_all_partitions_need_no_filter(self):
+        assert slot_filter(range(16), 16) is None
+
+    def test_adjacent_partitions_are_merged(self):
+        assert slot_filter([2, 0, 1], 16) == {"slot": {"$gte": 0, "$lt": 192}}
+
+    def test_separate_ranges(self):
+        assert slot_filter([0, 2], 16) == {"$or": [
+            {"slot": {"$gte": 0, "$lt": 64}},
+            {"slot": {"$gte": 128, "$lt": 192}},
+        ]}
+
+    def test_no_partitions_match_nothing(self):
+        assert slot_filter([], 16) == {"slot": {"$in": []}}
+
+
+class TestAssignment:
+
+    def test_every_partition_has_exactly_one_owner(self):
+        assignment = assign_partitions(["a", "b", "c"], 64)
+        owned = [p for partitions in assignment.values() for p in partitions]
+        assert sorted(owned) == list(range(64))
+        # Roughly even: nobody is left without work
+        assert all(len(partitions) > 5 for partitions in assignment.values())
+
+    def test_joining_member_only_takes_partitions(self):
+        before = assign_partitions(["a", "b", "c"], 64)
+        after = assign_partitions(["a", "b", "c", "d"], 64)
+        for member in ("a", "b", "c"):
+            assert after[member] <= before[member]
+        assert after["d"]
+
+    def test_assignment_does_not_depend_on_member_order(self):
+        assert assign_partitions(["a", "b", "c"], 16) == assign_partitions(["c", "a", "b"], 16)
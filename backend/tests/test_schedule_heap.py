@@ -0,0 +1,59 @@
+import sys
+import os
+from datetime import datetime, timezone, timedelta
+
+# Ensure we can import from backend root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from schedule_heap import NextRunHeap, as_utc
+
+
+class TestNextRunHeap:
+
+    def test_pop_due_returns_only_expired_entries_in_order(self):
+        now = datetime.now(timezone.utc)
+        heap = NextRunHeap()
+        heap.push("test_later", now + timedelta(minutes=5))
+        heap.push("test_second", now - timedelta(seconds=1), priority=1)
+        heap.push("test_first", now - timedelta(seconds=10), priority=2)
+
+        due = heap.pop_due(now)
+
+        assert [t["task_name"] for t in due] == ["test_first", "test_second"]
+        assert due[1]["priority"] == 1
+        assert len(heap) == 1
+        assert heap.peek() == now + timedelta(minutes=5)
+
+    def test_push_existing_task_moves_its_deadline(self):
+        now = datetime.now(timezone.utc)
+        heap = NextRunHeap()
+        heap.push("test_moved", now - timedelta(seconds=5))
+        heap.push("test_moved", now + timedelta(minutes=1))
+
+        assert heap.pop_due(now) == []
+        assert len(heap) == 1
+
+    def test_removed_task_is_never_returned(self):
+        now = datetime.now(timezone.utc)
+        heap = NextRunHeap()
+        heap.push("test_removed", now - timedelta(seconds=5))
+        heap.remove("test_removed")
+
+        assert "test_removed" not in heap
+        assert heap.pop_due(now) == []
+        assert heap.peek() is None
+
+    def test_seconds_until_next(self):
+        now = datetime.now(timezone.utc)
+        heap = NextRunHeap()
+        assert heap.seconds_until_next(now) is None
+
+        heap.push("test_wait", now + timedelta(seconds=30))
+        assert heap.seconds_until_next(now) == 30
+
+        heap.push("test_overdue", now - timedelta(seconds=30))
+        assert heap.seconds_until_next(now) == 0
+
+    def test_naive_datetimes_are_treated_as_utc(self):
+        naive = datetime(2026, 1, 1, 12, 0)
+        assert as_utc(naive) == datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
@@ -0,0 +1,35 @@
+import sys
+import os
+from collections import Counter
+from datetime import datetime, timezone
+
+# Ensure we can import from backend root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models import TaskInput
+from seed import TASK_NAME_PREFIX, generate_tasks
+
+
+NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+class TestGenerateTasks:
+
+    def test_tasks_are_valid_api_input(self):
+        for task in generate_tasks(500, now=NOW):
+            TaskInput.model_validate(task)
+
+    def test_same_seed_generates_the_same_schedules(self):
+        assert list(generate_tasks(200, seed=3, now=NOW)) == list(generate_tasks(200, seed=3, now=NOW))
+        assert list(generate_tasks(200, seed=3, now=NOW)) != list(generate_tasks(200, seed=4, now=NOW))
+
+    def test_names_are_unique_and_numbered(self):
+        names = [task["task_name"] for task in generate_tasks(1000, now=NOW)]
+        assert len(set(names)) == 1000
+        assert names[0] == f"{TASK_NAME_PREFIX}1"
+
+    def test_mix_covers_every_priority_and_several_crons(self):
+        tasks = list(generate_tasks(2000, now=NOW))
+        assert set(Counter(task["priority"] for task in tasks)) == {1, 2, 3}
+        assert "* * * * *" in {task["cron"] for task in tasks}
+        assert len({task["cron"] for task in tasks}) > 100
@@ -0,0 +1,118 @@
+import sys
+import os
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+# Ensure we can import from backend root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from tracing import (
+    JsonLinesSpanExporter, breakdown, context_from, record_span, setup_tracing, to_ns, traceparent_of, tracer,
+)
+from manager import finish_due_span, start_due_span
+
+
+@pytest.fixture
+def spans():
+    exporter = setup_tracing("test", "memory")
+    exporter.clear()
+    yield exporter
+    exporter.clear()
+
+
+def by_name(exporter):
+    return {span.name: span for span in exporter.get_finished_spans()}
+
+
+class TestPropagation:
+
+    def test_traceparent_round_trip_parents_the_next_span(self, spans):
+        with tracer.start_as_current_span("parent") as parent:
+            value = traceparent_of(parent)
+
+        with tracer.start_as_current_span("child", context=context_from(value)):
+            pass
+
+        finished = by_name(spans)
+        assert value.startswith("00-")
+        assert finished["child"].context.trace_id == finished["parent"].context.trace_id
+        assert finished["child"].parent.span_id == finished["parent"].context.span_id
+
+    def test_missing_traceparent_starts_a_new_trace(self):
+        assert context_from("") is None
+        assert context_from(None) is None
+
+    def test_record_span_keeps_given_times_and_clamps_skew(self, spans):
+        record_span("queue", 2_000, 5_000)
+        record_span("skewed", 9_000, 8_000)
+
+        finished = by_name(spans)
+        assert (finished["queue"].start_time, finished["queue"].end_time) == (2_000, 5_000)
+        assert finished["skewed"].end_time == finished["skewed"].start_time
+
+    def test_to_ns_accepts_datetimes_and_seconds(self):
+        assert to_ns(datetime(1970, 1, 1, 0, 0, 2, tzinfo=timezone.utc)) == 2_000_000_000
+        assert to_ns(datetime(1970, 1, 1, 0, 0, 2)) == 2_000_000_000
+        assert to_ns(1.5) == 1_500_000_000
+
+
+class TestDueSpans:
+
+    def test_firing_is_traced_from_next_run_with_a_span_per_stage(self, spans):
+        next_run = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        tick = to_ns(next_run + timedelta(seconds=1))
+        stages = [("scheduler.lookup", tick), ("scheduler.queue_manager", tick + 1_000),
+                  ("scheduler.admit", tick + 3_000)]
+
+        span = start_due_span({"task_name": "t", "priority": 1, "next_run": next_run}, tick)
+        finish_due_span(span, stages, tick + 4_000)
+
+        finished = by_name(spans)
+        root = finished["scheduler.due"]
+        assert root.start_time == to_ns(next_run)
+        assert root.end_time == tick + 4_000
+        assert root.attributes["task.name"] == "t"
+        assert [(finished[name].start_time, finished[name].end_time) for name, _ in stages] == [
+            (tick, tick + 1_000), (tick + 1_000, tick + 3_000), (tick + 3_000, tick + 4_000)
+        ]
+        assert all(finished[name].parent.span_id == root.context.span_id for name, _ in stages)
+
+    def test_unqueued_firing_is_not_exported(self, spans):
+        start_due_span({"task_name": "t", "next_run": None}, to_ns(1.0))
+        assert spans.get_finished_spans() == ()
+
+
+class TestExport:
+
+    def test_json_lines_exporter_appends_one_line_per_span(self, spans, tmp_path):
+        with tracer.start_as_current_span("root"):
+            record_span("stage", to_ns(1.0), to_ns(1.25))
+        path = tmp_path / "traces.jsonl"
+        exporter = JsonLinesSpanExporter(str(path))
+
+        exporter.export(spans.get_finished_spans())
+        exporter.export(spans.get_finished_spans())
+
+        lines = path.read_text().splitlines()
+        assert len(lines) == 4
+        assert {json.loads(line)["name"] for line in lines} == {"root", "stage"}
+
+    def test_breakdown_nests_stages_under_their_parent(self):
+        def span(span_id, name, start, end, parent=None):
+            return {"name": name, "context": {"trace_id": "0x1", "span_id": span_id},
+                    "parent_id": parent, "start_time": f"2026-01-01T00:00:{start}Z",
+                    "end_time": f"2026-01-01T00:00:{end}Z"}
+
+        rows = breakdown([
+            span("0xb", "worker.run", "01.000000", "03.000000", parent="0xa"),
+            span("0xa", "scheduler.due", "00.000000", "00.500000"),
+            span("0xc", "operator.run", "01.500000", "02.500000", parent="0xb"),
+        ])
+
+        assert rows == {"0x1": [
+            (0, "scheduler.due", 0.0, 500.0),
+            (1, "worker.run", 1000.0, 2000.0),
+            (2, "operator.run", 1500.0, 1000.0),
+        ]}
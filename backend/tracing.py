@@ -0,0 +1,231 @@
+"""
+Per-run traces, from the moment a task becomes due to its operator's exit.
+
+The scheduler opens a trace for every firing it queues: a "scheduler.due"
+span from next_run until the firing is on the dispatch queue, with the
+lookup, queue manager and admission stages as children. Its W3C traceparent
+is stored next to the queue, in the 'dispatch_queue:trace' hash, and claimed
+together with the task. The dispatcher (or Celery beat) records the time the
+task waited in the queue and passes the traceparent on with the Celery
+message; execute_operator_task records the hand-off, config lookup, run
+lock, spawn, operator run and result handling as children of the same
+trace. The operator process gets the traceparent of its run span in the
+TRACEPARENT environment variable, so it can add spans of its own. Retries
+keep the trace of the firing they belong to.
+
+Spans go to a local exporter, trace_exporter in config.json:
+    "none"    no spans are recorded and no trace context is queued (default)
+    "file"    JSON lines appended to trace_file, by the API and the worker
+    "memory"  kept in an InMemorySpanExporter, for tests and benchmarks
+
+Print the per-run latency breakdown of a trace file with:
+    python tracing.py ../traces.jsonl [task name]
+"""
+
+import json
+import os
+import sys
+import threading
+from datetime import datetime, timezone
+
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor, SimpleSpanProcessor, SpanExporter, SpanExportResult,
+)
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+
+# Trace context of each queued firing: task name -> traceparent.
+DISPATCH_TRACES = "dispatch_queue:trace"
+
+# Environment variable the operator process finds its run's traceparent in.
+TRACEPARENT_ENV = "TRACEPARENT"
+
+# Shared by the API and the worker so a run's spans end up in one file.
+DEFAULT_TRACE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "traces.jsonl")
+
+tracer = trace.get_tracer("task_scheduler")
+
+_propagator = TraceContextTextMapPropagator()
+_setup_lock = threading.Lock()
+_exporter = None
+
+
+class JsonLinesSpanExporter(SpanExporter):
+    """Appends finished spans to a file, one JSON object per line.
+
+    Each batch is a single O_APPEND write, so the API, the dispatcher and
+    every worker process can share the file without interleaving lines.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans) -> SpanExportResult:
+        data = "".join(span.to_json(indent=None) + "\n" for span in spans).encode("utf-8")
+        try:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, data)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            print(f"[Tracing] Could not write {len(spans)} spans to {self.path}: {e}")
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+
+def setup_tracing(service_name: str, exporter: str = "none", path: str = None):
+    """Install this process's tracer provider, once.
+
+    Args:
+        service_name: service.name of the spans ("scheduler", "worker", ...).
+        exporter: "none", "file" or "memory" (see the module docstring).
+        path: File of the "file" exporter; defaults to DEFAULT_TRACE_FILE.
+
+    Returns:
+        The span exporter in use (read spans back from an
+        InMemorySpanExporter), or None when tracing is off.
+    """
+    global _exporter
+    if exporter in (None, "none"):
+        return _exporter
+    with _setup_lock:
+        if _exporter is not None:
+            return _exporter
+        provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+        if exporter == "memory":
+            span_exporter = InMemorySpanExporter()
+            provider.add_span_processor(SimpleSpanProcessor(span_exporter))
+        elif exporter == "file":
+            span_exporter = JsonLinesSpanExporter(path or DEFAULT_TRACE_FILE)
+            provider.add_span_processor(BatchSpanProcessor(span_exporter))
+        else:
+            raise ValueError(f"Unknown trace_exporter '{exporter}'")
+        trace.set_tracer_provider(provider)
+        _exporter = span_exporter
+    print(f"[Tracing] Exporting {service_name} spans to {getattr(span_exporter, 'path', exporter)}")
+    return span_exporter
+
+
+def tracing_enabled() -> bool:
+    """Whether this process records spans (and so queues trace context)."""
+    return _exporter is not None
+
+
+def to_ns(value) -> int:
+    """Span timestamp (ns since the epoch) of a datetime or of epoch seconds."""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        value = value.timestamp()
+    return int(value * 1e9)
+
+
+def traceparent_of(span) -> str:
+    """W3C traceparent of a span, or "" if it is not recording."""
+    carrier = {}
+    _propagator.inject(carrier, context=trace.set_span_in_context(span))
+    return carrier.get("traceparent", "")
+
+
+def context_from(value):
+    """Context with the span a traceparent names as parent, or None without one."""
+    if not value:
+        return None
+    if isinstance(value, bytes):
+        value = value.decode("utf-8")
+    return _propagator.extract({"traceparent": value})
+
+
+def record_span(name: str, start_ns: int, end_ns: int, parent=None, attributes: dict = None):
+    """Record a span whose start and end are already known.
+
+    Used for stages measured between processes, such as the time a task
+    waited in the dispatch queue.
+
+    Args:
+        name: Span name.
+        start_ns: Start, ns since the epoch.
+        end_ns: End, ns since the epoch; clamped to start_ns across clock skew.
+        parent: Parent span or Context (defaults to the current span).
+        attributes: Span attributes.
+    """
+    if isinstance(parent, trace.Span):
+        parent = trace.set_span_in_context(parent)
+    span = tracer.start_span(name, context=parent, attributes=attributes, start_time=start_ns)
+    span.end(end_time=max(start_ns, end_ns))
+    return span
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def breakdown(spans):
+    """Stage timings of each trace in a list of exported span dicts.
+
+    Args:
+        spans: Spans as written by JsonLinesSpanExporter (span.to_json()).
+
+    Returns:
+        Dict of trace id -> list of (depth, name, offset ms, duration ms)
+        rows, in start order, offsets relative to the trace's first span.
+        A span whose parent is missing from the list is shown at depth 0.
+    """
+    traces = {}
+    for span in spans:
+        traces.setdefault(span["context"]["trace_id"], []).append(span)
+
+    result = {}
+    for trace_id, members in traces.items():
+        members.sort(key=lambda s: s["start_time"])
+        by_id = {s["context"]["span_id"]: s for s in members}
+        origin = _parse_time(members[0]["start_time"])
+        rows = []
+        for span in members:
+            depth, parent = 0, span.get("parent_id")
+            while parent in by_id and depth < 32:
+                depth += 1
+                parent = by_id[parent].get("parent_id")
+            start, end = _parse_time(span["start_time"]), _parse_time(span["end_time"])
+            rows.append((depth, span["name"], (start - origin).total_seconds() * 1000,
+                         (end - start).total_seconds() * 1000))
+        result[trace_id] = rows
+    return result
+
+
+def _task_name(spans) -> str:
+    for span in spans:
+        name = span.get("attributes", {}).get("task.name")
+        if name:
+            return name
+    return "?"
+
+
+def main(argv):
+    if not argv:
+        print("usage: python tracing.py TRACE_FILE [TASK_NAME]")
+        return 2
+    with open(argv[0], encoding="utf-8") as f:
+        spans = [json.loads(line) for line in f if line.strip()]
+    if len(argv) > 1:
+        wanted = {s["context"]["trace_id"] for s in spans
+                  if s.get("attributes", {}).get("task.name") == argv[1]}
+        spans = [s for s in spans if s["context"]["trace_id"] in wanted]
+
+    for trace_id, rows in breakdown(spans).items():
+        members = [s for s in spans if s["context"]["trace_id"] == trace_id]
+        print(f"{_task_name(members)}  trace {trace_id}")
+        for depth, name, offset_ms, duration_ms in rows:
+            print(f"  {'  ' * depth}{name:<{40 - 2 * depth}} +{offset_ms:>10.1f} ms {duration_ms:>10.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
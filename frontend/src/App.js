@@ -4,10 +4,13 @@ import { Play, Pause, Square, Activity, XCircle, Clock, CheckCircle, BarChart2 }
 import './App.css';
 
 const API_BASE = 'http://localhost:8000';
+const PAGE_SIZE = 100;
 
 function App() {
   const [activeTab, setActiveTab] = useState('pending');
   const [tasks, setTasks] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [message, setMessage] = useState('');
   
   const [name, setName] = useState('');
@@ -18,19 +21,60 @@ function App() {
   const [maxRetries, setMaxRetries] = useState(3);
   const [scriptCode, setScriptCode] = useState('class CustomOperator(BaseOperator):\n    def initialize(self):\n        pass\n\n    def run(self):\n        print("Running custom task")\n\n    def finish(self):\n        pass');
 
+  // Only the first page is loaded up front (and again after every reconnect);
+  // older pages are fetched on demand by following X-Next-Cursor
   const fetchTasks = async () => {
     try {
-      const response = await axios.get(`${API_BASE}/tasks`);
+      const response = await axios.get(`${API_BASE}/tasks`, { params: { limit: PAGE_SIZE } });
       setTasks(response.data);
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (error) {
       console.error('Error fetching tasks:', error);
     }
   };
 
+  const fetchMoreTasks = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const response = await axios.get(`${API_BASE}/tasks`, {
+        params: { limit: PAGE_SIZE, cursor: nextCursor }
+      });
+      setTasks(prev => {
+        const known = new Set(prev.map(t => t.task_name));
+        return prev.concat(response.data.filter(t => !known.has(t.task_name)));
+      });
+      setNextCursor(response.headers['x-next-cursor'] || null);
+    } catch (error) {
+      console.error('Error fetching more tasks:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  // Apply one delta from /events/tasks to the task list
+  const applyTaskEvent = (event) => {
+    if (event.type === 'resync') {
+      fetchTasks();
+    } else if (event.type === 'delete') {
+      setTasks(prev => prev.filter(t => t.task_name !== event.task_name));
+    } else if (event.type === 'update') {
+      setTasks(prev => {
+        if (prev.some(t => t.task_name === event.task_name)) {
+          return prev.map(t => t.task_name === event.task_name ? { ...t, ...event.fields } : t);
+        }
+        // Only creations carry a full summary; ignore partial deltas for unknown tasks
+        return event.fields.id ? [{ task_name: event.task_name, ...event.fields }, ...prev] : prev;
+      });
+    }
+  };
+
   useEffect(() => {
-    fetchTasks();
-    const interval = setInterval(fetchTasks, 5000);
-    return () => clearInterval(interval);
+    // Snapshot once the stream is open (also after every reconnect), then apply deltas
+    const source = new EventSource(`${API_BASE}/events/tasks`);
+    source.onopen = () => fetchTasks();
+    source.onmessage = (e) => applyTaskEvent(JSON.parse(e.data));
+    return () => source.close();
   }, []);
 
   const handleSubmit = async (e) => {
@@ -52,7 +96,6 @@ function App() {
       };
       await axios.post(`${API_BASE}/tasks`, taskData);
       setMessage('Task created successfully!');
-      fetchTasks();
       setTimeout(() => setMessage(''), 3000);
     } catch (error) {
       setMessage('Error creating task');
@@ -62,7 +105,6 @@ function App() {
   const handleAction = async (taskName, action) => {
     try {
       await axios.post(`${API_BASE}/tasks/${taskName}/${action}`);
-      fetchTasks();
     } catch (error) {
       alert('Failed action');
     }
@@ -206,6 +248,12 @@ function App() {
           </div>
         ))}
       </div>
+
+      {nextCursor && (
+        <button className="submit-btn load-more-btn" onClick={fetchMoreTasks} disabled={loadingMore}>
+          {loadingMore ? 'Loading...' : 'Load more tasks'}
+        </button>
+      )}
     </div>
   );
 }
@@ -0,0 +1,270 @@
+"""
+asyncio execution engine: many operator subprocesses from one event loop.
+
+Under Celery prefork every running operator occupies a pool process that
+does nothing but wait on its child, so concurrency is capped by the pool
+size. With dispatch_mode "consumer", this process can replace both
+dispatcher.py and the Celery worker: it claims task names from the
+priority-ordered dispatch queue with the same acknowledged DispatchConsumer
+(highest priority first) and runs each one as an
+asyncio.create_subprocess_exec child, up to async_max_in_flight at a time.
+
+A run goes through the same steps as execute_operator_task:
+prepare_run -> spawn -> supervise -> capture logs -> handle_process_result
+(with max_retries). Cancels and timeouts come from the process-wide
+RunSupervisor, whose terminate() calls are marshalled onto the loop. The
+synchronous MongoDB/Redis helpers shared with tasks.py run in the loop's
+thread pool, so the loop itself only waits on pipes and timers. Failed
+attempts go to the Redis retry queue like Celery runs do and come back
+through the dispatch queue, as do runs waiting for a task's run lock (see
+wait_for_lock).
+
+How to run (from the worker/ directory, instead of dispatcher.py and the
+Celery worker):
+    python async_executor.py
+"""
+
+import asyncio
+import json
+import os
+import resource
+import signal
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+from dispatcher import DispatchConsumer
+from log_capture import capture_output_async
+from tasks import (
+    METRICS_PORT, SPAWN_SECONDS, LockBusy, attempt_number, dispatch_kwargs,
+    handle_process_result, new_log_writer, prepare_run, redis_list_client, run_lock, run_span,
+    state_writer, supervisor, wait_for_lock, worker_config,
+)
+from metrics import start_exporter
+from tracing import TRACEPARENT_ENV, traceparent_of, tracer
+
+
+class _LoopProcess:
+    """Thread-safe terminate() for an asyncio subprocess, as RunSupervisor expects."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, process: asyncio.subprocess.Process):
+        self._loop = loop
+        self._process = process
+        self.pid = process.pid
+
+    def terminate(self):
+        self._loop.call_soon_threadsafe(self._terminate)
+
+    def _terminate(self):
+        if self._process.returncode is None:
+            try:
+                self._process.terminate()
+            except ProcessLookupError:
+                pass
+
+
+async def spawn_operator_process_async(task_name: str, config: dict,
+                                       traceparent: str = None) -> asyncio.subprocess.Process:
+    """Start an operator script as an asyncio subprocess.
+
+    Args:
+        task_name: Name of the task (used for logging).
+        config: Task config dict containing operator_path, payload, and connection.
+        traceparent: Trace context of the run, passed in the TRACEPARENT
+            environment variable.
+
+    Returns:
+        asyncio.subprocess.Process with stdout/stderr pipes.
+    """
+    started = time.perf_counter()
+    with tracer.start_as_current_span("worker.spawn", attributes={"spawn.mode": "async"}):
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, config["operator_path"],
+            json.dumps(config.get("payload", {})), json.dumps(config.get("connection", {})),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env={**os.environ, TRACEPARENT_ENV: traceparent} if traceparent else None,
+        )
+    SPAWN_SECONDS.labels("async").observe(time.perf_counter() - started)
+    print(f"[AsyncExecutor] '{task_name}' started as PID: {process.pid}")
+    return process
+
+
+class AsyncExecutor:
+    """Runs operator tasks concurrently on one event loop."""
+
+    def __init__(self, max_in_flight: int = 1000):
+        """Initialize the executor.
+
+        Args:
+            max_in_flight: Maximum number of operators running at once; the
+                consumer stops claiming from the queue while all slots are busy.
+        """
+        self.max_in_flight = max_in_flight
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._runs = set()
+
+    @property
+    def in_flight(self) -> int:
+        """Number of runs currently started and not yet finished."""
+        return len(self._runs)
+
+    async def execute(self, task_name: str, waiting_since: float = None,
+                      traceparent: str = None, dispatched_at: float = None, payload: str = None):
+        """Run one attempt of a task; the asyncio counterpart of execute_operator_task.
+
+        Args:
+            task_name: Name of the task to execute.
+            waiting_since: When this run started waiting for the task's run
+                lock, if it already has.
+            traceparent: Trace context of the firing (see backend/tracing.py).
+            dispatched_at: When the task was claimed (epoch seconds).
+            payload: Serialized TaskInRedis the task was queued with.
+
+        Returns:
+            handle_process_result's result, or None if the task could not run.
+        """
+        with run_span(task_name, traceparent, dispatched_at) as span:
+            return await self._execute(task_name, waiting_since, traceparent, payload, span)
+
+    async def _execute(self, task_name: str, waiting_since: float, traceparent: str, payload: str, span):
+        loop = asyncio.get_running_loop()
+        try:
+            task_doc, config, token = await asyncio.to_thread(
+                prepare_run, task_name, waiting_since, payload
+            )
+        except LockBusy as busy:
+            await asyncio.to_thread(wait_for_lock, task_name, busy, traceparent)
+            return None
+        if not config:
+            return None
+        attempt_num = attempt_number(task_doc)
+        span.set_attribute("task.attempt", attempt_num)
+
+        try:
+            timeout_seconds = config.get("timeout_seconds", 3600)
+            with tracer.start_as_current_span("operator.run") as operator_span:
+                process = await spawn_operator_process_async(task_name, config, traceparent_of(operator_span))
+                start_time = datetime.now(timezone.utc)
+
+                run_id = uuid.uuid4().hex
+                writer = new_log_writer(task_name, run_id, attempt_num)
+
+                watch = supervisor.watch(task_name, _LoopProcess(loop, process), timeout_seconds)
+                try:
+                    stdout, stderr = await capture_output_async(process, writer)
+                finally:
+                    supervisor.unwatch(watch)
+
+            with tracer.start_as_current_span("worker.handle_result"):
+                result = await asyncio.to_thread(
+                    handle_process_result, task_name, process.returncode, watch.cancelled,
+                    watch.timed_out, stdout, stderr, start_time, attempt_num, run_id,
+                    task_doc.get("max_retries", 3), token, task_doc.get("retry_backoff"),
+                    task_doc.get("priority", 3), traceparent
+                )
+            span.set_attribute("task.result", result)
+        finally:
+            await asyncio.to_thread(
+                state_writer.call_after_writes, lambda: run_lock.release(task_name, token)
+            )
+        return result
+
+    def _start(self, coro):
+        run = asyncio.get_running_loop().create_task(coro)
+        self._runs.add(run)
+        run.add_done_callback(self._runs.discard)
+
+    async def _run_in_slot(self, task_name: str, acquired: bool = False, **trace):
+        if not acquired:
+            await self._slots.acquire()
+        try:
+            await self.execute(task_name, **trace)
+        except Exception as e:
+            print(f"[AsyncExecutor] Run of '{task_name}' failed: {e}")
+        finally:
+            self._slots.release()
+
+    async def consume(self, consumer: DispatchConsumer, block_seconds: float = 1,
+                      reclaim_interval: float = 15, stop: asyncio.Event = None):
+        """Claim task names from the queue and run them until stopped.
+
+        A slot is reserved before each claim, so while max_in_flight runs
+        are in progress the backlog stays in Redis for other consumers.
+        Items are acknowledged once their run has started.
+
+        Args:
+            consumer: DispatchConsumer over the dispatch queue.
+            block_seconds: Maximum time a single claim blocks.
+            reclaim_interval: Seconds between heartbeat/reclaim passes.
+            stop: Optional event; claiming stops once it is set and the
+                in-flight runs are awaited.
+        """
+        await asyncio.to_thread(consumer.heartbeat)
+        await asyncio.to_thread(consumer.reclaim, True)
+        next_maintenance = time.monotonic() + reclaim_interval
+
+        while stop is None or not stop.is_set():
+            if time.monotonic() >= next_maintenance:
+                await asyncio.to_thread(consumer.heartbeat)
+                await asyncio.to_thread(consumer.reclaim)
+                next_maintenance = time.monotonic() + reclaim_interval
+
+            await self._slots.acquire()
+            try:
+                item = await asyncio.to_thread(consumer.claim, block_seconds)
+            except Exception:
+                self._slots.release()
+                raise
+            if item is None:
+                self._slots.release()
+                continue
+            self._start(self._run_in_slot(item, acquired=True, **dispatch_kwargs(item)))
+            await asyncio.to_thread(consumer.ack, item)
+
+        if self._runs:
+            print(f"[AsyncExecutor] Waiting for {len(self._runs)} running operator(s)")
+            await asyncio.gather(*self._runs, return_exceptions=True)
+
+
+def raise_open_file_limit(needed: int):
+    """Raise the soft RLIMIT_NOFILE towards the hard limit; each run holds a few pipes."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+    if soft != resource.RLIM_INFINITY and soft < target:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+
+
+async def _main():
+    heartbeat_ttl = worker_config.get("dispatch_heartbeat_ttl_seconds", 30)
+    max_in_flight = worker_config.get("async_max_in_flight", 1000)
+    raise_open_file_limit(max_in_flight * 4 + 256)
+
+    consumer = DispatchConsumer(
+        redis_list_client,
+        consumer_id=os.environ.get("DISPATCHER_ID"),
+        heartbeat_ttl=heartbeat_ttl,
+    )
+    executor = AsyncExecutor(max_in_flight=max_in_flight)
+    start_exporter(METRICS_PORT)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    print(f"[AsyncExecutor] Consuming '{consumer.queue}' as {consumer.consumer_id} "
+          f"(up to {max_in_flight} operators in flight)")
+    await executor.consume(
+        consumer,
+        block_seconds=worker_config.get("dispatch_block_seconds", 1),
+        reclaim_interval=min(
+            worker_config.get("dispatch_reclaim_interval_seconds", 15), heartbeat_ttl / 2
+        ),
+        stop=stop,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,145 @@
+"""
+Enqueue-to-start latency of the dispatch_queue dispatch path.
+
+A producer enqueues timestamped items at a fixed rate; the time until each
+item is handed off is recorded for
+  * consumer : dispatcher.DispatchConsumer (ready-token BLPOP + claim + ack), and
+  * beat     : the legacy check_redis_queue pattern (ZPOPMIN drain every N s).
+
+The handoff is a no-op recorder, so the numbers isolate dispatch latency from
+Celery broker and operator start-up time.
+
+How to run (Redis from docker-compose must be up):
+    python worker/benchmarks/bench_dispatch.py
+    python worker/benchmarks/bench_dispatch.py --items 5000 --rate 500
+
+Results are written to worker/benchmarks/results/ as JSON.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import redis
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from dispatcher import DEFAULT_PRIORITY, DispatchConsumer, enqueue
+
+# --- CONFIGURATION ---
+REDIS_HOST = "localhost"
+REDIS_PORT = 6340
+REDIS_DB = 15  # scratch database, flushed of bench keys only
+QUEUE = "bench_dispatch_queue"
+BEAT_INTERVAL_SECONDS = 5.0
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+# ---------------------
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return None
+    index = max(0, min(len(values) - 1, int(round(pct / 100 * len(values))) - 1))
+    return values[index]
+
+
+def produce(client, items: int, rate: float):
+    """Enqueue `items` items tagged with their enqueue time, `rate` per second."""
+    interval = 1.0 / rate
+    started = time.perf_counter()
+    for seq in range(items):
+        enqueue(client, [(f"{seq}:{time.time_ns()}", DEFAULT_PRIORITY)], QUEUE)
+        sleep_for = started + (seq + 1) * interval - time.perf_counter()
+        if sleep_for > 0:
+            time.sleep(sleep_for)
+
+
+def record_latency(latencies, item: str):
+    """Append now - enqueue time (ms) for one handed-off item."""
+    enqueued_ns = int(item.split(":")[1])
+    latencies.append((time.time_ns() - enqueued_ns) / 1e6)
+
+
+def run_consumer(client, items: int, rate: float) -> list:
+    """Measure the blocking, acknowledged consumer."""
+    latencies = []
+    stop = threading.Event()
+    consumer = DispatchConsumer(client, queue=QUEUE, consumer_id="bench")
+    thread = threading.Thread(
+        target=consumer.run,
+        args=(lambda item: record_latency(latencies, item),),
+        kwargs={"block_seconds": 0.5, "stop": stop},
+        daemon=True,
+    )
+    thread.start()
+    produce(client, items, rate)
+    while len(latencies) < items:
+        time.sleep(0.05)
+    stop.set()
+    thread.join()
+    return latencies
+
+
+def run_beat(client, items: int, rate: float) -> list:
+    """Measure the legacy drain triggered every BEAT_INTERVAL_SECONDS."""
+    latencies = []
+    done = threading.Event()
+
+    def poller():
+        while not done.is_set():
+            while True:
+                popped = client.zpopmin(QUEUE)
+                if not popped:
+                    break
+                record_latency(latencies, popped[0][0].decode("utf-8"))
+            done.wait(BEAT_INTERVAL_SECONDS)
+
+    threading.Thread(target=poller, daemon=True).start()
+    produce(client, items, rate)
+    while len(latencies) < items:
+        time.sleep(0.05)
+    done.set()
+    return latencies
+
+
+def summarize(latencies: list) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "items": len(latencies),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(latencies[-1], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=100.0, help="items per second")
+    args = parser.parse_args()
+
+    client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB)
+    report = {"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "items": args.items, "rate": args.rate}
+
+    for mode, runner in (("consumer", run_consumer), ("beat", run_beat)):
+        for key in client.scan_iter(match=f"{QUEUE}*"):
+            client.delete(key)
+        print(f"⏱️  {mode}: {args.items} items at {args.rate}/s...")
+        report[mode] = summarize(runner(client, args.items, args.rate))
+        print(f"   p50={report[mode]['p50_ms']}ms p99={report[mode]['p99_ms']}ms")
+
+    for key in client.scan_iter(match=f"{QUEUE}*"):
+        client.delete(key)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = os.path.join(RESULTS_DIR, f"dispatch-{int(time.time())}.json")
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"📝 Results written to {out_path}")
+
+
+if __name__ == "__main__":
+    main()
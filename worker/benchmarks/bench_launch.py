@@ -0,0 +1,136 @@
+"""
+Operator launch latency: cold subprocess spawn vs warm fork-server fork.
+
+Each run launches a small operator that records when run() starts. Two
+latencies are reported per mode:
+  * start : launch call -> operator run() entered (what a task waits for)
+  * total : launch call -> exit code collected
+for
+  * cold : subprocess.Popen([sys.executable, operator_path, ...]), and
+  * warm : forkserver.ForkServerClient.launch() with the same operator.
+
+The operator imports a few stdlib modules of realistic weight (configurable
+below) so cold starts pay for them while warm forks already have them loaded.
+
+How to run (no services needed):
+    python worker/benchmarks/bench_launch.py
+    python worker/benchmarks/bench_launch.py --runs 500
+
+Results are written to worker/benchmarks/results/ as JSON.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+WORKER_DIR = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, WORKER_DIR)
+from forkserver import ForkServerClient
+
+# --- CONFIGURATION ---
+OPERATOR_IMPORTS = ["json", "decimal", "email.mime.text", "http.client", "logging", "xml.dom.minidom"]
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+# ---------------------
+
+OPERATOR_TEMPLATE = """
+import sys, os, json, time
+sys.path.append({worker_dir!r})
+{imports}
+from base_operator import BaseOperator, run_operator
+
+class BenchOperator(BaseOperator):
+    def initialize(self, payload, connection):
+        pass
+
+    def run(self):
+        print(time.time_ns(), flush=True)
+
+    def finish(self):
+        pass
+
+if __name__ == "__main__":
+    run_operator(BenchOperator(), json.loads(sys.argv[1]), json.loads(sys.argv[2]))
+"""
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return None
+    index = max(0, min(len(values) - 1, int(round(pct / 100 * len(values))) - 1))
+    return values[index]
+
+
+def measure(launch, runs: int) -> dict:
+    """Launch the operator `runs` times and collect start/total latencies (ms)."""
+    starts, totals = [], []
+    for _ in range(runs):
+        launched_ns = time.time_ns()
+        process = launch()
+        started_ns = int(process.stdout.readline())
+        process.stdout.read()
+        process.stderr.read()
+        process.wait()
+        finished_ns = time.time_ns()
+        starts.append((started_ns - launched_ns) / 1e6)
+        totals.append((finished_ns - launched_ns) / 1e6)
+    return {"start": summarize(starts), "total": summarize(totals)}
+
+
+def summarize(latencies: list) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "runs": len(latencies),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "max_ms": round(latencies[-1], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as operator_dir:
+        operator_path = os.path.join(operator_dir, "bench_operator.py")
+        with open(operator_path, "w") as f:
+            f.write(OPERATOR_TEMPLATE.format(
+                worker_dir=os.path.abspath(WORKER_DIR),
+                imports="\n".join(f"import {name}" for name in OPERATOR_IMPORTS),
+            ))
+        argv = ["{}", "{}"]
+
+        def cold():
+            return subprocess.Popen(
+                [sys.executable, operator_path] + argv,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+            )
+
+        client = ForkServerClient(operator_dir=operator_dir)
+        client.launch(operator_path, argv).wait()  # start the server outside the timings
+
+        def warm():
+            return client.launch(operator_path, argv)
+
+        report = {"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "runs": args.runs,
+                  "operator_imports": OPERATOR_IMPORTS}
+        for mode, launch in (("cold", cold), ("warm", warm)):
+            print(f"⏱️  {mode}: {args.runs} launches...")
+            report[mode] = measure(launch, args.runs)
+            print(f"   start p50={report[mode]['start']['p50_ms']}ms p99={report[mode]['start']['p99_ms']}ms"
+                  f" | total p50={report[mode]['total']['p50_ms']}ms")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = os.path.join(RESULTS_DIR, f"launch-{int(time.time())}.json")
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"📝 Results written to {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Priority inversion on the dispatch queue.
+
+A backlog of priority-3 items is queued, then a burst of priority-1 items
+arrives behind it, and K consumers drain everything with a fixed per-item
+handoff cost. Compared:
+  * fifo     : the pre-priority 'batch_run' list (LPUSH / RPOP), which hands
+               items off in arrival order whatever their priority;
+  * priority : dispatcher.DispatchConsumer over the priority sorted set.
+
+Reported per mode: enqueue-to-handoff wait (p50/p99) of the priority-1 items
+and the number of inversions, i.e. priority-3 handoffs made after the first
+priority-1 item was queued but before the last one was handed off.
+
+How to run (Redis from docker-compose must be up):
+    python worker/benchmarks/bench_priority.py
+    python worker/benchmarks/bench_priority.py --backlog 5000 --burst 200 --consumers 8
+
+Results are written to worker/benchmarks/results/ as JSON.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import redis
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from dispatcher import DispatchConsumer, enqueue
+
+# --- CONFIGURATION ---
+REDIS_HOST = "localhost"
+REDIS_PORT = 6340
+REDIS_DB = 15  # scratch database, flushed of bench keys only
+QUEUE = "bench_priority_queue"
+HANDOFF_MS = 1.0  # simulated apply_async cost per item
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+# ---------------------
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return None
+    index = max(0, min(len(values) - 1, int(round(pct / 100 * len(values))) - 1))
+    return values[index]
+
+
+def make_item(priority: int, seq: int) -> str:
+    return f"{priority}:{seq}:{time.time_ns()}"
+
+
+class Recorder:
+    """Collects (handoff time, priority, wait) for every handed-off item."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.handoffs = []
+
+    def __call__(self, item: str):
+        time.sleep(HANDOFF_MS / 1000)
+        priority, _, enqueued_ns = item.split(":")
+        now = time.time_ns()
+        with self.lock:
+            self.handoffs.append((now, int(priority), (now - int(enqueued_ns)) / 1e6))
+
+
+def push(client, mode: str, items, priority: int):
+    """Queue items on the list (fifo) or the priority sorted set."""
+    for start in range(0, len(items), 1000):
+        chunk = items[start:start + 1000]
+        if mode == "fifo":
+            client.lpush(QUEUE, *chunk)
+        else:
+            enqueue(client, [(item, priority) for item in chunk], QUEUE)
+
+
+def consume(client, mode: str, index: int, recorder: "Recorder", total: int):
+    """Hand items off until `total` items have been handed off by all consumers."""
+    consumer = DispatchConsumer(client, queue=QUEUE, consumer_id=f"bench_{index}")
+    while len(recorder.handoffs) < total:
+        if mode == "fifo":
+            item = client.rpop(QUEUE)
+            if item is None:
+                time.sleep(0.001)
+                continue
+            recorder(item.decode("utf-8"))
+        else:
+            item = consumer.claim(0.1)
+            if item is None:
+                continue
+            recorder(item)
+            consumer.ack(item)
+
+
+def run(client, mode: str, backlog: int, burst: int, consumers: int) -> dict:
+    for key in client.scan_iter(match=f"{QUEUE}*"):
+        client.delete(key)
+    recorder = Recorder()
+
+    # Consumers are already working through the backlog when the burst
+    # lands, as in production.
+    push(client, mode, [make_item(3, seq) for seq in range(backlog)], 3)
+    threads = [
+        threading.Thread(target=consume, args=(client, mode, i, recorder, backlog + burst), daemon=True)
+        for i in range(consumers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+
+    burst_started = time.time_ns()
+    for seq in range(burst):
+        push(client, mode, [make_item(1, seq)], 1)
+
+    for thread in threads:
+        thread.join()
+
+    high = [(at, wait) for at, priority, wait in recorder.handoffs if priority == 1]
+    last_high = max(at for at, _ in high)
+    inversions = sum(1 for at, priority, _ in recorder.handoffs
+                     if priority == 3 and burst_started <= at < last_high)
+    waits = sorted(wait for _, wait in high)
+    return {
+        "handed_off": len(recorder.handoffs),
+        "high_p50_ms": round(percentile(waits, 50), 3),
+        "high_p99_ms": round(percentile(waits, 99), 3),
+        "inversions": inversions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--backlog", type=int, default=2000, help="priority-3 items queued first")
+    parser.add_argument("--burst", type=int, default=100, help="priority-1 items queued after")
+    parser.add_argument("--consumers", type=int, default=4)
+    args = parser.parse_args()
+
+    client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB)
+    report = {"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), **vars(args)}
+
+    try:
+        for mode in ("fifo", "priority"):
+            print(f"⏱️  {mode}: {args.backlog} low + {args.burst} high, {args.consumers} consumers...")
+            report[mode] = run(client, mode, args.backlog, args.burst, args.consumers)
+            print(f"   high p50={report[mode]['high_p50_ms']}ms p99={report[mode]['high_p99_ms']}ms, "
+                  f"{report[mode]['inversions']} inversions")
+    finally:
+        for key in client.scan_iter(match=f"{QUEUE}*"):
+            client.delete(key)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = os.path.join(RESULTS_DIR, f"priority-{int(time.time())}.json")
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"📝 Results written to {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+MongoDB round trips per execution for the worker's task state writes.
+
+Simulates runs whose state transitions (RUNNING, then the result with its
+history entry and, on failure, the retry bookkeeping) are written to
+queue_table, schedules and task_attempts in three ways:
+  * legacy       : the previous call sequence, one update_one per field change
+                   (plus find_one_and_update for num_of_retries);
+  * direct       : state_writer.StateWriter, one update per transition;
+  * write_behind : StateWriter batching transitions of concurrent runs.
+
+Round trips are counted with a pymongo CommandListener, so the numbers are
+what the server actually received.
+
+How to run (MongoDB from docker-compose must be up):
+    python worker/benchmarks/bench_state_writes.py
+    python worker/benchmarks/bench_state_writes.py --runs 5000 --threads 32
+
+Results are written to worker/benchmarks/results/ as JSON.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from pymongo import MongoClient, ReturnDocument, monitoring
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from state_writer import StateWriter
+
+# --- CONFIGURATION ---
+MONGO_URI = "mongodb://localhost:27017"
+DB_NAME = "tasks_db_bench"
+FAILURE_RATE = 0.3
+HISTORY_LIMIT = 10
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+# ---------------------
+
+WRITE_COMMANDS = {"insert", "update", "findAndModify"}
+
+
+class WriteCounter(monitoring.CommandListener):
+    """Counts write commands sent to the benchmark database."""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        if event.database_name == DB_NAME and event.command_name in WRITE_COMMANDS:
+            with self._lock:
+                self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def attempt_entry(task_name: str, attempt_num: int, failed: bool) -> dict:
+    now = datetime.now(timezone.utc)
+    return {"task_name": task_name, "attempt_number": attempt_num, "started_at": now,
+            "ended_at": now, "state": "FAILED" if failed else "COMPLETED", "fail_reason": None}
+
+
+def history_push(attempt: dict) -> dict:
+    entry = {k: v for k, v in attempt.items() if k != "task_name"}
+    return {"execution_history": {"$each": [entry], "$slice": -HISTORY_LIMIT}}
+
+
+def run_legacy(db, task_name: str, failed: bool):
+    """The write sequence a run issued before transitions were coalesced."""
+    for name in ("queue_table", "schedules"):
+        db[name].update_one({"task_name": task_name}, {"$set": {"state": "RUNNING"}})
+    attempt = attempt_entry(task_name, 1, failed)
+    db.task_attempts.insert_one(dict(attempt))
+    update = {"$push": history_push(attempt)}
+    if not failed:
+        update["$set"] = {"state": "COMPLETED"}
+    for name in ("queue_table", "schedules"):
+        db[name].update_one({"task_name": task_name}, update)
+    if failed:
+        db.queue_table.update_one({"task_name": task_name}, {"$inc": {"num_of_retries": 1}})
+        db.schedules.find_one_and_update(
+            {"task_name": task_name}, {"$inc": {"num_of_retries": 1}},
+            projection={"num_of_retries": 1}, return_document=ReturnDocument.AFTER
+        )
+        for name in ("queue_table", "schedules"):
+            db[name].update_one({"task_name": task_name}, {"$set": {"state": "RETRY"}})
+
+
+def run_coalesced(writer: StateWriter, task_name: str, failed: bool):
+    """The same run written as two transitions through a StateWriter."""
+    writer.apply(task_name, {"$set": {"state": "RUNNING"}})
+    attempt = attempt_entry(task_name, 1, failed)
+    update = {"$push": history_push(attempt), "$set": {"state": "RETRY" if failed else "COMPLETED"}}
+    if failed:
+        update["$inc"] = {"num_of_retries": 1}
+    writer.apply(task_name, update, dict(attempt))
+
+
+def seed(db, runs: int):
+    db.queue_table.drop()
+    db.schedules.drop()
+    db.task_attempts.drop()
+    docs = [{"task_name": f"bench_{i}", "state": "QUEUED", "num_of_retries": 0} for i in range(runs)]
+    db.queue_table.insert_many([dict(d) for d in docs])
+    db.schedules.insert_many([dict(d) for d in docs])
+    for name in ("queue_table", "schedules"):
+        db[name].create_index("task_name", unique=True)
+
+
+def measure(client, counter: WriteCounter, mode: str, runs: int, threads: int) -> dict:
+    db = client[DB_NAME]
+    seed(db, runs)
+    failures = random.Random(42)
+    plan = [(f"bench_{i}", failures.random() < FAILURE_RATE) for i in range(runs)]
+
+    writer = StateWriter(db, write_behind=(mode == "write_behind"))
+    if mode == "legacy":
+        def run(item):
+            run_legacy(db, *item)
+    else:
+        def run(item):
+            run_coalesced(writer, *item)
+
+    counter.count = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(run, plan))
+    writer.flush()
+    elapsed = time.perf_counter() - started
+
+    assert db.task_attempts.count_documents({}) == runs
+    return {
+        "round_trips": counter.count,
+        "round_trips_per_execution": round(counter.count / runs, 3),
+        "seconds": round(elapsed, 3),
+        "executions_per_second": round(runs / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    counter = WriteCounter()
+    client = MongoClient(MONGO_URI, event_listeners=[counter])
+
+    report = {"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "runs": args.runs,
+              "threads": args.threads, "failure_rate": FAILURE_RATE}
+    for mode in ("legacy", "direct", "write_behind"):
+        print(f"⏱️  {mode}: {args.runs} executions on {args.threads} threads...")
+        report[mode] = measure(client, counter, mode, args.runs, args.threads)
+        print(f"   {report[mode]['round_trips_per_execution']} round trips/execution, "
+              f"{report[mode]['executions_per_second']} executions/s")
+
+    client.drop_database(DB_NAME)
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = os.path.join(RESULTS_DIR, f"state-writes-{int(time.time())}.json")
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"📝 Results written to {out_path}")
+
+
+if __name__ == "__main__":
+    main()
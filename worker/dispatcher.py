@@ -0,0 +1,330 @@
+"""
+Long-running dispatch consumer for the Redis 'dispatch_queue'.
+
+Replaces Celery-beat polling (check_redis_queue every 5 s) with a process that
+blocks on the queue and hands each task to the Celery workers the moment it
+arrives. Items are moved atomically into a per-consumer processing set and
+only removed once execute_operator_task has been enqueued, so a crash between
+pop and enqueue no longer loses the task: another consumer (or the same one on
+restart) moves unacknowledged items back onto the queue.
+
+The queue is a sorted set scored by priority, then enqueue time, so a
+priority-1 task is claimed before any queued priority-3 task however many of
+those arrived first. A sorted set cannot be blocked on and moved from in one
+command, so every enqueue also pushes a token onto '<queue>:ready', which idle
+consumers BLPOP on. Each claimed task is routed to the Celery queue of its
+priority (priority_queues in config.json), together with what the scheduler
+stored for it next to the queue: the task's serialized TaskInRedis in
+'<queue>:payload', which the worker runs from instead of reading MongoDB,
+and its trace context in '<queue>:trace' (see backend/tracing.py).
+
+How to run (from the worker/ directory, alongside the Celery worker):
+    python dispatcher.py
+"""
+
+import os
+import socket
+import threading
+import time
+
+import redis
+
+
+# Lower scores are claimed first: priority * PRIORITY_STEP + enqueue time in
+# ms. PRIORITY_STEP exceeds any millisecond timestamp, so priority always wins.
+PRIORITY_STEP = 10 ** 13
+DEFAULT_PRIORITY = 3
+
+# The plain list earlier versions dispatched through; drained on startup.
+LEGACY_QUEUE = "batch_run"
+
+# KEYS[1] = queue, KEYS[2] = ready list; ARGV = (task name, priority) pairs.
+# Tasks already queued keep their place. Returns how many were added.
+ENQUEUE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local added = 0
+for i = 1, #ARGV, 2 do
+    local score = tonumber(ARGV[i + 1]) * 1e13 + now
+    if redis.call('ZADD', KEYS[1], 'NX', string.format('%d', score), ARGV[i]) == 1 then
+        redis.call('LPUSH', KEYS[2], '1')
+        added = added + 1
+    end
+end
+return added
+"""
+
+# KEYS[1] = queue, KEYS[2] = processing set, KEYS[3] = ready list, KEYS[4] =
+# trace context hash, KEYS[5] = payload hash; ARGV[1] = '1' to also take a
+# ready token. Returns {task name, score, traceparent or '', payload or ''} or
+# nil. Trace context and payload are taken with the task, so a requeued task
+# is traced afresh and its worker reads the task from MongoDB.
+CLAIM_SCRIPT = """
+local popped = redis.call('ZPOPMIN', KEYS[1])
+if #popped == 0 then
+    return nil
+end
+redis.call('ZADD', KEYS[2], popped[2], popped[1])
+if ARGV[1] == '1' then
+    redis.call('LPOP', KEYS[3])
+end
+local taken = {}
+for k = 4, 5 do
+    taken[k] = redis.call('HGET', KEYS[k], popped[1])
+    if taken[k] then
+        redis.call('HDEL', KEYS[k], popped[1])
+    end
+end
+return {popped[1], popped[2], taken[4] or '', taken[5] or ''}
+"""
+
+# Move members of a processing set (all, or just ARGV) back onto the queue
+# with their original scores. KEYS[1] = processing set, KEYS[2] = queue,
+# KEYS[3] = ready list. Returns how many were moved.
+REQUEUE_SCRIPT = """
+local members = ARGV
+if #members == 0 then
+    members = redis.call('ZRANGE', KEYS[1], 0, -1)
+end
+local moved = 0
+for _, member in ipairs(members) do
+    local score = redis.call('ZSCORE', KEYS[1], member)
+    if score then
+        redis.call('ZREM', KEYS[1], member)
+        redis.call('ZADD', KEYS[2], score, member)
+        redis.call('LPUSH', KEYS[3], '1')
+        moved = moved + 1
+    end
+end
+return moved
+"""
+
+
+class ClaimedItem(str):
+    """A claimed task name that also carries how it was queued.
+
+    Attributes:
+        priority: Priority the task was queued with.
+        traceparent: Trace context of the firing, or "" if it has none.
+        queued_at: When the task was queued (epoch seconds, Redis clock).
+        payload: Serialized TaskInRedis the task was queued with, or "".
+    """
+
+    def __new__(cls, value: str, priority: int, traceparent: str = "", queued_at: float = None,
+                payload: str = ""):
+        item = super().__new__(cls, value)
+        item.priority = priority
+        item.traceparent = traceparent
+        item.queued_at = queued_at
+        item.payload = payload
+        return item
+
+    @classmethod
+    def from_score(cls, value, score, traceparent=b"", payload=b""):
+        """Build an item from the raw queue member, its score, trace context and payload."""
+        value, traceparent, payload = (
+            v.decode("utf-8") if isinstance(v, bytes) else v for v in (value, traceparent, payload)
+        )
+        score = int(float(score))
+        return cls(value, score // PRIORITY_STEP, traceparent or "", (score % PRIORITY_STEP) / 1000,
+                   payload or "")
+
+
+def enqueue(client: redis.Redis, tasks, queue: str = "dispatch_queue") -> int:
+    """Queue tasks for dispatch, each behind every queued task of higher priority.
+
+    Args:
+        client: Synchronous Redis client.
+        tasks: Iterable of (task_name, priority) pairs.
+        queue: Name of the dispatch queue.
+
+    Returns:
+        Number of tasks added (tasks already queued are left where they are).
+    """
+    args = [value for task_name, priority in tasks for value in (task_name, int(priority))]
+    if not args:
+        return 0
+    return client.eval(ENQUEUE_SCRIPT, 2, queue, f"{queue}:ready", *args)
+
+
+class DispatchConsumer:
+    """Reliable-queue consumer over the priority-ordered dispatch queue.
+
+    Each consumer owns '<queue>:processing:<consumer_id>' and keeps a
+    '<queue>:consumer:<consumer_id>' heartbeat key alive. A processing set
+    whose heartbeat has expired belongs to a dead consumer and is reclaimed.
+    """
+
+    def __init__(self, client: redis.Redis, queue: str = "dispatch_queue",
+                 consumer_id: str = None, heartbeat_ttl: int = 30):
+        """Initialize the consumer.
+
+        Args:
+            client: Synchronous Redis client.
+            queue: Name of the sorted set the scheduler adds to.
+            consumer_id: Stable identity of this consumer; defaults to host:pid.
+            heartbeat_ttl: Seconds without a heartbeat before this consumer's
+                unacknowledged items may be reclaimed by others.
+        """
+        self.redis = client
+        self.queue = queue
+        self.consumer_id = consumer_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.heartbeat_ttl = heartbeat_ttl
+        self.processing_key = f"{queue}:processing:{self.consumer_id}"
+        self.heartbeat_key = f"{queue}:consumer:{self.consumer_id}"
+        self.ready_key = f"{queue}:ready"
+        self.trace_key = f"{queue}:trace"
+        self.payload_key = f"{queue}:payload"
+        self._claim = client.register_script(CLAIM_SCRIPT)
+        self._requeue_script = client.register_script(REQUEUE_SCRIPT)
+
+    def heartbeat(self):
+        """Refresh this consumer's liveness key."""
+        self.redis.set(self.heartbeat_key, "1", ex=self.heartbeat_ttl)
+
+    def _claim_now(self, take_token: bool):
+        popped = self._claim(
+            keys=[self.queue, self.processing_key, self.ready_key, self.trace_key, self.payload_key],
+            args=["1" if take_token else "0"]
+        )
+        if not popped:
+            return None
+        return ClaimedItem.from_score(*popped)
+
+    def claim(self, timeout: float):
+        """Move the highest-priority item into the processing set, blocking if none.
+
+        Args:
+            timeout: Seconds to block before giving up.
+
+        Returns:
+            The claimed item as a ClaimedItem (a str with .priority, trace
+            context and payload), or None on timeout.
+        """
+        item = self._claim_now(take_token=True)
+        if item is not None:
+            return item
+        if self.redis.blpop([self.ready_key], timeout) is None:
+            return None
+        return self._claim_now(take_token=False)
+
+    def ack(self, item: str):
+        """Drop an item from the processing set once it has been handed off."""
+        self.redis.zrem(self.processing_key, item)
+
+    def nack(self, item: str):
+        """Put a claimed item back at the front of its priority in one transaction."""
+        self._requeue_script(keys=[self.processing_key, self.queue, self.ready_key], args=[item])
+
+    def _requeue(self, processing_key: str) -> int:
+        """Move every item of a processing set back onto the queue.
+
+        Items keep their original scores, so they are next in line within
+        their priority.
+        """
+        return self._requeue_script(keys=[processing_key, self.queue, self.ready_key])
+
+    def _drain_legacy_queue(self) -> int:
+        """Move items left on the pre-priority 'batch_run' list onto the queue."""
+        if self.queue == LEGACY_QUEUE:
+            return 0
+        moved = 0
+        while True:
+            item = self.redis.rpop(LEGACY_QUEUE)
+            if item is None:
+                return moved
+            item = item.decode("utf-8") if isinstance(item, bytes) else item
+            moved += enqueue(self.redis, [(item, DEFAULT_PRIORITY)], self.queue)
+
+    def reclaim(self, include_self: bool = False) -> int:
+        """Return unacknowledged items of dead consumers to the queue.
+
+        Args:
+            include_self: Also requeue this consumer's own processing set
+                (used on startup, when nothing can be in flight yet), and
+                drain the legacy 'batch_run' list.
+
+        Returns:
+            Number of items moved back onto the queue.
+        """
+        moved = 0
+        prefix = f"{self.queue}:processing:"
+        for key in self.redis.scan_iter(match=f"{prefix}*"):
+            key = key.decode("utf-8") if isinstance(key, bytes) else key
+            consumer_id = key[len(prefix):]
+            if consumer_id == self.consumer_id:
+                if include_self:
+                    moved += self._requeue(key)
+                continue
+            if not self.redis.exists(f"{self.queue}:consumer:{consumer_id}"):
+                moved += self._requeue(key)
+        if include_self:
+            moved += self._drain_legacy_queue()
+        if moved:
+            print(f"[Dispatcher] Reclaimed {moved} unacknowledged task(s)")
+        return moved
+
+    def run(self, handoff, block_seconds: float = 1, reclaim_interval: float = 15,
+            stop: threading.Event = None):
+        """Consume the queue until stopped, calling handoff(item) for each item.
+
+        An item is acknowledged only after handoff returns. If handoff raises
+        (e.g. the Celery broker is down) the item is put back at the front of
+        the queue; if the process dies mid-handoff it is reclaimed later.
+
+        Args:
+            handoff: Callable that enqueues one item (a ClaimedItem) for execution.
+            block_seconds: Maximum time a single claim blocks.
+            reclaim_interval: Seconds between heartbeat/reclaim passes.
+            stop: Optional event; the loop exits within block_seconds once set.
+        """
+        self.heartbeat()
+        self.reclaim(include_self=True)
+        next_maintenance = time.monotonic() + reclaim_interval
+
+        while stop is None or not stop.is_set():
+            if time.monotonic() >= next_maintenance:
+                self.heartbeat()
+                self.reclaim()
+                next_maintenance = time.monotonic() + reclaim_interval
+
+            item = self.claim(block_seconds)
+            if item is None:
+                continue
+            try:
+                handoff(item)
+            except Exception as e:
+                print(f"[Dispatcher] Handoff failed for '{item}', requeueing: {e}")
+                self.nack(item)
+                time.sleep(block_seconds)
+                continue
+            self.ack(item)
+
+
+def main():
+    from tasks import dispatch_kwargs, execute_operator_task, priority_queue, redis_list_client, worker_config
+
+    heartbeat_ttl = worker_config.get("dispatch_heartbeat_ttl_seconds", 30)
+    consumer = DispatchConsumer(
+        redis_list_client,
+        consumer_id=os.environ.get("DISPATCHER_ID"),
+        heartbeat_ttl=heartbeat_ttl,
+    )
+
+    def handoff(item: ClaimedItem):
+        queue = priority_queue(item.priority)
+        execute_operator_task.apply_async((str(item),), dispatch_kwargs(item), queue=queue)
+        print(f"[Dispatcher] Sent '{item}' to worker queue '{queue}'")
+
+    print(f"[Dispatcher] Consuming '{consumer.queue}' as {consumer.consumer_id}")
+    consumer.run(
+        handoff,
+        block_seconds=worker_config.get("dispatch_block_seconds", 1),
+        reclaim_interval=min(
+            worker_config.get("dispatch_reclaim_interval_seconds", 15), heartbeat_ttl / 2
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+"""
+Warm, forkserver-style launcher for operator scripts.
+
+Cold launches (subprocess.Popen([sys.executable, operator_path, ...])) pay for
+a fresh interpreter and for importing base_operator and the operator's
+dependencies on every run. With execution_mode "forkserver" the worker
+instead keeps one long-lived server process per worker process that has
+already imported base_operator, the operator_preload modules and the
+operator scripts' own imports. Each launch forks that server: the child
+runs the operator script as __main__ with stdout/stderr connected to pipes
+owned by the worker, exactly like a cold child would.
+
+Operator scripts are run from the code objects cached by an
+OperatorRegistry in the server, so a launch neither re-reads nor re-compiles
+the script unless its contents changed.
+
+Isolation is unchanged: every run is still its own process, run_operator
+still installs its SIGTERM handler in that process, and terminate() sends
+SIGTERM to it, so finish() runs on cancel/timeout as before.
+
+Protocol (one Unix socket connection per launch):
+    worker -> server  JSON request line, with the stdout/stderr pipe write
+                      ends attached as SCM_RIGHTS file descriptors
+    server -> worker  "<pid>\\n" once forked, "<exit code>\\n" once reaped
+"""
+
+import builtins
+import importlib
+import json
+import os
+import runpy
+import select
+import selectors
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+from operator_registry import OperatorRegistry
+
+
+# ─── Server side (runs inside the warm server process) ──────────────────────
+
+def _exec_script(path: str, code, run_name: str):
+    """Run a script like runpy.run_path, from its cached code object if there is one."""
+    if code is None:
+        return runpy.run_path(path, run_name=run_name)
+    namespace = {"__name__": run_name, "__file__": path, "__builtins__": builtins,
+                 "__loader__": None, "__package__": None, "__spec__": None}
+    exec(code, namespace)
+    return namespace
+
+
+def _preload(modules, registry: OperatorRegistry = None):
+    """Import shared modules and execute operator scripts' top-level imports.
+
+    Operator scripts are run under a non-__main__ name, so their
+    `if __name__ == "__main__"` block does not execute; what remains cached
+    in sys.modules is everything they import.
+    """
+    import base_operator  # noqa: F401  (the reason for the warm pool)
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print(f"[ForkServer] Could not preload module '{name}': {e}")
+    if registry is None:
+        return
+    registry.scan()
+    for path, entry in registry.published().items():
+        try:
+            _exec_script(entry.path, entry.code, "__operator_preload__")
+        except BaseException as e:
+            print(f"[ForkServer] Could not preload operator '{path}': {e}")
+
+
+def _run_child(request, operator_code, stdout_fd, stderr_fd):
+    """Body of a forked child: become a cold-started operator process."""
+    os.dup2(stdout_fd, 1)
+    os.dup2(stderr_fd, 2)
+    os.close(stdout_fd)
+    os.close(stderr_fd)
+    for signum in (signal.SIGCHLD, signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, signal.SIG_DFL)
+
+    operator_path = request["operator_path"]
+    os.environ.update(request.get("env") or {})
+    sys.argv = [operator_path] + request["args"]
+    sys.path[0] = os.path.dirname(os.path.abspath(operator_path))
+    code = 0
+    try:
+        _exec_script(operator_path, operator_code, "__main__")
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        if not isinstance(e.code, (int, type(None))):
+            print(e.code, file=sys.stderr)
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    os._exit(code)
+
+
+def _read_request(conn):
+    """Receive one launch request and its two file descriptors."""
+    data, fds, _, _ = socket.recv_fds(conn, 65536, 2)
+    while data and not data.endswith(b"\n"):
+        more = conn.recv(65536)
+        if not more:
+            break
+        data += more
+    return json.loads(data), fds
+
+
+def serve(socket_path: str, modules, operator_dir: str):
+    """Accept launch requests until the parent worker process goes away.
+
+    Args:
+        socket_path: Unix socket to listen on.
+        modules: Module names to import before serving.
+        operator_dir: Directory whose operator scripts are preloaded.
+    """
+    parent = os.getppid()
+    registry = OperatorRegistry(operator_dir or os.getcwd())
+    _preload(modules, registry if operator_dir else None)
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(128)
+
+    # SIGCHLD only writes to this pipe; children are reaped in the loop.
+    wake_r, wake_w = os.pipe()
+    os.set_blocking(wake_w, False)
+    signal.set_wakeup_fd(wake_w)
+    signal.signal(signal.SIGCHLD, lambda *_: None)
+
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ)
+    selector.register(wake_r, selectors.EVENT_READ)
+    children = {}  # pid -> connection waiting for the exit code
+
+    print(f"[ForkServer] Ready on {socket_path} (pid {os.getpid()})", flush=True)
+    while os.getppid() == parent:
+        for key, _ in selector.select(timeout=1):
+            if key.fileobj is wake_r:
+                os.read(wake_r, 4096)
+                continue
+            conn, _ = listener.accept()
+            try:
+                request, fds = _read_request(conn)
+            except (OSError, ValueError) as e:
+                print(f"[ForkServer] Bad launch request: {e}")
+                conn.close()
+                continue
+            # Looked up before forking so the compiled code stays cached here.
+            entry = registry.lookup(request["operator_path"])
+
+            sys.stdout.flush()
+            sys.stderr.flush()
+            pid = os.fork()
+            if pid == 0:
+                signal.set_wakeup_fd(-1)
+                selector.close()
+                listener.close()
+                os.close(wake_r)
+                os.close(wake_w)
+                for other in children.values():
+                    other.close()
+                conn.close()
+                _run_child(request, entry.code if entry else None, *fds)
+
+            for fd in fds:
+                os.close(fd)
+            conn.sendall(f"{pid}\n".encode())
+            children[pid] = conn
+
+        while children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            conn = children.pop(pid, None)
+            if conn is not None:
+                try:
+                    conn.sendall(f"{os.waitstatus_to_exitcode(status)}\n".encode())
+                except OSError:
+                    pass
+                conn.close()
+
+    # The worker is gone: leave running operators to finish on their own.
+    listener.close()
+    os.unlink(socket_path)
+    os.rmdir(os.path.dirname(socket_path))
+
+
+# ─── Worker side ────────────────────────────────────────────────────────────
+
+class _LineConnection:
+    """Unbuffered line reader over the per-launch socket."""
+
+    def __init__(self, conn: socket.socket):
+        self.conn = conn
+        self._buffer = b""
+
+    def readline(self, timeout: float = None):
+        """Return the next line, "" if the server closed the connection.
+
+        Raises:
+            subprocess.TimeoutExpired: If no full line arrives within timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while b"\n" not in self._buffer:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if remaining is not None and not select.select([self.conn], [], [], remaining)[0]:
+                raise subprocess.TimeoutExpired("operator fork server", timeout)
+            data = self.conn.recv(4096)
+            if not data:
+                return ""
+            self._buffer += data
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return line.decode()
+
+    def close(self):
+        self.conn.close()
+
+
+class WarmProcess:
+    """Popen-like handle for an operator launched by the fork server.
+
+    Supports what the worker uses: pid, stdout, stderr, returncode,
+    terminate(), kill(), poll() and wait().
+    """
+
+    def __init__(self, conn: _LineConnection, pid: int, stdout, stderr):
+        self._conn = conn
+        self._lock = threading.Lock()
+        self.pid = pid
+        self.stdout = stdout
+        self.stderr = stderr
+        self.returncode = None
+
+    def terminate(self):
+        """Send SIGTERM, which run_operator turns into finish() + exit."""
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+    def send_signal(self, signum):
+        if self.returncode is None:
+            try:
+                os.kill(self.pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def wait(self, timeout: float = None) -> int:
+        """Wait for the fork server to report the exit code.
+
+        Raises:
+            subprocess.TimeoutExpired: If timeout elapses first.
+        """
+        with self._lock:
+            if self.returncode is not None:
+                return self.returncode
+            line = self._conn.readline(timeout)
+            # A vanished server (no exit line) is reported like a killed child.
+            self.returncode = int(line) if line.strip() else -signal.SIGKILL
+            self._conn.close()
+            return self.returncode
+
+    def poll(self):
+        try:
+            return self.wait(timeout=0)
+        except subprocess.TimeoutExpired:
+            return None
+
+
+class ForkServerClient:
+    """Starts the warm server on first use and launches operators through it."""
+
+    def __init__(self, preload_modules=None, operator_dir: str = None, start_timeout: float = 30):
+        """Initialize the client; the server process starts on the first launch().
+
+        Args:
+            preload_modules: Module names the server imports up front.
+            operator_dir: Directory of operator scripts to preload.
+            start_timeout: Seconds to wait for the server to come up.
+        """
+        self.preload_modules = list(preload_modules or [])
+        self.operator_dir = operator_dir
+        self.start_timeout = start_timeout
+        self._lock = threading.Lock()
+        self._server = None
+        self._socket_path = None
+        self._pid = None
+
+    def _ensure_server(self):
+        """Start (or restart) the server owned by this worker process."""
+        if self._pid == os.getpid() and self._server is not None and self._server.poll() is None:
+            return
+        socket_dir = tempfile.mkdtemp(prefix="operator-forkserver-")
+        self._socket_path = os.path.join(socket_dir, "server.sock")
+        self._server = subprocess.Popen([
+            sys.executable, os.path.abspath(__file__), self._socket_path,
+            json.dumps(self.preload_modules), self.operator_dir or "",
+        ], cwd=os.path.dirname(os.path.abspath(__file__)))
+        self._pid = os.getpid()
+
+        deadline = time.monotonic() + self.start_timeout
+        while not os.path.exists(self._socket_path):
+            if self._server.poll() is not None or time.monotonic() > deadline:
+                raise OSError("operator fork server failed to start")
+            time.sleep(0.01)
+
+    def launch(self, operator_path: str, args, env: dict = None) -> WarmProcess:
+        """Fork a warm child running operator_path with the given argv.
+
+        Args:
+            operator_path: Operator script to run as __main__.
+            args: Remaining command-line arguments (payload/connection JSON).
+            env: Variables set in the child's environment, over the server's.
+
+        Returns:
+            WarmProcess with text-mode stdout/stderr pipes.
+
+        Raises:
+            OSError: If the server cannot be started or reached.
+        """
+        with self._lock:
+            self._ensure_server()
+            socket_path = self._socket_path
+
+        out_r, out_w = os.pipe()
+        err_r, err_w = os.pipe()
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        lines = _LineConnection(conn)
+        try:
+            conn.connect(socket_path)
+            request = json.dumps({"operator_path": operator_path, "args": list(args), "env": env or {}}) + "\n"
+            socket.send_fds(conn, [request.encode()], [out_w, err_w])
+            pid = int(lines.readline(self.start_timeout))
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            conn.close()
+            for fd in (out_r, err_r):
+                os.close(fd)
+            raise OSError("operator fork server did not accept the launch")
+        finally:
+            os.close(out_w)
+            os.close(err_w)
+
+        return WarmProcess(
+            lines, pid,
+            open(out_r, "r", errors="replace"),
+            open(err_r, "r", errors="replace"),
+        )
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1], json.loads(sys.argv[2]), sys.argv[3] or None)
@@ -0,0 +1,208 @@
+"""
+Incremental capture of operator stdout/stderr into compressed log chunks.
+
+process.communicate() used to hold an operator's entire output in worker
+memory. Here each stream is read line by line on its own thread and appended
+to a LogWriter, which zlib-compresses and inserts a chunk into the capped
+'task_logs' collection whenever its buffer reaches chunk_bytes or
+flush_seconds have passed. Worker memory per run is therefore bounded by
+two chunk buffers plus a short stderr/stdout tail kept for fail_reason and
+the worker log. The backend serves and follows these chunks through
+GET /tasks/{task_name}/logs.
+
+capture_output_async does the same for asyncio subprocesses (see
+async_executor.py), reading the pipes on the event loop and doing the
+MongoDB writes in the loop's thread pool.
+"""
+
+import asyncio
+import codecs
+import collections
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+
+from bson.binary import Binary
+from pymongo.errors import PyMongoError
+
+
+LOGS_COLLECTION = "task_logs"
+
+
+class LogWriter:
+    """Buffers one run's output and writes it as compressed, ordered chunks.
+
+    Chunk documents: {task_name, run_id, attempt_number, seq, stream, data,
+    created_at, final}; seq orders chunks of both streams within a run, and
+    every run ends with an empty final=True chunk whose stream is None.
+    """
+
+    def __init__(self, db, task_name: str, run_id: str, attempt_number: int,
+                 chunk_bytes: int = 65536, flush_seconds: float = 1.0, tail_bytes: int = 4096):
+        """Initialize the writer.
+
+        Args:
+            db: Synchronous pymongo database.
+            task_name: Task the output belongs to.
+            run_id: Identifier of this attempt's run.
+            attempt_number: Attempt number of this run.
+            chunk_bytes: Uncompressed bytes buffered per stream before a chunk is written.
+            flush_seconds: Maximum age of buffered output before it is written anyway.
+            tail_bytes: Bytes of the end of each stream kept in memory.
+        """
+        self.collection = db[LOGS_COLLECTION]
+        self.task_name = task_name
+        self.run_id = run_id
+        self.attempt_number = attempt_number
+        self.chunk_bytes = chunk_bytes
+        self.flush_seconds = flush_seconds
+        self.tail_bytes = tail_bytes
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._buffers = {"stdout": [], "stderr": []}
+        self._sizes = {"stdout": 0, "stderr": 0}
+        self._tails = {"stdout": collections.deque(), "stderr": collections.deque()}
+        self._tail_sizes = {"stdout": 0, "stderr": 0}
+        self._last_flush = time.monotonic()
+
+    def write(self, stream: str, text: str):
+        """Append output from one stream, writing a chunk once the buffer is full."""
+        with self._lock:
+            self._buffers[stream].append(text)
+            self._sizes[stream] += len(text)
+            self._remember_tail(stream, text)
+            if self._sizes[stream] >= self.chunk_bytes:
+                self._flush_stream(stream)
+
+    def flush_if_due(self):
+        """Write buffered output older than flush_seconds (called periodically)."""
+        with self._lock:
+            if time.monotonic() - self._last_flush >= self.flush_seconds:
+                for stream in self._buffers:
+                    self._flush_stream(stream)
+                self._last_flush = time.monotonic()
+
+    def close(self):
+        """Write all remaining output and mark the run's log as complete."""
+        with self._lock:
+            for stream in self._buffers:
+                self._flush_stream(stream)
+            self._insert(None, b"", final=True)
+
+    def tail(self, stream: str) -> str:
+        """The last tail_bytes (approximately) of a stream."""
+        with self._lock:
+            return "".join(self._tails[stream])
+
+    def _remember_tail(self, stream: str, text: str):
+        tail = self._tails[stream]
+        tail.append(text)
+        self._tail_sizes[stream] += len(text)
+        while len(tail) > 1 and self._tail_sizes[stream] - len(tail[0]) >= self.tail_bytes:
+            self._tail_sizes[stream] -= len(tail.popleft())
+
+    def _flush_stream(self, stream: str):
+        if not self._buffers[stream]:
+            return
+        data = "".join(self._buffers[stream]).encode("utf-8")
+        self._buffers[stream] = []
+        self._sizes[stream] = 0
+        self._insert(stream, zlib.compress(data))
+
+    def _insert(self, stream: str, data: bytes, final: bool = False):
+        # A failed write drops the chunk rather than killing the reader
+        # thread, which would leave the pipe full and block the operator.
+        self._seq += 1
+        try:
+            self.collection.insert_one({
+                "task_name": self.task_name,
+                "run_id": self.run_id,
+                "attempt_number": self.attempt_number,
+                "seq": self._seq,
+                "stream": stream,
+                "data": Binary(data),
+                "created_at": datetime.now(timezone.utc),
+                "final": final,
+            })
+        except PyMongoError as e:
+            print(f"[Worker] Dropped a log chunk of '{self.task_name}': {e}")
+
+
+def _pump(pipe, stream: str, writer: LogWriter):
+    """Copy one pipe into the writer line by line until EOF.
+
+    Lines are read in pieces of at most chunk_bytes, so a huge line without
+    a newline cannot be buffered whole either.
+    """
+    for line in iter(lambda: pipe.readline(writer.chunk_bytes), ""):
+        writer.write(stream, line)
+    pipe.close()
+
+
+def capture_output(process, writer: LogWriter):
+    """Stream a process's stdout and stderr into a LogWriter until it exits.
+
+    Replaces process.communicate(): output never accumulates in memory
+    beyond the writer's chunk buffers and tails.
+
+    Args:
+        process: subprocess.Popen started with text-mode stdout/stderr pipes.
+        writer: LogWriter for this run.
+
+    Returns:
+        Tuple of (stdout tail, stderr tail).
+    """
+    readers = [
+        threading.Thread(target=_pump, args=(process.stdout, "stdout", writer), daemon=True),
+        threading.Thread(target=_pump, args=(process.stderr, "stderr", writer), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+    while True:
+        alive = [reader for reader in readers if reader.is_alive()]
+        if not alive:
+            break
+        alive[0].join(writer.flush_seconds)
+        writer.flush_if_due()
+    process.wait()
+    writer.close()
+    return writer.tail("stdout"), writer.tail("stderr")
+
+
+async def _pump_async(reader: asyncio.StreamReader, stream: str, writer: LogWriter):
+    """Copy one asyncio pipe into the writer until EOF.
+
+    Reads at most chunk_bytes at a time and decodes incrementally, so a
+    multi-byte character split across reads is not mangled.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    while True:
+        data = await reader.read(writer.chunk_bytes)
+        text = decoder.decode(data, final=not data)
+        if text:
+            await asyncio.to_thread(writer.write, stream, text)
+        if not data:
+            break
+
+
+async def capture_output_async(process: asyncio.subprocess.Process, writer: LogWriter):
+    """Stream an asyncio subprocess's stdout and stderr into a LogWriter until it exits.
+
+    Args:
+        process: Process from asyncio.create_subprocess_exec with stdout/stderr pipes.
+        writer: LogWriter for this run.
+
+    Returns:
+        Tuple of (stdout tail, stderr tail).
+    """
+    pumps = asyncio.gather(
+        _pump_async(process.stdout, "stdout", writer),
+        _pump_async(process.stderr, "stderr", writer),
+    )
+    while not (await asyncio.wait({pumps}, timeout=writer.flush_seconds))[0]:
+        await asyncio.to_thread(writer.flush_if_due)
+    await pumps
+    await process.wait()
+    await asyncio.to_thread(writer.close)
+    return writer.tail("stdout"), writer.tail("stderr")
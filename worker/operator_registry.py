@@ -0,0 +1,192 @@
+"""
+Cached validation and bytecode for operator scripts.
+
+validate_operator used to read and ast.parse the operator script on every
+execution, and the interpreter then compiled the same source again. The
+registry scans worker/operators/ once at startup and keeps, per script, the
+validation result and the compiled code object, keyed by absolute path and
+checked against the file's mtime/size and SHA-256 of its contents:
+
+  * lookup() costs one os.stat() and a dict lookup while the file is unchanged;
+  * a changed mtime re-hashes the file, and only a changed hash re-parses,
+    re-validates and re-compiles it (touching a file is not enough);
+  * scan() picks up added and removed scripts incrementally.
+
+The worker publishes the entries of operator_dir to the Redis hash
+'operator_registry' so the API can reject unknown operator_path values when a
+task is created, and the fork server runs launches from the cached code.
+"""
+
+import ast
+import glob
+import hashlib
+import json
+import os
+import threading
+
+
+REGISTRY_KEY = "operator_registry"
+REQUIRED_METHODS = ("initialize", "run", "finish")
+
+
+class OperatorEntry:
+    """Validation result and compiled code of one version of a script."""
+
+    def __init__(self, path: str, mtime_ns: int, size: int, sha256: str,
+                 valid: bool, reason: str = None, class_name: str = None, code=None):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.sha256 = sha256
+        self.valid = valid
+        self.reason = reason
+        self.class_name = class_name
+        self.code = code
+
+    def to_json(self) -> str:
+        """Serialized form stored in the Redis registry hash."""
+        return json.dumps({
+            "valid": self.valid,
+            "reason": self.reason,
+            "class_name": self.class_name,
+            "sha256": self.sha256,
+        })
+
+
+def inspect_operator(tree: ast.Module):
+    """Find a class inheriting from BaseOperator that has initialize, run and finish.
+
+    Args:
+        tree: Parsed operator script.
+
+    Returns:
+        Tuple of (class name, None) if found, or (None, reason) otherwise.
+    """
+    for cls in (node for node in tree.body if isinstance(node, ast.ClassDef)):
+        bases = [b.id for b in cls.bases if isinstance(b, ast.Name)]
+        if 'BaseOperator' not in bases:
+            continue
+        methods = [m.name for m in cls.body if isinstance(m, ast.FunctionDef)]
+        if all(name in methods for name in REQUIRED_METHODS):
+            return cls.name, None
+    return None, "no BaseOperator subclass defining initialize, run and finish"
+
+
+class OperatorRegistry:
+    """Per-process cache of operator validation results and bytecode."""
+
+    def __init__(self, operator_dir: str):
+        """Initialize an empty registry; call scan() to populate it.
+
+        Args:
+            operator_dir: Directory of operator scripts published to the API.
+        """
+        self.operator_dir = os.path.abspath(operator_dir)
+        self._lock = threading.Lock()
+        self._entries = {}  # absolute path -> OperatorEntry
+
+    def scan(self) -> bool:
+        """Revalidate every script in operator_dir and forget removed ones.
+
+        Returns:
+            True if any entry of operator_dir was added, changed or removed.
+        """
+        paths = set(os.path.abspath(p) for p in glob.glob(os.path.join(self.operator_dir, "*.py")))
+        changed = False
+        with self._lock:
+            for path in [p for p in self._entries if self._in_operator_dir(p) and p not in paths]:
+                del self._entries[path]
+                changed = True
+        for path in sorted(paths):
+            with self._lock:
+                before = self._entries.get(path)
+            changed = self.lookup(path) is not before or changed
+        return changed
+
+    def lookup(self, operator_path: str):
+        """Return the current entry for a script, revalidating it only if it changed.
+
+        Args:
+            operator_path: Script path, absolute or relative to the working directory.
+
+        Returns:
+            OperatorEntry, or None if the file does not exist.
+        """
+        path = os.path.abspath(operator_path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            with self._lock:
+                self._entries.pop(path, None)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is not None and (entry.mtime_ns, entry.size) == (stat.st_mtime_ns, stat.st_size):
+            return entry
+
+        try:
+            with open(path, 'rb') as f:
+                source = f.read()
+        except OSError as e:
+            print(f"[Registry] Could not read operator script at {path}: {e}")
+            return None
+
+        sha256 = hashlib.sha256(source).hexdigest()
+        if entry is not None and entry.sha256 == sha256:
+            entry.mtime_ns, entry.size = stat.st_mtime_ns, stat.st_size
+            return entry
+
+        entry = self._build(path, source, sha256, stat)
+        with self._lock:
+            self._entries[path] = entry
+        print(f"[Registry] {'Validated' if entry.valid else 'Rejected'} operator {path}"
+              f"{'' if entry.valid else f': {entry.reason}'}")
+        return entry
+
+    def published(self) -> dict:
+        """Entries of operator_dir keyed by their path relative to its parent.
+
+        Keys look like 'operators/example_operator.py', the form task
+        configs use when the worker runs from worker/.
+        """
+        base = os.path.dirname(self.operator_dir)
+        with self._lock:
+            return {
+                os.path.relpath(path, base).replace(os.sep, "/"): entry
+                for path, entry in sorted(self._entries.items())
+                if self._in_operator_dir(path)
+            }
+
+    def publish(self, client):
+        """Replace the Redis registry hash with this registry's operator_dir entries.
+
+        Args:
+            client: Synchronous Redis client.
+        """
+        entries = self.published()
+        pipe = client.pipeline()
+        pipe.delete(REGISTRY_KEY)
+        if entries:
+            pipe.hset(REGISTRY_KEY, mapping={key: e.to_json() for key, e in entries.items()})
+        pipe.execute()
+
+    def _in_operator_dir(self, path: str) -> bool:
+        return os.path.dirname(path) == self.operator_dir
+
+    def _build(self, path: str, source: bytes, sha256: str, stat) -> OperatorEntry:
+        """Parse, validate and compile one version of a script."""
+        try:
+            tree = ast.parse(source, filename=path)
+        except (SyntaxError, ValueError) as e:
+            return OperatorEntry(path, stat.st_mtime_ns, stat.st_size, sha256,
+                                 valid=False, reason=f"cannot parse: {e}")
+        class_name, reason = inspect_operator(tree)
+        try:
+            code = compile(tree, path, "exec")
+        except (SyntaxError, ValueError) as e:
+            return OperatorEntry(path, stat.st_mtime_ns, stat.st_size, sha256,
+                                 valid=False, reason=f"cannot compile: {e}")
+        return OperatorEntry(path, stat.st_mtime_ns, stat.st_size, sha256,
+                             valid=class_name is not None, reason=reason,
+                             class_name=class_name, code=code)
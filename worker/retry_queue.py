@@ -0,0 +1,74 @@
+"""
+Delayed retries through a Redis sorted set instead of Celery countdowns.
+
+A failed attempt used to call self.retry(countdown=30): Celery delivered an
+ETA message that the worker held in memory for 30 s, and every task failing
+at the same moment retried at the same moment. Now the worker computes the
+delay from the task's retry_backoff, writes it to the task documents as
+retry_after, and adds the task to 'retry_queue' scored by the time it is due
+(ms, Redis clock). The scheduler moves due members onto the dispatch queue
+at the task's priority (TaskManager.run_retry_loop), so nothing waits in
+worker memory and a worker restart loses no retries.
+
+The delay of attempt n is min(max_seconds, base_seconds * factor ** (n - 1)),
+of which a random fraction up to jitter is taken off: jitter 0 retries
+exactly on the exponential curve, jitter 1 anywhere between now and it
+("full jitter"). Correlated failures are spread out instead of retrying in
+lockstep.
+"""
+
+import random
+
+import redis
+
+
+RETRY_QUEUE = "retry_queue"
+# Priority each queued retry is dispatched with: task name -> priority.
+RETRY_PRIORITIES = "retry_queue:priority"
+
+# Defaults of the retry_backoff fields (see models.RetryBackoff).
+DEFAULT_BACKOFF = {"base_seconds": 30, "factor": 2, "max_seconds": 3600, "jitter": 0.5}
+
+# Trace context the retry is dispatched with (see backend/tracing.py).
+DISPATCH_TRACES = "dispatch_queue:trace"
+
+# KEYS[1] = retry queue, KEYS[2] = priorities hash, KEYS[3] = trace context
+# hash; ARGV[1] = task name, ARGV[2] = delay in ms, ARGV[3] = priority,
+# ARGV[4] = traceparent or ''.
+SCHEDULE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+redis.call('ZADD', KEYS[1], string.format('%d', now + tonumber(ARGV[2])), ARGV[1])
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[3])
+if ARGV[4] ~= '' then
+    redis.call('HSET', KEYS[3], ARGV[1], ARGV[4])
+end
+return 1
+"""
+
+
+def backoff_delay(attempt_num: int, backoff: dict = None, rng: random.Random = random) -> float:
+    """Seconds to wait before the attempt after attempt_num.
+
+    Args:
+        attempt_num: Number of the attempt that just failed (1-based).
+        backoff: retry_backoff fields; missing ones fall back to DEFAULT_BACKOFF.
+        rng: Source of the jitter.
+
+    Returns:
+        Delay in seconds.
+    """
+    policy = {**DEFAULT_BACKOFF, **{k: v for k, v in (backoff or {}).items() if v is not None}}
+    delay = min(policy["max_seconds"], policy["base_seconds"] * policy["factor"] ** (attempt_num - 1))
+    return delay * (1 - policy["jitter"] * rng.random())
+
+
+def schedule_retry(client: redis.Redis, task_name: str, delay_seconds: float, priority: int = 3,
+                   traceparent: str = None):
+    """Queue the task's next attempt to be dispatched after delay_seconds.
+
+    A task already waiting for a retry is moved to the new time. With a
+    traceparent, the retry is traced as part of the same firing.
+    """
+    client.eval(SCHEDULE_SCRIPT, 3, RETRY_QUEUE, RETRY_PRIORITIES, DISPATCH_TRACES,
+                task_name, int(delay_seconds * 1000), int(priority), traceparent or "")
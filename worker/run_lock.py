@@ -0,0 +1,144 @@
+"""
+Per-task run lock: a Redis lease with fencing tokens.
+
+Without it a slow cron run and the next firing, or an ad-hoc run, could
+execute the same task on two workers at once. Before an operator is
+spawned the worker takes 'lock:run:<task>', a lease that expires after
+ttl_seconds unless renewed. The lock is acquired with one Lua call, so a
+duplicate run is rejected without forking anything.
+
+Every successful acquire also INCRs 'lock:fence:<task>' and returns the
+new value as a fencing token. The worker stores it on the task documents
+(lock_token) and its later state writes only match documents whose
+lock_token is not higher, so a run whose lease expired (paused worker,
+network split) cannot overwrite the state of the run that replaced it.
+
+Leases held by a process are renewed by one background thread with a single
+pipeline per renew interval; a crashed worker's lease simply expires.
+"""
+
+import os
+import threading
+
+import redis
+
+
+ACQUIRE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return {0, tonumber(redis.call('GET', KEYS[1]))}
+end
+local token = redis.call('INCR', KEYS[2])
+redis.call('SET', KEYS[1], token, 'PX', ARGV[1])
+return {1, token}
+"""
+
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+def fenced(fence: int) -> dict:
+    """Filter clause matching task documents not yet claimed by a newer run."""
+    return {"lock_token": {"$not": {"$gt": fence}}}
+
+
+class RunLock:
+    """Acquires, renews and releases per-task run leases."""
+
+    def __init__(self, client: redis.Redis, ttl_seconds: float = 30, prefix: str = "lock"):
+        """Initialize the lock; the renewal thread starts on the first acquire().
+
+        Args:
+            client: Synchronous Redis client.
+            ttl_seconds: Lease length; leases are renewed every third of it.
+            prefix: Key prefix for the lease and fencing counter keys.
+        """
+        self.redis = client
+        self.ttl_ms = int(ttl_seconds * 1000)
+        self.prefix = prefix
+        self._acquire = client.register_script(ACQUIRE_SCRIPT)
+        self._release = client.register_script(RELEASE_SCRIPT)
+        self._renew = client.register_script(RENEW_SCRIPT)
+        self._start_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._held = {}  # task_name -> token
+        self._pid = None
+
+    def _keys(self, task_name: str):
+        return [f"{self.prefix}:run:{task_name}", f"{self.prefix}:fence:{task_name}"]
+
+    def acquire(self, task_name: str):
+        """Try to take the task's lease.
+
+        Args:
+            task_name: Task about to run.
+
+        Returns:
+            Tuple of (acquired, token): this run's fencing token if acquired,
+            otherwise the token of the run holding the lease.
+        """
+        acquired, token = self._acquire(keys=self._keys(task_name), args=[self.ttl_ms])
+        if acquired:
+            self._ensure_started()
+            with self._lock:
+                self._held[task_name] = int(token)
+        return bool(acquired), int(token)
+
+    def release(self, task_name: str, token: int) -> bool:
+        """Give the lease up if this run still holds it.
+
+        Returns:
+            True if the lease was released, False if it had already expired
+            or been taken over.
+        """
+        with self._lock:
+            if self._held.get(task_name) == token:
+                del self._held[task_name]
+        return bool(self._release(keys=self._keys(task_name)[:1], args=[token]))
+
+    def _ensure_started(self):
+        """Start the renewal thread in this process (again after a fork)."""
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._lock = threading.Lock()
+            self._held = {}
+            threading.Thread(target=self._run, name="run-lock-renewer", daemon=True).start()
+            self._pid = os.getpid()
+
+    def renew_all(self):
+        """Extend every lease this process holds, in one pipeline."""
+        with self._lock:
+            held = list(self._held.items())
+        if not held:
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        for task_name, token in held:
+            self._renew(keys=self._keys(task_name)[:1], args=[token, self.ttl_ms], client=pipe)
+        for (task_name, token), renewed in zip(held, pipe.execute()):
+            if not renewed:
+                print(f"[RunLock] Lost the lease of '{task_name}' (token {token})")
+                with self._lock:
+                    if self._held.get(task_name) == token:
+                        del self._held[task_name]
+
+    def _run(self):
+        interval = self.ttl_ms / 3000
+        while True:
+            threading.Event().wait(interval)
+            try:
+                self.renew_all()
+            except redis.RedisError as e:
+                print(f"[RunLock] Lease renewal failed: {e}")
@@ -0,0 +1,140 @@
+"""
+Coalesced task state writes for the worker.
+
+A run used to issue a separate update_one per field change on both
+queue_table and schedules: RUNNING, the result with its history entry, then
+on failure a $inc of num_of_retries and another state change (7-9 round
+trips). Each state transition is now built as one update document that is
+applied to both collections, plus the attempt insert, through a StateWriter:
+
+  * "direct" mode writes every transition immediately, one bulk_write per
+    collection it touches;
+  * "write_behind" mode queues transitions and a background thread flushes
+    everything queued every flush_ms as one ordered bulk_write per
+    collection, so concurrent runs share round trips.
+
+Ordering per task is preserved (one FIFO, ordered bulk writes). Follow-ups
+that must not overtake the write, such as asking the backend to reschedule
+the task, are passed as on_written callbacks and run once it has landed.
+Transitions can carry extra match clauses, e.g. a run lock's fencing
+token, so they no longer apply once a newer run has claimed the task (see
+run_lock.py).
+"""
+
+import atexit
+import os
+import threading
+from collections import OrderedDict
+
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import PyMongoError
+
+
+TASK_COLLECTIONS = ("queue_table", "schedules")
+ATTEMPTS_COLLECTION = "task_attempts"
+
+
+class StateWriter:
+    """Applies task state transitions to queue_table, schedules and task_attempts."""
+
+    def __init__(self, db, write_behind: bool = False, flush_ms: float = 5, max_batch: int = 1000):
+        """Initialize the writer.
+
+        Args:
+            db: Synchronous pymongo database.
+            write_behind: Queue transitions and flush them in batches.
+            flush_ms: Interval between write-behind flushes.
+            max_batch: Transitions flushed per batch at most.
+        """
+        self.db = db
+        self.write_behind = write_behind
+        self.flush_interval = flush_ms / 1000
+        self.max_batch = max_batch
+        self._start_lock = threading.Lock()
+        self._lock = threading.Condition()
+        self._pending = []
+        self._pid = None
+
+    def apply(self, task_name: str, update: dict, attempt_doc: dict = None, on_written=None,
+              match: dict = None):
+        """Apply one transition to the task's queue_table and schedules documents.
+
+        Args:
+            task_name: Task the transition belongs to.
+            update: Update document applied to both collections.
+            attempt_doc: Optional task_attempts document inserted with it.
+            on_written: Optional callable run once the transition is written.
+            match: Extra filter clauses the task documents must satisfy.
+        """
+        transition = (task_name, update, attempt_doc, on_written, match)
+        if not self.write_behind:
+            self._write([transition])
+            return
+        self._ensure_started()
+        with self._lock:
+            self._pending.append(transition)
+            self._lock.notify()
+
+    def call_after_writes(self, callback):
+        """Run callback once every transition applied so far has been written."""
+        self.apply(None, None, on_written=callback)
+
+    def flush(self):
+        """Write every queued transition now (write-behind mode)."""
+        while True:
+            with self._lock:
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+            if not batch:
+                return
+            self._write(batch)
+
+    def _ensure_started(self):
+        """Start the flush thread in this process (again after a fork)."""
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._lock = threading.Condition()
+            self._pending = []
+            threading.Thread(target=self._run, name="state-writer", daemon=True).start()
+            atexit.register(self.flush)
+            self._pid = os.getpid()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._pending:
+                    self._lock.wait()
+            # Let transitions of concurrent runs accumulate for one interval.
+            threading.Event().wait(self.flush_interval)
+            self.flush()
+
+    def _write(self, batch):
+        """Write a batch of transitions with one bulk_write per collection."""
+        requests = OrderedDict((name, []) for name in TASK_COLLECTIONS + (ATTEMPTS_COLLECTION,))
+        for task_name, update, attempt_doc, _, match in batch:
+            if attempt_doc is not None:
+                requests[ATTEMPTS_COLLECTION].append(InsertOne(attempt_doc))
+            if update is None:
+                continue
+            query = {"task_name": task_name, **(match or {})}
+            for name in TASK_COLLECTIONS:
+                requests[name].append(UpdateOne(query, update))
+
+        for name, ops in requests.items():
+            if not ops:
+                continue
+            try:
+                self.db[name].bulk_write(ops, ordered=True)
+            except PyMongoError as e:
+                print(f"[StateWriter] Bulk write of {len(ops)} op(s) to {name} failed: {e}")
+
+        for task_name, _, _, on_written, _ in batch:
+            if on_written is None:
+                continue
+            try:
+                on_written()
+            except Exception as e:
+                print(f"[StateWriter] Follow-up for '{task_name}' failed: {e}")
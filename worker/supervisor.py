@@ -0,0 +1,190 @@
+"""
+One cancellation/timeout supervisor per worker process.
+
+Replaces a polling watchdog thread per running operator (each calling
+EXISTS cancel:<task> once a second) with a single supervisor thread that
+keeps a heap of timeout deadlines and sleeps until the earliest one. Cancels
+arrive instantly over the Redis 'task_cancel' pub/sub channel; the
+cancel:<task> keys the API also sets are swept with one MGET for all
+supervised tasks per cancel_poll_seconds, which catches cancels issued before
+a run started or while the subscription was down. Redis traffic is therefore
+constant however many operators run concurrently.
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+
+import redis
+
+
+CANCEL_CHANNEL = "task_cancel"
+
+
+class RunWatch:
+    """One supervised operator process."""
+
+    def __init__(self, task_name: str, process, deadline: float,
+                 cancelled: threading.Event, timed_out: threading.Event):
+        self.task_name = task_name
+        self.process = process
+        self.deadline = deadline
+        self.cancelled = cancelled
+        self.timed_out = timed_out
+        self.finished = False
+
+    @property
+    def stopped(self) -> bool:
+        """True once the supervisor has terminated the process."""
+        return self.cancelled.is_set() or self.timed_out.is_set()
+
+
+class RunSupervisor:
+    """Terminates supervised processes on cancel or when their timeout expires."""
+
+    def __init__(self, client: redis.Redis, channel: str = CANCEL_CHANNEL,
+                 cancel_poll_seconds: float = 1.0):
+        """Initialize the supervisor; its threads start on the first watch().
+
+        Args:
+            client: Synchronous Redis client.
+            channel: Pub/sub channel the API publishes cancelled task names on.
+            cancel_poll_seconds: Interval of the cancel:<task> key sweep.
+        """
+        self.redis = client
+        self.channel = channel
+        self.cancel_poll_seconds = cancel_poll_seconds
+        self._start_lock = threading.Lock()
+        self._lock = threading.Condition()
+        self._deadlines = []
+        self._watches = {}
+        self._sequence = itertools.count()
+        self._pid = None
+
+    def _ensure_started(self):
+        """Start the supervisor threads in this process.
+
+        Threads do not survive a fork, so a Celery prefork child that
+        inherited a started supervisor gets fresh state and threads.
+        """
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._lock = threading.Condition()
+            self._deadlines = []
+            self._watches = {}
+            threading.Thread(target=self._run, name="run-supervisor", daemon=True).start()
+            threading.Thread(target=self._listen, name="cancel-listener", daemon=True).start()
+            self._pid = os.getpid()
+
+    def watch(self, task_name: str, process, timeout_seconds: float,
+              cancelled: threading.Event = None, timed_out: threading.Event = None) -> RunWatch:
+        """Supervise a process until unwatch() is called.
+
+        Args:
+            task_name: Task the process runs; cancels are matched on it.
+            process: subprocess.Popen-like object with terminate().
+            timeout_seconds: Maximum allowed runtime in seconds.
+            cancelled: Optional event to set on cancellation.
+            timed_out: Optional event to set on timeout.
+
+        Returns:
+            The RunWatch; its cancelled/timed_out events report what happened.
+        """
+        watch = RunWatch(task_name, process, time.monotonic() + timeout_seconds,
+                         cancelled or threading.Event(), timed_out or threading.Event())
+        self._ensure_started()
+        with self._lock:
+            self._watches.setdefault(task_name, []).append(watch)
+            heapq.heappush(self._deadlines, (watch.deadline, next(self._sequence), watch))
+            self._lock.notify()
+        return watch
+
+    def unwatch(self, watch: RunWatch):
+        """Stop supervising a process once it has exited.
+
+        Its deadline entry is left in the heap and skipped when it comes due.
+        """
+        with self._lock:
+            watch.finished = True
+            watches = self._watches.get(watch.task_name, [])
+            if watch in watches:
+                watches.remove(watch)
+            if not watches:
+                self._watches.pop(watch.task_name, None)
+
+    def cancel(self, task_name: str) -> int:
+        """Terminate every supervised run of a task.
+
+        Returns:
+            Number of processes terminated.
+        """
+        with self._lock:
+            watches = [w for w in self._watches.get(task_name, []) if not w.stopped]
+            for watch in watches:
+                print(f"[Supervisor] Cancel for '{task_name}'. Terminating.")
+                watch.cancelled.set()
+                watch.process.terminate()
+        if watches:
+            self.redis.delete(f"cancel:{task_name}")
+        return len(watches)
+
+    def _expire(self, now: float):
+        """Terminate every run whose deadline has passed (lock held)."""
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _, _, watch = heapq.heappop(self._deadlines)
+            if watch.finished or watch.stopped:
+                continue
+            print(f"[Supervisor] Timeout for '{watch.task_name}'. Terminating.")
+            watch.timed_out.set()
+            watch.process.terminate()
+
+    def _sweep_cancel_keys(self):
+        """Check every supervised task's cancel key in a single MGET."""
+        with self._lock:
+            names = list(self._watches)
+        if not names:
+            return
+        flags = self.redis.mget([f"cancel:{name}" for name in names])
+        for name, flag in zip(names, flags):
+            if flag is not None:
+                self.cancel(name)
+
+    def _run(self):
+        """Supervisor loop: sleep until the next deadline or key sweep."""
+        next_sweep = time.monotonic() + self.cancel_poll_seconds
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._expire(now)
+                wake_at = next_sweep
+                if self._deadlines:
+                    wake_at = min(wake_at, self._deadlines[0][0])
+                if wake_at > now:
+                    self._lock.wait(wake_at - now)
+
+            if time.monotonic() >= next_sweep:
+                try:
+                    self._sweep_cancel_keys()
+                except redis.RedisError as e:
+                    print(f"[Supervisor] Cancel sweep failed: {e}")
+                next_sweep = time.monotonic() + self.cancel_poll_seconds
+
+    def _listen(self):
+        """Apply cancels published on the cancel channel as they arrive."""
+        while True:
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    name = message["data"]
+                    self.cancel(name.decode("utf-8") if isinstance(name, bytes) else name)
+            except redis.RedisError as e:
+                print(f"[Supervisor] Cancel subscription lost, reconnecting: {e}")
+                time.sleep(1)
@@ -2,76 +2,226 @@ import json
 import subprocess
 import sys
 import os
-import ast
 import threading
 import time
-from datetime import datetime, timezone
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 
 from celery import Celery
+from celery.signals import worker_ready
 import redis
+from prometheus_client import Counter, Histogram
+from pydantic import ValidationError
 from pymongo import MongoClient
 
 # Add backend directory to sys.path so we can import TaskState and ExecutionAttempt
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
-from models import TaskState, ExecutionAttempt
-
-mongo_client = MongoClient("mongodb://localhost:27017")
+from models import TaskState, ExecutionAttempt, OverlapPolicy, TaskInRedis
+from events import TASK_EVENTS_CHANNEL, encode_task_event
+from supervisor import RunSupervisor, CANCEL_CHANNEL
+from log_capture import LogWriter, capture_output
+from forkserver import ForkServerClient
+from operator_registry import OperatorRegistry
+from state_writer import StateWriter
+from run_lock import RunLock, fenced
+from dispatcher import ClaimedItem
+from retry_queue import DEFAULT_BACKOFF, backoff_delay, schedule_retry
+from metrics import CALL_BUCKETS, LAG_BUCKETS, MongoLatencyListener, instrument_redis, start_exporter
+from tracing import (
+    DISPATCH_TRACES, TRACEPARENT_ENV, context_from, record_span, setup_tracing, to_ns, traceparent_of, tracer,
+)
+
+mongo_client = MongoClient("mongodb://localhost:27017", event_listeners=[MongoLatencyListener()])
 db = mongo_client.tasks_db
 
 app = Celery('tasks',
              broker='redis://localhost:6340/1',
              backend='redis://localhost:6340/2')
 
-redis_list_client = redis.Redis(host='localhost', port=6340, db=0)
+redis_list_client = instrument_redis(redis.Redis(host='localhost', port=6340, db=0))
+
+# Priority-ordered sorted set the scheduler queues due tasks on (see dispatcher.py).
+DISPATCH_QUEUE = "dispatch_queue"
+# Serialized TaskInRedis of each queued task, which runs need no MongoDB read for.
+DISPATCH_PAYLOADS = "dispatch_queue:payload"
+
+
+def load_config() -> dict:
+    """Read worker settings from config.json next to this file."""
+    config_path = os.path.join(os.path.dirname(__file__), 'config.json')
+    with open(config_path, 'r') as f:
+        return json.load(f)
+
+
+worker_config = load_config()
+
+# Attempts kept inline on the schedule/queue documents; the full history
+# lives in the task_attempts collection.
+EXECUTION_HISTORY_LIMIT = worker_config.get("execution_history_limit", 10)
+
+# Each priority has its own Celery queue, so a worker started with only
+# "-Q high" is capacity reserved for priority-1 tasks.
+PRIORITY_QUEUES = worker_config.get("priority_queues", {"1": "high", "2": "default", "3": "low"})
+app.conf.task_default_queue = "default"
+
+
+def priority_queue(priority: int) -> str:
+    """Name of the Celery queue tasks of the given priority are routed to."""
+    return PRIORITY_QUEUES.get(str(priority), "default")
+
+
+# Every state transition of a run is one update of queue_table and schedules;
+# with state_write_mode "write_behind" they are batched across runs.
+state_writer = StateWriter(
+    db,
+    write_behind=worker_config.get("state_write_mode", "direct") == "write_behind",
+    flush_ms=worker_config.get("state_flush_ms", 5),
+)
+
+# Backoff of failed attempts, unless the task sets its own retry_backoff.
+# Retries wait in Redis, not in worker memory (see retry_queue.py).
+RETRY_BACKOFF = {**DEFAULT_BACKOFF, **worker_config.get("retry_backoff", {})}
+
+# Only one run of a task executes at a time. A run that finds the task
+# locked follows the task's overlap_policy (see run_lock.py).
+run_lock = RunLock(redis_list_client, ttl_seconds=worker_config.get("run_lock_ttl_seconds", 30))
+OVERLAP_POLICY = worker_config.get("overlap_policy", OverlapPolicy.SKIP.value)
+LOCK_RETRY_SECONDS = worker_config.get("lock_retry_seconds", 5)
+LOCK_WAIT_SECONDS = worker_config.get("lock_wait_seconds", 3600)
+
+# States a dispatched run has before it starts. A run waiting for the lock
+# only shows ACQUIRING_LOCK / LOCK_FAILED over these, never over RUNNING.
+WAITING_STATES = [TaskState.PENDING.value, TaskState.READY.value,
+                  TaskState.RETRY.value, TaskState.ACQUIRING_LOCK.value]
+
+
+class LockBusy(Exception):
+    """Another run holds the task's lock; try again after LOCK_RETRY_SECONDS."""
+
+    def __init__(self, task_name: str, waiting_since: float, priority: int = 3):
+        super().__init__(f"'{task_name}' is locked by another run")
+        self.waiting_since = waiting_since
+        self.priority = priority
+
+
+# Cancels and timeouts of every operator this process runs.
+supervisor = RunSupervisor(
+    redis_list_client, cancel_poll_seconds=worker_config.get("cancel_poll_seconds", 1)
+)
+
+# With execution_mode "forkserver", operators are forked from a warm
+# interpreter instead of starting a new one per run (see forkserver.py).
+EXECUTION_MODE = worker_config.get("execution_mode", "subprocess")
+OPERATOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "operators")
+fork_server = ForkServerClient(
+    preload_modules=worker_config.get("operator_preload", []),
+    operator_dir=OPERATOR_DIR,
+)
+
+# Validation results and bytecode of operator scripts, keyed by file hash.
+# Scanned at import so forked pool processes inherit a warm cache.
+OPERATOR_SCAN_SECONDS = worker_config.get("operator_scan_seconds", 30)
+operator_registry = OperatorRegistry(OPERATOR_DIR)
+operator_registry.scan()
+
+# Worker metrics, served on metrics_port next to the MongoDB/Redis call
+# latencies (see backend/metrics.py). Run durations carry the task name only
+# with metrics_per_task, as every task is otherwise a time series of its own.
+METRICS_PORT = worker_config.get("metrics_port", 9808)
+METRICS_PER_TASK = worker_config.get("metrics_per_task", False)
+DISPATCH_LAG_SECONDS = Histogram(
+    "worker_dispatch_lag_seconds", "Time from next_run until the firing's first attempt started",
+    ["priority"], buckets=LAG_BUCKETS
+)
+SPAWN_SECONDS = Histogram(
+    "worker_operator_spawn_seconds", "Time to launch an operator process: warm (fork server), cold or async",
+    ["mode"], buckets=CALL_BUCKETS
+)
+RUN_SECONDS = Histogram(
+    "worker_run_duration_seconds", "Operator run time, by task (with metrics_per_task) and final state",
+    ["task_name", "state"], buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300, 600, 1800, 3600)
+)
+RETRIES = Counter(
+    "worker_retries_total", "Failed attempts, by whether a retry was queued or none were left",
+    ["outcome"]
+)
+
+# Each run's stages are traced under the trace its firing was queued with
+# (see backend/tracing.py); trace_exporter "none" records nothing.
+setup_tracing("worker", worker_config.get("trace_exporter", "none"), worker_config.get("trace_file"))
 
 
 def validate_operator(operator_path: str) -> bool:
-    """Validate that the script contains a class inheriting from BaseOperator and having initialize, run, finish."""
-    try:
-        if not os.path.exists(operator_path):
-            return False
-            
-        with open(operator_path, 'r', encoding='utf-8') as f:
-            tree = ast.parse(f.read())
-            
-        classes = [node for node in tree.body if isinstance(node, ast.ClassDef)]
-        
-        for cls in classes:
-            bases = [b.id for b in cls.bases if isinstance(b, ast.Name) and hasattr(b, 'id')]
-            if 'BaseOperator' not in bases:
-                continue
-                
-            methods = [m.name for m in cls.body if isinstance(m, ast.FunctionDef)]
-            if 'initialize' in methods and 'run' in methods and 'finish' in methods:
-                return True
-                
-        return False
-    except Exception as e:
-        print(f"[Worker] Failed to validate operator script at {operator_path}: {e}")
+    """Validate that the script contains a class inheriting from BaseOperator and having initialize, run, finish.
+
+    Served from the operator registry: the script is only re-parsed when its
+    contents changed since the last lookup.
+    """
+    entry = operator_registry.lookup(operator_path)
+    if entry is None:
         return False
+    if not entry.valid:
+        print(f"[Worker] Operator script at {operator_path} is invalid: {entry.reason}")
+    return entry.valid
+
+
+def publish_operator_registry():
+    """Rescan worker/operators/ and publish it for the API's operator_path check."""
+    operator_registry.scan()
+    try:
+        operator_registry.publish(redis_list_client)
+    except redis.RedisError as e:
+        print(f"[Worker] Could not publish the operator registry: {e}")
+
+
+@worker_ready.connect
+def start_metrics_exporter(**_):
+    """Serve the worker's metrics once the worker is up."""
+    start_exporter(METRICS_PORT)
+
+
+@worker_ready.connect
+def start_operator_registry_refresh(**_):
+    """Publish the registry once the worker is up and refresh it periodically."""
+    def refresh_loop():
+        while True:
+            publish_operator_registry()
+            time.sleep(OPERATOR_SCAN_SECONDS)
+
+    threading.Thread(target=refresh_loop, daemon=True, name="operator-registry").start()
 
 
 @app.task
 def check_redis_queue():
-    print("[Celery Beat]: Checking Redis 'batch_run'...")
+    print(f"[Celery Beat]: Checking Redis '{DISPATCH_QUEUE}'...")
     
     task_done=0
     while True:
-        task_name_bytes = redis_list_client.rpop("batch_run")
-        if not task_name_bytes:
+        popped = redis_list_client.zpopmin(DISPATCH_QUEUE)
+        if not popped:
             break
-
-        task_name = task_name_bytes.decode('utf-8')
+        task_name_bytes, score = popped[0]
+        with redis_list_client.pipeline() as pipe:
+            pipe.lpop(f"{DISPATCH_QUEUE}:ready")
+            for key in (DISPATCH_TRACES, DISPATCH_PAYLOADS):
+                pipe.hget(key, task_name_bytes)
+                pipe.hdel(key, task_name_bytes)
+            _, trace, _, payload, _ = pipe.execute()
+
+        item = ClaimedItem.from_score(task_name_bytes, score, trace, payload)
+        task_name = str(item)
         print(f"[Celery Beat]: Found task! '{task_name}'. Sending to worker...")
 
-        execute_operator_task.delay(task_name)
+        execute_operator_task.apply_async((task_name,), dispatch_kwargs(item),
+                                          queue=priority_queue(item.priority))
         # print_the_name.delay(task_name)        
         task_done+=1
 
     if task_done>0:
         print(f"[Celery beat] : no. of invoked task = {task_done} ")
     else:
-        print("[Celery Beat]: Batch_run is empty...No tasks found.")
+        print("[Celery Beat]: Dispatch queue is empty...No tasks found.")
 
 @app.task
 def print_the_name(task_name):
@@ -86,30 +236,64 @@ def print_the_name(task_name):
 @app.task
 def mark_task_completed(task_name):
     """Mark a task as COMPLETED in both queue_table and schedules after successful execution."""
-    db.queue_table.update_one({"task_name": task_name}, {"$set": {"state": TaskState.COMPLETED.value}})
-    db["schedules"].update_one({"task_name": task_name}, {"$set": {"state": TaskState.COMPLETED.value}})
+    state_writer.apply(task_name, {"$set": {"state": TaskState.COMPLETED.value}})
+    publish_task_event(task_name, state=TaskState.COMPLETED.value)
     print(f"marked task as completed - {task_name}")
 
 @app.task
-def mark_task_state(task_name: str, state: str, fail_reason: str = None):
-    """Updates the state of a task in the database."""
-    update_data = {"state": state}
-    db.queue_table.update_one({"task_name": task_name}, {"$set": update_data})
-    db["schedules"].update_one({"task_name": task_name}, {"$set": update_data})
+def mark_task_state(task_name: str, state: str, fail_reason: str = None, fence: int = None):
+    """Updates the state of a task in the database.
+
+    With a fence (run lock token) the task documents are claimed for that
+    run, and the update is skipped if a newer run has claimed them already.
+    """
+    update = {"$set": {"state": state}}
+    match = None
+    if fence is not None:
+        update["$set"]["lock_token"] = fence
+        match = fenced(fence)
+    state_writer.apply(task_name, update, match=match)
+    publish_task_event(task_name, state=state)
     print(f"[Worker] Updated state for '{task_name}' to {state}")
 
 
 
-def get_task_config(task_name: str):
+def publish_task_event(task_name: str, **fields):
+    """Announce a task change to live dashboards (backend events.py).
+
+    Best effort: a failed publish only delays the dashboard until its next
+    resync, so it must never fail the task itself.
+    """
+    try:
+        redis_list_client.publish(TASK_EVENTS_CHANNEL, encode_task_event(task_name, **fields))
+    except redis.RedisError as e:
+        print(f"[Worker] Could not publish event for '{task_name}': {e}")
+
+
+def request_reschedule(task_name: str):
+    """Ask the scheduler to advance the task's next_run now that its run is over.
+
+    The backend drains the 'reschedule' list in batches and applies the
+    task's misfire policy (see TaskManager.run_reschedule_loop).
+    """
+    redis_list_client.lpush("reschedule", task_name)
+
+
+def get_task_config(task_name: str, task: TaskInRedis = None):
     """Fetch a task document from MongoDB and extract its config.
 
     Args:
         task_name: Name of the task to look up in queue_table.
+        task: The payload the task was dispatched with; if given, the task
+            document is taken from it and MongoDB is not read.
 
     Returns:
         Tuple of (task_doc, config) if found and valid, or (None, None) otherwise.
     """
-    task_doc = db.queue_table.find_one({"task_name": task_name})
+    if task is not None:
+        task_doc = task.model_dump()
+    else:
+        task_doc = db.queue_table.find_one({"task_name": task_name})
     if not task_doc:
         print(f"[Worker] '{task_name}' not found in queue_table. Skipping.")
         return None, None
@@ -122,28 +306,46 @@ def get_task_config(task_name: str):
     return task_doc, config
 
 
-def spawn_operator_process(task_name: str, config: dict):
+def spawn_operator_process(task_name: str, config: dict, traceparent: str = None):
     """Spawn an operator script as a subprocess.
 
     Args:
         task_name: Name of the task (used for logging).
         config: Task config dict containing operator_path, payload, and connection.
+        traceparent: Trace context of the run, passed to the operator in
+            the TRACEPARENT environment variable.
 
     Returns:
-        subprocess.Popen instance for the spawned operator process.
+        subprocess.Popen (or forkserver.WarmProcess) for the operator process.
     """
     operator_path = config["operator_path"]
     payload = config.get("payload", {})
     connection = config.get("connection", {})
-
-    process = subprocess.Popen(
-        [sys.executable, operator_path,
-         json.dumps(payload),
-         json.dumps(connection)],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
-    )
+    args = [json.dumps(payload), json.dumps(connection)]
+    env = {TRACEPARENT_ENV: traceparent} if traceparent else None
+
+    started = time.perf_counter()
+    with tracer.start_as_current_span("worker.spawn") as span:
+        if EXECUTION_MODE == "forkserver":
+            try:
+                process = fork_server.launch(operator_path, args, env=env)
+                SPAWN_SECONDS.labels("warm").observe(time.perf_counter() - started)
+                span.set_attribute("spawn.mode", "warm")
+                print(f"[Worker] '{task_name}' started as PID: {process.pid} (warm)")
+                return process
+            except OSError as e:
+                print(f"[Worker] Fork server unavailable, starting '{task_name}' cold: {e}")
+
+        process = subprocess.Popen(
+            [sys.executable, operator_path] + args,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            errors="replace",
+            env={**os.environ, **env} if env else None
+        )
+        SPAWN_SECONDS.labels("cold").observe(time.perf_counter() - started)
+        span.set_attribute("spawn.mode", "cold")
     print(f"[Worker] '{task_name}' started as PID: {process.pid}")
     return process
 
@@ -151,10 +353,12 @@ def spawn_operator_process(task_name: str, config: dict):
 def run_watchdog(task_name: str, process, timeout_seconds: int,
                  cancelled: threading.Event, timed_out: threading.Event,
                  run_done: threading.Event):
-    """Watch for cancel signals (Redis) or timeout, and terminate the process if needed.
+    """Supervise one process from a caller-managed thread until it is stopped or run_done is set.
 
-    Runs in a daemon thread alongside the operator subprocess. Polls Redis for
-    a cancel:{task_name} key and checks the monotonic clock against the deadline.
+    Cancel and timeout detection is done by the shared per-process
+    supervisor (see supervisor.py); this only blocks on local events, so it
+    adds no Redis traffic. execute_operator_task registers with the
+    supervisor directly and needs no thread at all.
 
     Args:
         task_name: Name of the task being watched.
@@ -164,27 +368,41 @@ def run_watchdog(task_name: str, process, timeout_seconds: int,
         timed_out: Event to set if the timeout is exceeded.
         run_done: Event that signals the main thread has finished waiting.
     """
-    deadline = time.monotonic() + timeout_seconds
-    while not run_done.is_set():
-        if redis_list_client.exists(f"cancel:{task_name}"):
-            print(f"[Watchdog] Cancel for '{task_name}'. Terminating.")
-            redis_list_client.delete(f"cancel:{task_name}")
-            cancelled.set()
-            process.terminate()
-            return
+    watch = supervisor.watch(task_name, process, timeout_seconds, cancelled, timed_out)
+    try:
+        while not run_done.wait(0.1):
+            if watch.stopped:
+                return
+    finally:
+        supervisor.unwatch(watch)
 
-        if time.monotonic() > deadline:
-            print(f"[Watchdog] Timeout for '{task_name}'. Terminating.")
-            timed_out.set()
-            process.terminate()
-            return
 
-        time.sleep(1)
+def attempt_records(task_name: str, attempt: ExecutionAttempt):
+    """Build the writes that record one attempt.
+
+    Returns:
+        Tuple of (task_attempts document, update pushing the attempt onto
+        the task documents' execution_history).
+    """
+    # Full history goes to the task_attempts time-series collection
+    attempt_doc = attempt.model_dump()
+    attempt_doc.update(task_name=task_name, state=attempt.state.value)
+
+    # The task documents only keep the last few attempts as a summary
+    update = {
+        "$push": {"execution_history": {
+            "$each": [attempt.model_dump(mode="json")],
+            "$slice": -EXECUTION_HISTORY_LIMIT
+        }}
+    }
+    return attempt_doc, update
 
 
 def handle_process_result(task_name: str, exit_code: int,
                           cancelled: threading.Event, timed_out: threading.Event,
-                          stdout: str, stderr: str, start_time: datetime, attempt_num: int = 1):
+                          stdout: str, stderr: str, start_time: datetime, attempt_num: int = 1,
+                          run_id: str = None, max_retries: int = None, fence: int = None,
+                          retry_backoff: dict = None, priority: int = 3, traceparent: str = None):
     """Handle post-process cleanup based on exit code and watchdog signals.
 
     Args:
@@ -192,13 +410,23 @@ def handle_process_result(task_name: str, exit_code: int,
         exit_code: Process return code.
         cancelled: Event indicating whether the task was cancelled.
         timed_out: Event indicating whether the task timed out.
-        stdout: Captured stdout from the subprocess.
-        stderr: Captured stderr from the subprocess.
+        stdout: Tail of the subprocess stdout (the full output is in task_logs).
+        stderr: Tail of the subprocess stderr (the full output is in task_logs).
         start_time: Process start time
         attempt_num: execution attempt number
+        run_id: Identifier of this run's log in task_logs, if captured.
+        max_retries: If given, a failed attempt's retry bookkeeping (num_of_retries,
+            the RETRY/EXHAUSTED state and retry_after) is written in the same
+            update, and the retry is queued in Redis once it has landed.
+        fence: Run lock token of this run; the result is not written if a
+            newer run has claimed the task since.
+        retry_backoff: The task's retry_backoff, over RETRY_BACKOFF.
+        priority: Priority the retry is dispatched with.
+        traceparent: Trace context of the firing, kept by its retry.
 
     Returns:
-        "success" if exit code is 0, "failed" if cancelled/timed out, "retry" otherwise.
+        "success" if exit code is 0, "failed" if cancelled/timed out, "retry" otherwise;
+        with max_retries, "exhausted" instead of "retry" once no attempts are left.
     """
     if stdout: print(f"[Worker] STDOUT:\n{stdout}")
     if stderr: print(f"[Worker] STDERR:\n{stderr}")
@@ -207,6 +435,7 @@ def handle_process_result(task_name: str, exit_code: int,
     end_time = datetime.now(timezone.utc)
     fail_reason = None
     state_to_set = None
+    retry_delay = None
 
     if cancelled.is_set():
         state_to_set = TaskState.CANCELLED.value
@@ -224,19 +453,20 @@ def handle_process_result(task_name: str, exit_code: int,
         fail_reason = f"Exited with non-zero code {exit_code}\nSTDERR: {stderr}"
         result = "retry"
 
-    execution_attempt = ExecutionAttempt(
+    attempt = ExecutionAttempt(
         attempt_number=attempt_num,
         started_at=start_time,
         ended_at=end_time,
         state=state_to_set if result != "retry" else TaskState.FAILED.value,
-        fail_reason=fail_reason
-    ).model_dump(mode="json")
-    
-    # Push execution attempt to history
-    update_query = {
-        "$push": {"execution_history": execution_attempt}
-    }
-    
+        fail_reason=fail_reason,
+        run_id=run_id
+    )
+
+    attempt_doc, update_query = attempt_records(task_name, attempt)
+    RUN_SECONDS.labels(task_name if METRICS_PER_TASK else "",
+                       state_to_set if result != "retry" else TaskState.FAILED.value
+                       ).observe((end_time - start_time).total_seconds())
+
     # We update the state in DB depending on result
     if result == "success":
         update_query["$set"] = {
@@ -248,76 +478,345 @@ def handle_process_result(task_name: str, exit_code: int,
             "state": state_to_set, # CANCELLED or TIMED_OUT
             "cancelled_at": end_time.isoformat() if cancelled.is_set() else None
         }
-    
-    db.queue_table.update_one({"task_name": task_name}, update_query)
-    db["schedules"].update_one({"task_name": task_name}, update_query)
-    
+    elif max_retries is not None:
+        if attempt_num >= max_retries:
+            result = "exhausted"
+            state_to_set = TaskState.EXHAUSTED.value
+            RETRIES.labels("exhausted").inc()
+        else:
+            state_to_set = TaskState.RETRY.value
+            retry_delay = backoff_delay(attempt_num, {**RETRY_BACKOFF, **(retry_backoff or {})})
+            RETRIES.labels("scheduled").inc()
+        update_query["$set"] = {"state": state_to_set}
+        if retry_delay is not None:
+            update_query["$set"]["retry_after"] = end_time + timedelta(seconds=retry_delay)
+        update_query["$inc"] = {"num_of_retries": 1}
+
+    # The backend must not reschedule, nor the retry be dispatched, before
+    # the state has landed
+    if result != "retry":
+        on_written = lambda: request_reschedule(task_name)
+    elif retry_delay is not None:
+        on_written = lambda: schedule_retry(redis_list_client, task_name, retry_delay, priority, traceparent)
+    else:
+        on_written = None
+    state_writer.apply(
+        task_name, update_query, attempt_doc,
+        on_written=on_written,
+        match=fenced(fence) if fence is not None else None
+    )
+    if "$set" in update_query:
+        publish_task_event(task_name, state=state_to_set)
+    if "$inc" in update_query:
+        # num_of_retries is reset on reschedule, so it counts this run's failed attempts
+        publish_task_event(task_name, num_of_retries=attempt_num)
+    if retry_delay is not None:
+        print(f"[Worker] '{task_name}' will retry in {retry_delay:.1f}s (attempt {attempt_num + 1})")
+
     return result
 
 
-@app.task(bind=True, max_retries=3)
-def execute_operator_task(self, task_name: str):
-    """Execute a task by spawning its operator script as a subprocess.
+def record_lock_failure(task_name: str, fail_reason: str, attempt_num: int = 1):
+    """Record a run dropped because another run held the task's lock.
+
+    The attempt is always recorded. The task only moves to LOCK_FAILED (and
+    is rescheduled) if it was waiting to run, not while the holder runs.
+    """
+    now = datetime.now(timezone.utc)
+    attempt = ExecutionAttempt(
+        attempt_number=attempt_num,
+        started_at=now,
+        ended_at=now,
+        state=TaskState.LOCK_FAILED,
+        fail_reason=fail_reason
+    )
+    attempt_doc, update_query = attempt_records(task_name, attempt)
+    state_writer.apply(task_name, update_query, attempt_doc)
+    state_writer.apply(
+        task_name, {"$set": {"state": TaskState.LOCK_FAILED.value}},
+        on_written=lambda: request_reschedule(task_name),
+        match={"state": {"$in": WAITING_STATES}}
+    )
+    print(f"[Worker] Run of '{task_name}' dropped: {fail_reason}")
 
-    Fetches task config from MongoDB, spawns the operator, starts a watchdog
-    thread for cancel/timeout monitoring, and handles the result.
+
+def acquire_run_lock(task_name: str, task_doc: dict, attempt_num: int = 1,
+                     waiting_since: float = None):
+    """Take the task's run lock, applying its overlap policy if it is held.
 
     Args:
-        task_name: Name of the task to execute.
+        task_name: Name of the task about to run.
+        task_doc: The task's queue_table document (for overlap_policy).
+        attempt_num: Execution attempt number.
+        waiting_since: When this run started waiting for the lock, if it
+            already has. Defaults to the lock_waiting_since the task
+            document records while it is ACQUIRING_LOCK.
+
+    Returns:
+        This run's fencing token, or None if the run was dropped.
+
+    Raises:
+        LockBusy: The policy is queue or replace and the lock is still held.
+    """
+    acquired, token = run_lock.acquire(task_name)
+    if acquired:
+        return token
+
+    policy = task_doc.get("overlap_policy") or OVERLAP_POLICY
+    if policy == OverlapPolicy.SKIP.value:
+        record_lock_failure(task_name, f"Run {token} of the task was still in progress.", attempt_num)
+        return None
+
+    if waiting_since is None and task_doc.get("state") == TaskState.ACQUIRING_LOCK.value:
+        waiting_since = as_epoch(task_doc.get("lock_waiting_since"))
+    if waiting_since is None:
+        waiting_since = time.time()
+        if policy == OverlapPolicy.REPLACE.value:
+            print(f"[Worker] Replacing run {token} of '{task_name}'")
+            redis_list_client.publish(CANCEL_CHANNEL, task_name)
+        # Guarded write, so it may not apply; dashboards are not told about it
+        state_writer.apply(task_name, {"$set": {
+            "state": TaskState.ACQUIRING_LOCK.value,
+            "lock_waiting_since": datetime.fromtimestamp(waiting_since, timezone.utc),
+        }}, match={"state": {"$in": WAITING_STATES}})
+    elif time.time() - waiting_since >= LOCK_WAIT_SECONDS:
+        record_lock_failure(task_name, f"Waited {LOCK_WAIT_SECONDS}s for run {token} to finish.",
+                            attempt_num)
+        return None
+    raise LockBusy(task_name, waiting_since, task_doc.get("priority", 3))
+
+
+def as_epoch(value):
+    """Epoch seconds of a datetime read from MongoDB (naive means UTC), or None."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def wait_for_lock(task_name: str, busy: LockBusy, traceparent: str = None):
+    """Park a run that found its task locked in the Redis retry queue.
+
+    The backend dispatches it again after LOCK_RETRY_SECONDS like any retry,
+    so nothing waits in worker memory. The re-dispatched run has no payload:
+    it re-reads the task, and the lock_waiting_since of its first try, from
+    MongoDB.
+    """
+    try:
+        schedule_retry(redis_list_client, task_name, LOCK_RETRY_SECONDS, busy.priority, traceparent)
+    except redis.RedisError as e:
+        record_lock_failure(task_name, f"Could not queue the wait for the run lock: {e}")
+
+
+def attempt_number(task_doc: dict) -> int:
+    """Number of the attempt about to start: this firing's failed attempts + 1."""
+    return task_doc.get("num_of_retries", 0) + 1
+
+
+def observe_dispatch_lag(task_doc: dict):
+    """Record how late the first attempt of a firing started against its next_run.
+
+    Retries start late by design and ad-hoc runs ahead of next_run, so
+    neither is counted.
+    """
+    next_run = task_doc.get("next_run")
+    if next_run is None or attempt_number(task_doc) != 1:
+        return
+    if next_run.tzinfo is None:
+        next_run = next_run.replace(tzinfo=timezone.utc)
+    lag = (datetime.now(timezone.utc) - next_run).total_seconds()
+    if lag >= 0:
+        DISPATCH_LAG_SECONDS.labels(str(task_doc.get("priority", 3))).observe(lag)
+
+
+def load_payload(task_name: str, payload: str):
+    """Decode the TaskInRedis payload a task was dispatched with.
+
+    Returns:
+        The TaskInRedis, or None if there is no payload or it cannot be
+        decoded (the task is then read from queue_table).
+    """
+    if not payload:
+        return None
+    try:
+        return TaskInRedis.deserialize_from_redis(payload)
+    except ValidationError as e:
+        print(f"[Worker] Unreadable payload for '{task_name}', reading queue_table instead: {e}")
+        return None
+
+
+def prepare_run(task_name: str, waiting_since: float = None, payload: str = None):
+    """Load and validate a task's config, take its run lock and mark it RUNNING.
+
+    The lock is taken before anything is spawned, so a duplicate run is
+    rejected without forking a process.
+
+    Args:
+        task_name: Name of the task about to run.
+        waiting_since: When this run started waiting for the lock, if it
+            already has.
+        payload: Serialized TaskInRedis the task was dispatched with. The
+            run is then configured from it instead of queue_table, and is
+            skipped if the task was paused or deleted while it was queued.
+
+    Returns:
+        Tuple of (task_doc, config, lock token), or (None, None, None) if the
+        task cannot run (marked INVALID), was cancelled while queued, or the
+        run was dropped by its overlap policy.
+
+    Raises:
+        LockBusy: The run should be retried after LOCK_RETRY_SECONDS
+            (see wait_for_lock).
     """
-    task_doc, config = get_task_config(task_name)
+    task = load_payload(task_name, payload)
+    if task is not None and task.state.value not in WAITING_STATES:
+        # The API has already recorded the state; nothing to write
+        print(f"[Worker] '{task_name}' became {task.state.value} while queued. Skipping.")
+        return None, None, None
+
+    with tracer.start_as_current_span("worker.get_task_config"):
+        task_doc, config = get_task_config(task_name, task)
     if not config:
         mark_task_state(task_name, TaskState.INVALID.value)
-        return
+        return None, None, None
 
     operator_path = config.get("operator_path")
     if not operator_path or not validate_operator(operator_path):
         print(f"[Worker] Script validation failed for '{task_name}' at {operator_path}")
         mark_task_state(task_name, TaskState.INVALID.value)
-        return
-        
-    mark_task_state(task_name, TaskState.RUNNING.value)
-
-    timeout_seconds = config.get("timeout_seconds", 3600)
-    process = spawn_operator_process(task_name, config)
-    start_time = datetime.now(timezone.utc)
-    attempt_num = self.request.retries + 1
-
-    cancelled = threading.Event()
-    timed_out = threading.Event()
-    run_done = threading.Event()
-
-    watchdog_thread = threading.Thread(
-        target=run_watchdog,
-        args=(task_name, process, timeout_seconds, cancelled, timed_out, run_done),
-        daemon=True
+        return None, None, None
+
+    with tracer.start_as_current_span("worker.run_lock"):
+        token = acquire_run_lock(task_name, task_doc, attempt_number(task_doc), waiting_since)
+    if token is None:
+        return None, None, None
+
+    mark_task_state(task_name, TaskState.RUNNING.value, fence=token)
+    observe_dispatch_lag(task_doc)
+    return task_doc, config, token
+
+
+def new_log_writer(task_name: str, run_id: str, attempt_num: int) -> LogWriter:
+    """LogWriter for one run, configured from worker/config.json."""
+    return LogWriter(
+        db, task_name, run_id, attempt_num,
+        chunk_bytes=worker_config.get("log_chunk_bytes", 65536),
+        flush_seconds=worker_config.get("log_flush_seconds", 1),
+        tail_bytes=worker_config.get("log_tail_bytes", 4096),
     )
-    watchdog_thread.start()
 
-    stdout, stderr = process.communicate()
-    run_done.set()
-    watchdog_thread.join(timeout=5)
 
-    exit_code = process.returncode
-    result = handle_process_result(task_name, exit_code, cancelled, timed_out, stdout, stderr, start_time, attempt_num)
-    
-    if result == "retry":
-        db.queue_table.update_one({"task_name": task_name}, {"$inc": {"num_of_retries": 1}})
-        db["schedules"].update_one({"task_name": task_name}, {"$inc": {"num_of_retries": 1}})
-        
-        # Check max_retries
-        max_retries = task_doc.get("max_retries", 3)
-        if attempt_num >= max_retries:
-            mark_task_state(task_name, TaskState.EXHAUSTED.value)
-        else:
-            mark_task_state(task_name, TaskState.RETRY.value)
-            raise self.retry(countdown=30)
+def dispatch_kwargs(item: ClaimedItem) -> dict:
+    """execute_operator_task keyword arguments carrying a claimed item's payload and trace context.
 
+    Records the time the item waited in the dispatch queue under its
+    firing's trace.
 
-app.conf.beat_schedule = {
-    'check-redis-every-5-seconds': {
-        'task': 'tasks.check_redis_queue',
-        'schedule': 5.0,
-    },
-}
+    Returns:
+        {} if the item was queued with neither.
+    """
+    kwargs = {"payload": item.payload} if item.payload else {}
+    if not item.traceparent:
+        return kwargs
+    now = time.time()
+    if item.queued_at is not None:
+        record_span("dispatch.queue", to_ns(item.queued_at), to_ns(now),
+                    parent=context_from(item.traceparent),
+                    attributes={"task.name": str(item), "task.priority": item.priority})
+    kwargs.update(traceparent=item.traceparent, dispatched_at=now)
+    return kwargs
+
+
+@contextmanager
+def run_span(task_name: str, traceparent: str = None, dispatched_at: float = None):
+    """Trace one attempt of a task as a "worker.run" span.
+
+    The span is a child of the firing's trace when the run was dispatched
+    with one, else the root of a new trace (ad-hoc runs). The time from the
+    dispatcher's hand-off until the attempt started is recorded as
+    "worker.handoff".
+
+    Yields:
+        The run's span.
+    """
+    parent = context_from(traceparent)
+    if dispatched_at is not None:
+        record_span("worker.handoff", to_ns(dispatched_at), time.time_ns(), parent=parent)
+    with tracer.start_as_current_span("worker.run", context=parent,
+                                      attributes={"task.name": task_name}) as span:
+        yield span
+
+
+@app.task(bind=True)
+def execute_operator_task(self, task_name: str, waiting_since: float = None,
+                          traceparent: str = None, dispatched_at: float = None, payload: str = None):
+    """Execute a task by spawning its operator script as a subprocess.
+
+    Takes the task config from the dispatched payload (or from MongoDB for
+    tasks queued without one), takes the task's run lock, spawns the
+    operator, registers it with the process-wide supervisor for
+    cancel/timeout monitoring, and handles the result. A failed attempt is
+    retried through the Redis retry queue (see retry_queue.py), not by
+    Celery, so nothing waits in this worker's memory.
+
+    Args:
+        task_name: Name of the task to execute.
+        waiting_since: When this run started waiting for the lock; defaults
+            to the lock_waiting_since recorded on the task.
+        traceparent: Trace context of the firing (see backend/tracing.py).
+        dispatched_at: When the dispatcher handed the task to Celery (epoch seconds).
+        payload: Serialized TaskInRedis the task was queued with.
+    """
+    with run_span(task_name, traceparent, dispatched_at) as span:
+        try:
+            task_doc, config, token = prepare_run(task_name, waiting_since, payload)
+        except LockBusy as busy:
+            wait_for_lock(task_name, busy, traceparent)
+            return
+        if not config:
+            return
+        attempt_num = attempt_number(task_doc)
+        span.set_attribute("task.attempt", attempt_num)
+
+        try:
+            timeout_seconds = config.get("timeout_seconds", 3600)
+            with tracer.start_as_current_span("operator.run") as operator_span:
+                process = spawn_operator_process(task_name, config, traceparent_of(operator_span))
+                start_time = datetime.now(timezone.utc)
+
+                run_id = uuid.uuid4().hex
+                writer = new_log_writer(task_name, run_id, attempt_num)
+
+                watch = supervisor.watch(task_name, process, timeout_seconds)
+                try:
+                    stdout, stderr = capture_output(process, writer)
+                finally:
+                    supervisor.unwatch(watch)
+
+            exit_code = process.returncode
+            with tracer.start_as_current_span("worker.handle_result"):
+                result = handle_process_result(task_name, exit_code, watch.cancelled, watch.timed_out,
+                                               stdout, stderr, start_time, attempt_num, run_id,
+                                               max_retries=task_doc.get("max_retries", 3), fence=token,
+                                               retry_backoff=task_doc.get("retry_backoff"),
+                                               priority=task_doc.get("priority", 3),
+                                               traceparent=traceparent)
+            span.set_attribute("task.result", result)
+            return result
+        finally:
+            # Held until the run's last state write has landed
+            state_writer.call_after_writes(lambda: run_lock.release(task_name, token))
+
+
+# With dispatch_mode "consumer", dispatcher.py blocks on the dispatch queue
+# instead; running both would let beat pop items past the consumer's
+# acknowledgement.
+if worker_config.get("dispatch_mode", "beat") == "beat":
+    app.conf.beat_schedule = {
+        'check-redis-every-5-seconds': {
+            'task': 'tasks.check_redis_queue',
+            'schedule': 5.0,
+        },
+    }
 app.conf.timezone = 'Asia/Kolkata'
@@ -0,0 +1,88 @@
+import sys
+import os
+import time
+import asyncio
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from async_executor import AsyncExecutor
+from models import TaskState
+from .test_tasks import mongo_db, redis_client, insert_task, insert_schedule
+
+WORKER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+OPERATOR = (
+    "import sys, json, time\n"
+    f"sys.path.append({WORKER_DIR!r})\n"
+    "from base_operator import BaseOperator, run_operator\n"
+    "class Op(BaseOperator):\n"
+    "    def initialize(self, p, c): self.p = p\n"
+    "    def run(self):\n"
+    "        time.sleep(self.p.get('sleep', 0))\n"
+    "        sys.exit(self.p.get('exit', 0))\n"
+    "    def finish(self): print('finish', flush=True)\n"
+    "if __name__ == '__main__':\n"
+    "    run_operator(Op(), json.loads(sys.argv[1]), json.loads(sys.argv[2]))\n"
+)
+
+
+def insert_operator_task(mongo_db, tmp_path, task_name, **config):
+    script = tmp_path / "async_op.py"
+    script.write_text(OPERATOR)
+    insert_task(mongo_db, task_name, {"operator_path": str(script), **config})
+    insert_schedule(mongo_db, task_name)
+
+
+class TestAsyncExecutor:
+    def test_successful_run_is_recorded(self, mongo_db, redis_client, tmp_path):
+        insert_operator_task(mongo_db, tmp_path, "test_async_success")
+
+        result = asyncio.run(AsyncExecutor().execute("test_async_success"))
+
+        assert result == "success"
+        doc = mongo_db["schedules"].find_one({"task_name": "test_async_success"})
+        assert doc["state"] == TaskState.COMPLETED.value
+        assert mongo_db.task_attempts.count_documents({"task_name": "test_async_success"}) == 1
+
+    def test_timeout_terminates_operator(self, mongo_db, redis_client, tmp_path):
+        insert_operator_task(mongo_db, tmp_path, "test_async_timeout",
+                             payload={"sleep": 30}, timeout_seconds=1)
+
+        started = time.monotonic()
+        result = asyncio.run(AsyncExecutor().execute("test_async_timeout"))
+
+        assert result == "failed"
+        assert time.monotonic() - started < 10
+        doc = mongo_db["schedules"].find_one({"task_name": "test_async_timeout"})
+        assert doc["state"] == TaskState.TIMED_OUT.value
+
+    def test_failure_queues_a_retry_in_redis(self, mongo_db, redis_client, tmp_path):
+        insert_operator_task(mongo_db, tmp_path, "test_async_retry", payload={"exit": 3})
+
+        executor = AsyncExecutor()
+        result = asyncio.run(executor.execute("test_async_retry"))
+
+        assert result == "retry"
+        # The retry waits in Redis, not in this process
+        assert executor.in_flight == 0
+        assert redis_client.zscore("retry_queue", "test_async_retry") is not None
+        doc = mongo_db.queue_table.find_one({"task_name": "test_async_retry"})
+        assert doc["state"] == TaskState.RETRY.value
+        assert doc["num_of_retries"] == 1
+        assert doc["retry_after"] is not None
+
+    def test_runs_execute_concurrently(self, mongo_db, redis_client, tmp_path):
+        names = [f"test_async_many_{i}" for i in range(20)]
+        for name in names:
+            insert_operator_task(mongo_db, tmp_path, name, payload={"sleep": 2})
+
+        async def run_all():
+            executor = AsyncExecutor()
+            return await asyncio.gather(*(executor.execute(name) for name in names))
+
+        started = time.monotonic()
+        results = asyncio.run(run_all())
+
+        assert results == ["success"] * 20
+        # Sequential runs would take 40 s
+        assert time.monotonic() - started < 20
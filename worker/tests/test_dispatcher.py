@@ -0,0 +1,133 @@
+import sys
+import os
+import threading
+import time
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from dispatcher import DispatchConsumer, enqueue
+from .test_tasks import redis_client
+
+
+QUEUE = "test_dispatch_queue"
+
+
+@pytest.fixture
+def clean_queue(redis_client):
+    """Remove the test queue and every processing/heartbeat key around each test."""
+    def wipe():
+        for key in redis_client.keys(f"{QUEUE}*"):
+            redis_client.delete(key)
+    wipe()
+    yield redis_client
+    wipe()
+
+
+class TestDispatchConsumer:
+    def test_claim_moves_item_into_processing_set(self, clean_queue):
+        consumer = DispatchConsumer(clean_queue, queue=QUEUE, consumer_id="test_a")
+        enqueue(clean_queue, [("test_task_1", 2)], QUEUE)
+
+        item = consumer.claim(timeout=1)
+
+        assert item == "test_task_1"
+        assert item.priority == 2
+        assert clean_queue.zcard(QUEUE) == 0
+        assert clean_queue.zrange(consumer.processing_key, 0, -1) == [b"test_task_1"]
+
+        consumer.ack(item)
+        assert clean_queue.zcard(consumer.processing_key) == 0
+
+    def test_claim_takes_the_trace_context_with_the_item(self, clean_queue):
+        consumer = DispatchConsumer(clean_queue, queue=QUEUE, consumer_id="test_a")
+        traceparent = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+        enqueue(clean_queue, [("test_traced", 1), ("test_untraced", 2)], QUEUE)
+        clean_queue.hset(consumer.trace_key, "test_traced", traceparent)
+
+        traced = consumer.claim(timeout=1)
+        untraced = consumer.claim(timeout=1)
+
+        assert traced.traceparent == traceparent
+        assert abs(traced.queued_at - time.time()) < 60
+        assert untraced.traceparent == ""
+        assert clean_queue.hlen(consumer.trace_key) == 0
+
+    def test_claim_takes_the_payload_with_the_item(self, clean_queue):
+        consumer = DispatchConsumer(clean_queue, queue=QUEUE, consumer_id="test_a")
+        enqueue(clean_queue, [("test_payload", 1)], QUEUE)
+        clean_queue.hset(consumer.payload_key, "test_payload", '{"task_name": "test_payload"}')
+
+        item = consumer.claim(timeout=1)
+
+        assert item.payload == '{"task_name": "test_payload"}'
+        assert clean_queue.hlen(consumer.payload_key) == 0
+        consumer.nack(item)
+        assert consumer.claim(timeout=1).payload == ""
+
+    def test_claim_times_out_on_empty_queue(self, clean_queue):
+        consumer = DispatchConsumer(clean_queue, queue=QUEUE, consumer_id="test_a")
+        assert consumer.claim(timeout=0.1) is None
+
+    def test_claim_preserves_fifo_order(self, clean_queue):
+        consumer = DispatchConsumer(clean_queue, queue=QUEUE, consumer_id="test_a")
+        enqueue(clean_queue, [("first", 3)], QUEUE)
+        time.sleep(0.002)
+        enqueue(clean_queue, [("second", 3)], QUEUE)
+
+        assert consumer.claim(timeout=1) == "first"
+        assert consumer.claim(timeout=1) == "second"
+
+    def test_higher_priority_is_claimed_first(self, clean_queue):
+        consumer = DispatchConsumer(clean_queue, queue=QUEUE, consumer_id="test_a")
+        enqueue(clean_queue, [(f"test_low_{i}", 3) for i in range(50)], QUEUE)
+        enqueue(clean_queue, [("test_high", 1)], QUEUE)
+
+        assert consumer.claim(timeout=1) == "test_high"
+
+    def test_blocked_claim_wakes_on_enqueue(self, clean_queue):
+        consumer = DispatchConsumer(clean_queue, queue=QUEUE, consumer_id="test_a")
+        timer = threading.Timer(0.2, enqueue, (clean_queue, [("test_late", 1)], QUEUE))
+        timer.start()
+
+        started = time.monotonic()
+        assert consumer.claim(timeout=5) == "test_late"
+        assert time.monotonic() - started < 2
+
+    def test_dead_consumer_items_are_reclaimed(self, clean_queue):
+        dead = DispatchConsumer(clean_queue, queue=QUEUE, consumer_id="test_dead")
+        enqueue(clean_queue, [("test_lost_1", 3)], QUEUE)
+        time.sleep(0.002)
+        enqueue(clean_queue, [("test_lost_2", 3)], QUEUE)
+        dead.claim(timeout=1)
+        dead.claim(timeout=1)
+        # No heartbeat key exists for the dead consumer.
+
+        alive = DispatchConsumer(clean_queue, queue=QUEUE, consumer_id="test_alive")
+        alive.heartbeat()
+        assert alive.reclaim() == 2
+
+        assert alive.claim(timeout=1) == "test_lost_1"
+        assert alive.claim(timeout=1) == "test_lost_2"
+
+    def test_live_consumer_items_are_not_reclaimed(self, clean_queue):
+        busy = DispatchConsumer(clean_queue, queue=QUEUE, consumer_id="test_busy")
+        busy.heartbeat()
+        enqueue(clean_queue, [("test_in_flight", 3)], QUEUE)
+        busy.claim(timeout=1)
+
+        other = DispatchConsumer(clean_queue, queue=QUEUE, consumer_id="test_other")
+        assert other.reclaim() == 0
+        assert clean_queue.zcard(busy.processing_key) == 1
+
+    def test_nack_puts_item_back_at_front(self, clean_queue):
+        consumer = DispatchConsumer(clean_queue, queue=QUEUE, consumer_id="test_a")
+        enqueue(clean_queue, [("test_failed_handoff", 3)], QUEUE)
+        time.sleep(0.002)
+        enqueue(clean_queue, [("test_next", 3)], QUEUE)
+
+        item = consumer.claim(timeout=1)
+        consumer.nack(item)
+
+        assert clean_queue.zcard(consumer.processing_key) == 0
+        assert consumer.claim(timeout=1) == "test_failed_handoff"
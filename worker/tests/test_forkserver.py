@@ -0,0 +1,92 @@
+import sys
+import os
+import time
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from forkserver import ForkServerClient
+
+WORKER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+OPERATOR = (
+    "import sys, os, json, time\n"
+    f"sys.path.append({WORKER_DIR!r})\n"
+    "from base_operator import BaseOperator, run_operator\n"
+    "class Op(BaseOperator):\n"
+    "    def initialize(self, p, c): self.p = p\n"
+    "    def run(self):\n"
+    "        print('run', self.p['n'], flush=True)\n"
+    "        if self.p.get('env'): print(os.environ.get(self.p['env']), flush=True)\n"
+    "        time.sleep(self.p.get('sleep', 0))\n"
+    "        if self.p.get('fail'): raise RuntimeError('operator failed')\n"
+    "    def finish(self): print('finish', flush=True)\n"
+    "if __name__ == '__main__':\n"
+    "    run_operator(Op(), json.loads(sys.argv[1]), json.loads(sys.argv[2]))\n"
+)
+
+
+@pytest.fixture(scope="module")
+def operator_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("operators") / "op.py"
+    path.write_text(OPERATOR)
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def client(operator_path):
+    return ForkServerClient(operator_dir=os.path.dirname(operator_path))
+
+
+class TestForkServer:
+    def test_warm_launch_runs_operator(self, client, operator_path):
+        process = client.launch(operator_path, ['{"n": 1}', '{}'])
+        stdout = process.stdout.read()
+
+        assert process.wait() == 0
+        assert stdout == "run 1\nfinish\n"
+
+    def test_failing_operator_reports_exit_code(self, client, operator_path):
+        process = client.launch(operator_path, ['{"n": 2, "fail": true}', '{}'])
+        stderr = process.stderr.read()
+        process.stdout.read()
+
+        assert process.wait() == 1
+        assert "operator failed" in stderr
+
+    def test_terminate_runs_finish(self, client, operator_path):
+        """SIGTERM must still reach run_operator's handler in a forked child."""
+        process = client.launch(operator_path, ['{"n": 3, "sleep": 30}', '{}'])
+        assert process.stdout.readline() == "run 3\n"
+        assert process.poll() is None
+
+        process.terminate()
+        rest = process.stdout.read()
+
+        assert process.wait() == 0
+        assert "finish" in rest
+
+    def test_env_is_set_in_the_child(self, client, operator_path):
+        traceparent = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+        process = client.launch(operator_path, ['{"n": 5, "env": "TRACEPARENT"}', '{}'],
+                                env={"TRACEPARENT": traceparent})
+        stdout = process.stdout.read()
+
+        assert process.wait() == 0
+        assert stdout == f"run 5\n{traceparent}\nfinish\n"
+        assert "TRACEPARENT" not in os.environ
+
+    def test_concurrent_launches(self, client, operator_path):
+        processes = [client.launch(operator_path, [f'{{"n": {i}, "sleep": 0.2}}', '{}']) for i in range(20)]
+        outputs = [p.stdout.read() for p in processes]
+
+        assert [p.wait() for p in processes] == [0] * 20
+        assert all(out.startswith(f"run {i}\n") for i, out in enumerate(outputs))
+
+    def test_warm_launch_is_faster_than_interpreter_start(self, client, operator_path):
+        client.launch(operator_path, ['{"n": 0}', '{}']).wait()
+        started = time.perf_counter()
+        process = client.launch(operator_path, ['{"n": 4}', '{}'])
+        process.stdout.read()
+        process.wait()
+        assert time.perf_counter() - started < 0.1
@@ -0,0 +1,73 @@
+import sys
+import os
+import zlib
+import asyncio
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from log_capture import LogWriter, capture_output, capture_output_async
+from .test_tasks import mongo_db
+
+
+def run_script(mongo_db, run_id, code, **writer_kwargs):
+    process = subprocess.Popen(
+        [sys.executable, "-c", code],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    )
+    writer = LogWriter(mongo_db, "test_log_task", run_id, 1, **writer_kwargs)
+    tails = capture_output(process, writer)
+    return process, tails
+
+
+def read_run(mongo_db, run_id, stream=None):
+    query = {"run_id": run_id}
+    if stream:
+        query["stream"] = stream
+    chunks = mongo_db.task_logs.find(query).sort("seq", 1)
+    return "".join(zlib.decompress(c["data"]).decode() for c in chunks if not c["final"])
+
+
+class TestLogCapture:
+    def test_output_is_stored_as_compressed_chunks(self, mongo_db):
+        process, (stdout_tail, stderr_tail) = run_script(
+            mongo_db, "test_run_chunks",
+            "import sys\nfor i in range(5000): print('line', i)\nprint('boom', file=sys.stderr)",
+            chunk_bytes=4096, tail_bytes=64
+        )
+
+        assert process.returncode == 0
+        stdout = read_run(mongo_db, "test_run_chunks", "stdout")
+        assert stdout.splitlines() == [f"line {i}" for i in range(5000)]
+        assert read_run(mongo_db, "test_run_chunks", "stderr") == "boom\n"
+        assert mongo_db.task_logs.count_documents({"run_id": "test_run_chunks"}) > 2
+
+        # Only the end of each stream is kept in memory
+        assert stdout_tail.endswith("line 4999\n") and len(stdout_tail) < 4096
+        assert stderr_tail == "boom\n"
+
+    def test_run_ends_with_final_marker(self, mongo_db):
+        run_script(mongo_db, "test_run_final", "print('hi')")
+
+        last = mongo_db.task_logs.find({"run_id": "test_run_final"}).sort("seq", -1).limit(1)[0]
+        assert last["final"] is True
+        assert last["stream"] is None
+
+    def test_async_capture_matches_threaded_capture(self, mongo_db):
+        code = "import sys\nfor i in range(2000): print('line', i)\nprint('é' * 5000, file=sys.stderr)"
+
+        async def run():
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, "-c", code,
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            )
+            writer = LogWriter(mongo_db, "test_log_task", "test_run_async", 1, chunk_bytes=1000)
+            return process, await capture_output_async(process, writer)
+
+        process, (stdout_tail, _) = asyncio.run(run())
+
+        assert process.returncode == 0
+        assert read_run(mongo_db, "test_run_async", "stdout").splitlines() == [f"line {i}" for i in range(2000)]
+        # Multi-byte characters split across reads survive decoding
+        assert read_run(mongo_db, "test_run_async", "stderr") == "é" * 5000 + "\n"
+        assert stdout_tail.endswith("line 1999\n")
@@ -0,0 +1,82 @@
+import sys
+import os
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from operator_registry import OperatorRegistry
+
+VALID = (
+    "from base_operator import BaseOperator\n"
+    "class Op(BaseOperator):\n"
+    "    def initialize(self, p, c): pass\n"
+    "    def run(self): pass\n"
+    "    def finish(self): pass\n"
+)
+
+
+@pytest.fixture
+def operator_dir(tmp_path):
+    directory = tmp_path / "operators"
+    directory.mkdir()
+    (directory / "op.py").write_text(VALID)
+    return directory
+
+
+@pytest.fixture
+def registry(operator_dir):
+    registry = OperatorRegistry(str(operator_dir))
+    registry.scan()
+    return registry
+
+
+class TestOperatorRegistry:
+    def test_scan_validates_and_compiles(self, registry, operator_dir):
+        entry = registry.lookup(str(operator_dir / "op.py"))
+
+        assert entry.valid is True
+        assert entry.class_name == "Op"
+        assert entry.code is not None
+        assert list(registry.published()) == ["operators/op.py"]
+
+    def test_unchanged_file_is_served_from_cache(self, registry, operator_dir):
+        path = operator_dir / "op.py"
+        first = registry.lookup(str(path))
+
+        # Same contents under a new mtime: re-hashed, not re-parsed
+        os.utime(path, ns=(first.mtime_ns + 10**9, first.mtime_ns + 10**9))
+        assert registry.lookup(str(path)) is first
+
+    def test_changed_file_is_revalidated(self, registry, operator_dir):
+        path = operator_dir / "op.py"
+        first = registry.lookup(str(path))
+
+        path.write_text("class Op:\n    pass\n")
+        entry = registry.lookup(str(path))
+
+        assert entry is not first
+        assert entry.valid is False
+        assert "BaseOperator" in entry.reason
+
+    def test_syntax_error_is_invalid(self, registry, operator_dir):
+        path = operator_dir / "broken.py"
+        path.write_text("def oops(:\n")
+
+        entry = registry.lookup(str(path))
+
+        assert entry.valid is False
+        assert entry.code is None
+
+    def test_scan_tracks_added_and_removed_scripts(self, registry, operator_dir):
+        assert registry.scan() is False
+
+        (operator_dir / "other.py").write_text(VALID)
+        assert registry.scan() is True
+        assert sorted(registry.published()) == ["operators/op.py", "operators/other.py"]
+
+        (operator_dir / "op.py").unlink()
+        assert registry.scan() is True
+        assert list(registry.published()) == ["operators/other.py"]
+
+    def test_missing_file(self, registry, tmp_path):
+        assert registry.lookup(str(tmp_path / "nope.py")) is None
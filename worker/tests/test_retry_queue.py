@@ -0,0 +1,31 @@
+import sys
+import os
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from retry_queue import backoff_delay
+
+
+NO_JITTER = {"base_seconds": 10, "factor": 2, "max_seconds": 100, "jitter": 0}
+
+
+class TestBackoffDelay:
+    def test_grows_exponentially_without_jitter(self):
+        assert [backoff_delay(n, NO_JITTER) for n in (1, 2, 3, 4)] == [10, 20, 40, 80]
+
+    def test_is_capped_at_max_seconds(self):
+        assert backoff_delay(5, NO_JITTER) == 100
+        assert backoff_delay(50, NO_JITTER) == 100
+
+    def test_jitter_only_shortens_the_delay(self):
+        backoff = {**NO_JITTER, "jitter": 0.5}
+        rng = random.Random(7)
+        delays = [backoff_delay(3, backoff, rng) for _ in range(1000)]
+        assert all(20 <= d <= 40 for d in delays)
+        # Correlated failures are spread over the window, not retried together
+        assert max(delays) - min(delays) > 15
+
+    def test_missing_fields_use_defaults(self):
+        assert backoff_delay(1, {"jitter": 0}) == 30
+        assert backoff_delay(2, {"jitter": 0, "base_seconds": None}) == 60
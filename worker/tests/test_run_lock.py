@@ -0,0 +1,121 @@
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from run_lock import RunLock, fenced
+from state_writer import StateWriter
+from retry_queue import RETRY_PRIORITIES, RETRY_QUEUE
+from tasks import LOCK_WAIT_SECONDS, LockBusy, execute_operator_task, prepare_run, run_lock
+from models import TaskState
+from .test_tasks import mongo_db, redis_client, insert_task, insert_schedule
+
+OPERATOR_PATH = os.path.join(os.path.dirname(__file__), "..", "operators", "example_operator.py")
+
+
+def insert_locked_task(mongo_db, task_name, **fields):
+    insert_task(mongo_db, task_name, {"operator_path": OPERATOR_PATH})
+    mongo_db.queue_table.update_one({"task_name": task_name},
+                                    {"$set": {"state": "PENDING", **fields}})
+    insert_schedule(mongo_db, task_name)
+
+
+class TestRunLock:
+    def test_second_acquire_is_rejected_until_released(self, redis_client):
+        lock = RunLock(redis_client)
+
+        acquired, token = lock.acquire("test_lock_basic")
+        rejected, holder = lock.acquire("test_lock_basic")
+
+        assert acquired and not rejected
+        assert holder == token
+        assert lock.release("test_lock_basic", token)
+        acquired, next_token = lock.acquire("test_lock_basic")
+        assert acquired and next_token == token + 1
+        lock.release("test_lock_basic", next_token)
+
+    def test_expired_lease_cannot_be_released_by_old_holder(self, redis_client):
+        lock = RunLock(redis_client)
+
+        _, old_token = lock.acquire("test_lock_expiry")
+        # The holder stalled long enough for its lease to expire
+        redis_client.delete("lock:run:test_lock_expiry")
+        acquired, new_token = lock.acquire("test_lock_expiry")
+
+        assert acquired and new_token > old_token
+        assert not lock.release("test_lock_expiry", old_token)
+        assert lock.release("test_lock_expiry", new_token)
+
+    def test_stale_run_cannot_overwrite_newer_state(self, mongo_db):
+        insert_task(mongo_db, "test_lock_fence")
+        insert_schedule(mongo_db, "test_lock_fence")
+        writer = StateWriter(mongo_db)
+
+        writer.apply("test_lock_fence", {"$set": {"state": "RUNNING", "lock_token": 1}}, match=fenced(1))
+        writer.apply("test_lock_fence", {"$set": {"state": "RUNNING", "lock_token": 2}}, match=fenced(2))
+        writer.apply("test_lock_fence", {"$set": {"state": "COMPLETED"}}, match=fenced(1))
+
+        for name in ("queue_table", "schedules"):
+            doc = mongo_db[name].find_one({"task_name": "test_lock_fence"})
+            assert doc["state"] == "RUNNING"
+            assert doc["lock_token"] == 2
+
+
+class TestOverlapPolicy:
+    def test_skip_records_lock_failed_attempt(self, mongo_db, redis_client):
+        insert_locked_task(mongo_db, "test_overlap_skip", overlap_policy="skip")
+        _, token = run_lock.acquire("test_overlap_skip")
+
+        try:
+            assert prepare_run("test_overlap_skip") == (None, None, None)
+        finally:
+            run_lock.release("test_overlap_skip", token)
+
+        attempt = mongo_db.task_attempts.find_one({"task_name": "test_overlap_skip"})
+        assert attempt["state"] == TaskState.LOCK_FAILED.value
+        doc = mongo_db.queue_table.find_one({"task_name": "test_overlap_skip"})
+        assert doc["state"] == TaskState.LOCK_FAILED.value
+
+    def test_queue_waits_then_runs(self, mongo_db, redis_client):
+        insert_locked_task(mongo_db, "test_overlap_queue", overlap_policy="queue")
+        _, token = run_lock.acquire("test_overlap_queue")
+
+        with pytest.raises(LockBusy) as busy:
+            prepare_run("test_overlap_queue")
+        doc = mongo_db.queue_table.find_one({"task_name": "test_overlap_queue"})
+        assert doc["state"] == TaskState.ACQUIRING_LOCK.value
+
+        run_lock.release("test_overlap_queue", token)
+        _, _, new_token = prepare_run("test_overlap_queue", waiting_since=busy.value.waiting_since)
+        try:
+            doc = mongo_db.queue_table.find_one({"task_name": "test_overlap_queue"})
+            assert doc["state"] == TaskState.RUNNING.value
+            assert doc["lock_token"] == new_token
+        finally:
+            run_lock.release("test_overlap_queue", new_token)
+
+    def test_waiting_run_is_parked_in_the_retry_queue(self, mongo_db, redis_client):
+        insert_locked_task(mongo_db, "test_overlap_park", overlap_policy="queue", priority=2)
+        _, token = run_lock.acquire("test_overlap_park")
+        try:
+            execute_operator_task.apply(args=("test_overlap_park",))
+
+            assert redis_client.zscore(RETRY_QUEUE, "test_overlap_park") is not None
+            assert redis_client.hget(RETRY_PRIORITIES, "test_overlap_park") == b"2"
+            doc = mongo_db.queue_table.find_one({"task_name": "test_overlap_park"})
+            assert doc["state"] == TaskState.ACQUIRING_LOCK.value
+
+            # The re-dispatched run counts its wait from the first try
+            mongo_db.queue_table.update_one({"task_name": "test_overlap_park"}, {"$set": {
+                "lock_waiting_since": datetime.now(timezone.utc) - timedelta(seconds=LOCK_WAIT_SECONDS)
+            }})
+            assert prepare_run("test_overlap_park") == (None, None, None)
+            doc = mongo_db.queue_table.find_one({"task_name": "test_overlap_park"})
+            assert doc["state"] == TaskState.LOCK_FAILED.value
+        finally:
+            run_lock.release("test_overlap_park", token)
+            redis_client.zrem(RETRY_QUEUE, "test_overlap_park")
+            redis_client.hdel(RETRY_PRIORITIES, "test_overlap_park")
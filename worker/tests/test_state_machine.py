@@ -104,7 +104,7 @@ class TestStateMachine:
         task = mongo_db.queue_table.find_one({"task_name": "test_state_timeout"})
         assert task["state"] == TaskState.TIMED_OUT.value
 
-    def test_state_retry_and_exhausted(self, mongo_db, tmp_path):
+    def test_state_retry_and_exhausted(self, mongo_db, redis_client, tmp_path):
         from tasks import execute_operator_task
         
         script = tmp_path / "fail_op.py"
@@ -0,0 +1,65 @@
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from state_writer import StateWriter
+from .test_tasks import mongo_db, insert_task, insert_schedule
+
+
+def insert(mongo_db, task_name):
+    insert_task(mongo_db, task_name)
+    insert_schedule(mongo_db, task_name)
+
+
+class TestStateWriter:
+    def test_direct_transition_updates_both_collections(self, mongo_db):
+        insert(mongo_db, "test_sw_direct")
+        written = []
+
+        StateWriter(mongo_db).apply(
+            "test_sw_direct",
+            {"$set": {"state": "RETRY"}, "$inc": {"num_of_retries": 1}},
+            {"task_name": "test_sw_direct", "attempt_number": 1},
+            on_written=lambda: written.append(True),
+        )
+
+        for name in ("queue_table", "schedules"):
+            doc = mongo_db[name].find_one({"task_name": "test_sw_direct"})
+            assert doc["state"] == "RETRY"
+            assert doc["num_of_retries"] == 1
+        assert mongo_db.task_attempts.count_documents({"task_name": "test_sw_direct"}) == 1
+        assert written == [True]
+
+    def test_write_behind_batches_until_flushed(self, mongo_db):
+        names = [f"test_sw_batch_{i}" for i in range(5)]
+        for name in names:
+            insert(mongo_db, name)
+        written = []
+        writer = StateWriter(mongo_db, write_behind=True, flush_ms=60_000)
+
+        for name in names:
+            writer.apply(name, {"$set": {"state": "RUNNING"}})
+            writer.apply(name, {"$set": {"state": "COMPLETED"}}, on_written=lambda n=name: written.append(n))
+
+        assert mongo_db.queue_table.count_documents({"task_name": {"$in": names}, "state": "COMPLETED"}) == 0
+        assert written == []
+
+        writer.flush()
+
+        # Transitions of one task are applied in order
+        assert mongo_db.queue_table.count_documents({"task_name": {"$in": names}, "state": "COMPLETED"}) == 5
+        assert mongo_db.schedules.count_documents({"task_name": {"$in": names}, "state": "COMPLETED"}) == 5
+        assert written == names
+
+    def test_write_behind_flushes_on_its_own(self, mongo_db):
+        insert(mongo_db, "test_sw_auto")
+        writer = StateWriter(mongo_db, write_behind=True, flush_ms=5)
+
+        writer.apply("test_sw_auto", {"$set": {"state": "RUNNING"}})
+
+        deadline = time.monotonic() + 5
+        while mongo_db.schedules.find_one({"task_name": "test_sw_auto"}).get("state") != "RUNNING":
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
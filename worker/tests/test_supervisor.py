@@ -0,0 +1,74 @@
+import sys
+import os
+import time
+import subprocess
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from supervisor import RunSupervisor
+from .test_tasks import redis_client
+
+
+CHANNEL = "test_task_cancel"
+
+
+@pytest.fixture
+def supervisor(redis_client):
+    return RunSupervisor(redis_client, channel=CHANNEL, cancel_poll_seconds=0.5)
+
+
+def sleeper():
+    return subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+
+
+class TestRunSupervisor:
+    def test_timeout_terminates_process(self, supervisor):
+        process = sleeper()
+        watch = supervisor.watch("test_sup_timeout", process, 1)
+        process.wait(timeout=10)
+        supervisor.unwatch(watch)
+
+        assert watch.timed_out.is_set()
+        assert not watch.cancelled.is_set()
+
+    def test_published_cancel_is_applied(self, supervisor, redis_client):
+        process = sleeper()
+        watch = supervisor.watch("test_sup_pubsub", process, 60)
+        time.sleep(0.5)  # let the listener subscribe
+
+        redis_client.publish(CHANNEL, "test_sup_pubsub")
+        process.wait(timeout=10)
+        supervisor.unwatch(watch)
+
+        assert watch.cancelled.is_set()
+        assert not watch.timed_out.is_set()
+
+    def test_cancel_key_set_before_start_is_applied(self, supervisor, redis_client):
+        redis_client.set("cancel:test_sup_key", "1")
+        process = sleeper()
+        watch = supervisor.watch("test_sup_key", process, 60)
+        process.wait(timeout=10)
+        supervisor.unwatch(watch)
+
+        assert watch.cancelled.is_set()
+        assert not redis_client.exists("cancel:test_sup_key")
+
+    def test_many_runs_share_one_supervisor(self, supervisor):
+        processes = [sleeper() for _ in range(20)]
+        watches = [supervisor.watch(f"test_sup_many_{i}", p, 1) for i, p in enumerate(processes)]
+        for process, watch in zip(processes, watches):
+            process.wait(timeout=10)
+            supervisor.unwatch(watch)
+
+        assert all(w.timed_out.is_set() for w in watches)
+
+    def test_unwatched_process_is_left_alone(self, supervisor):
+        process = subprocess.Popen([sys.executable, "-c", "pass"])
+        watch = supervisor.watch("test_sup_done", process, 1)
+        process.wait(timeout=10)
+        supervisor.unwatch(watch)
+        time.sleep(1.5)
+
+        assert not watch.timed_out.is_set()
+        assert not watch.cancelled.is_set()
@@ -16,6 +16,7 @@ import pytest
 from pymongo import MongoClient
 import redis
 import threading
+from datetime import datetime, timezone
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "backend"))
@@ -26,8 +27,9 @@ from tasks import (
     run_watchdog,
     handle_process_result,
     check_redis_queue,
+    prepare_run,
 )
-from models import TaskState
+from models import TaskState, TaskInRedis
 app.conf.task_always_eager = True
 
 @pytest.fixture
@@ -39,6 +41,8 @@ def mongo_db():
     # Cleanup: delete anything inserted by tests
     db.queue_table.delete_many({"task_name": {"$regex": "^test_"}})
     db["schedules"].delete_many({"task_name": {"$regex": "^test_"}})
+    db.task_attempts.delete_many({"task_name": {"$regex": "^test_"}})
+    db.task_logs.delete_many({"task_name": {"$regex": "^test_"}})
     client.close()
 
 
@@ -52,6 +56,12 @@ def redis_client():
         client.delete(key)
     for key in client.keys("cancel:test_*"):
         client.delete(key)
+    for key in client.keys("lock:*:test_*"):
+        client.delete(key)
+    for name in client.zrange("retry_queue", 0, -1):
+        if name.startswith(b"test_"):
+            client.zrem("retry_queue", name)
+            client.hdel("retry_queue:priority", name)
   
 
 #--HELPER FUNCTIONS--  
@@ -64,6 +74,15 @@ def insert_task(mongo_db, task_name, task_config=None, status="pending"):
     })
 
 
+def dispatch_payload(task_name, state=TaskState.PENDING, **fields):
+    """Serialized TaskInRedis as the scheduler queues it."""
+    return TaskInRedis(
+        id="0" * 24, task_name=task_name, priority=2, cron="* * * * *",
+        next_run=datetime.now(timezone.utc), max_retries=3, timeout_seconds=60, state=state,
+        **fields
+    ).serialize_for_redis()
+
+
 def insert_schedule(mongo_db, task_name):
     """Insert a schedule document for a task."""
     mongo_db["schedules"].insert_one({"task_name": task_name})
@@ -90,6 +109,28 @@ class TestGetTaskConfig:
         assert config["payload"] == {"key": "value"}
         assert config["timeout_seconds"] == 120
 
+    def test_dispatched_payload_is_used_instead_of_queue_table(self, mongo_db):
+        """A task dispatched with its TaskInRedis needs no queue_table row."""
+        payload = dispatch_payload("test_payload_task", num_of_retries=1, overlap_policy="queue",
+                                   task_config={"operator_path": "operators/example_operator.py"})
+
+        doc, config = get_task_config("test_payload_task", TaskInRedis.deserialize_from_redis(payload))
+
+        assert mongo_db.queue_table.count_documents({"task_name": "test_payload_task"}) == 0
+        assert config["operator_path"] == "operators/example_operator.py"
+        assert doc["num_of_retries"] == 1
+        assert doc["overlap_policy"] == "queue"
+        assert doc["next_run"].tzinfo is not None
+
+
+class TestPrepareRun:
+    def test_task_paused_while_queued_is_skipped(self, mongo_db):
+        payload = dispatch_payload("test_paused_task", state=TaskState.PAUSED,
+                                   task_config={"operator_path": "operators/example_operator.py"})
+
+        assert prepare_run("test_paused_task", payload=payload) == (None, None, None)
+        assert mongo_db.queue_table.count_documents({"task_name": "test_paused_task"}) == 0
+
 
 
 class TestSpawnOperatorProcess:
@@ -383,3 +424,89 @@ class TestHandleProcessResult:
 
         assert result == "retry"
 
+    def test_attempts_recorded_in_attempts_collection(self, mongo_db):
+        """Every attempt lands in task_attempts; the task docs keep only the last few."""
+        import threading
+        from tasks import EXECUTION_HISTORY_LIMIT
+        insert_task(mongo_db, "test_result_history")
+        insert_schedule(mongo_db, "test_result_history")
+
+        runs = EXECUTION_HISTORY_LIMIT + 2
+        for attempt_num in range(1, runs + 1):
+            handle_process_result(
+                "test_result_history", exit_code=0,
+                cancelled=threading.Event(), timed_out=threading.Event(),
+                stdout="", stderr="", start_time=datetime.now(timezone.utc), attempt_num=attempt_num
+            )
+
+        assert mongo_db.task_attempts.count_documents({"task_name": "test_result_history"}) == runs
+        schedule = mongo_db["schedules"].find_one({"task_name": "test_result_history"})
+        assert len(schedule["execution_history"]) == EXECUTION_HISTORY_LIMIT
+        assert schedule["execution_history"][-1]["attempt_number"] == runs
+
+    def test_max_retries_folds_retry_into_one_update(self, mongo_db, redis_client):
+        """With max_retries the failed attempt, $inc and RETRY/EXHAUSTED land together."""
+        import threading
+        insert_task(mongo_db, "test_result_fold")
+        insert_schedule(mongo_db, "test_result_fold")
+
+        results = [
+            handle_process_result(
+                "test_result_fold", exit_code=1,
+                cancelled=threading.Event(), timed_out=threading.Event(),
+                stdout="", stderr="boom", start_time=datetime.now(timezone.utc),
+                attempt_num=attempt_num, max_retries=2
+            )
+            for attempt_num in (1, 2)
+        ]
+
+        assert results == ["retry", "exhausted"]
+        for name in ("queue_table", "schedules"):
+            doc = mongo_db[name].find_one({"task_name": "test_result_fold"})
+            assert doc["state"] == TaskState.EXHAUSTED.value
+            assert doc["num_of_retries"] == 2
+            assert len(doc["execution_history"]) == 2
+
+    def test_retry_is_queued_with_backoff(self, mongo_db, redis_client):
+        """A failed attempt gets retry_after and waits in the Redis retry queue."""
+        import threading
+        insert_task(mongo_db, "test_result_backoff")
+        insert_schedule(mongo_db, "test_result_backoff")
+        backoff = {"base_seconds": 60, "factor": 2, "max_seconds": 3600, "jitter": 0}
+
+        before = datetime.now(timezone.utc)
+        result = handle_process_result(
+            "test_result_backoff", exit_code=1,
+            cancelled=threading.Event(), timed_out=threading.Event(),
+            stdout="", stderr="boom", start_time=before,
+            attempt_num=2, max_retries=3, retry_backoff=backoff, priority=1
+        )
+
+        assert result == "retry"
+        doc = mongo_db.queue_table.find_one({"task_name": "test_result_backoff"})
+        retry_after = doc["retry_after"].replace(tzinfo=timezone.utc)
+        assert 119 <= (retry_after - before).total_seconds() <= 125
+        due_ms = redis_client.zscore("retry_queue", "test_result_backoff")
+        assert 119 <= due_ms / 1000 - before.timestamp() <= 125
+        assert redis_client.hget("retry_queue:priority", "test_result_backoff") == b"1"
+
+    def test_result_is_counted_in_metrics(self, mongo_db, redis_client):
+        """Run duration by final state and the retry outcome reach the worker's metrics."""
+        from prometheus_client import REGISTRY
+        insert_task(mongo_db, "test_result_metrics")
+        insert_schedule(mongo_db, "test_result_metrics")
+
+        def sample(name, **labels):
+            return REGISTRY.get_sample_value(name, labels) or 0
+
+        runs_before = sample("worker_run_duration_seconds_count", task_name="", state="FAILED")
+        retries_before = sample("worker_retries_total", outcome="exhausted")
+        handle_process_result(
+            "test_result_metrics", exit_code=1,
+            cancelled=threading.Event(), timed_out=threading.Event(),
+            stdout="", stderr="boom", start_time=datetime.now(timezone.utc),
+            attempt_num=3, max_retries=3
+        )
+
+        assert sample("worker_run_duration_seconds_count", task_name="", state="FAILED") == runs_before + 1
+        assert sample("worker_retries_total", outcome="exhausted") == retries_before + 1